@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Shared-memory control block for CPU load workers
+Lets the parent process retune running workers (target %, per-worker duty
+cycle) without respawning them
+"""
+import math
+import multiprocessing
+
+class ControlBlock:
+    """
+    Shared multiprocessing.Array polled by every cpu_load_worker each cycle
+
+    Layout:
+        [0] target percentage (of cpu_count)
+        [1] generation, bumped on every announced target change
+        [2:2+n] duty cycle (0.0 - 1.0) of each worker
+        [2+n:] achieved duty cycle reported back by each worker (CPU time / wall time)
+    """
+    TARGET = 0
+    GENERATION = 1
+    DUTY_OFFSET = 2
+
+    def __init__(self, num_workers, cpu_count, target_percentage, max_duty=None, ctx=None):
+        """
+        Initialize control block
+
+        Args:
+            num_workers: Number of worker slots (fixed for the process lifetime)
+            cpu_count: CPU cores available to the container (can be fractional)
+            target_percentage: Initial target CPU usage percentage
+            max_duty: Optional per-worker duty cap from the placement plan
+            ctx: multiprocessing context the workers are started from (default: global)
+        """
+        self.num_workers = num_workers
+        self.cpu_count = cpu_count
+        self.max_duty = list(max_duty) if max_duty else [1.0] * num_workers
+        self.achieved_offset = self.DUTY_OFFSET + num_workers
+        self.array = (ctx or multiprocessing).Array('d', self.DUTY_OFFSET + 2 * num_workers)
+        # Set by the PID controller: duty cycles are then owned by the controller
+        # and set_target only moves the setpoint
+        self.closed_loop = False
+        self.set_target(target_percentage)
+
+    def max_load(self):
+        """Largest total load (cores) the workers can apply: sum of the duty caps"""
+        return sum(self.max_duty)
+
+    def distribute(self, cores):
+        """
+        Split a total load (cores) across workers without exceeding max_duty
+
+        Load is spread evenly over ceil(cores) workers and the rest idle; load a
+        capped worker cannot take goes to the other active workers, and more
+        workers are activated while some is still unassigned.
+        Example: 1.7 cores -> 2 workers at 85%; 1.4 cores with caps [1.0, 0.3] -> [1.0, 0.3] + 0.1 elsewhere
+        """
+        cores = min(max(0.0, cores), self.max_load())
+        active = min(self.num_workers, max(1, math.ceil(cores)))
+        while True:
+            duties = [0.0] * self.num_workers
+            remaining = cores
+            # Water-fill: smallest caps first, each takes an equal share of what is left
+            order = sorted(range(active), key=lambda i: self.max_duty[i])
+            for k, i in enumerate(order):
+                duties[i] = min(self.max_duty[i], 1.0, remaining / (active - k))
+                remaining -= duties[i]
+            if remaining <= 1e-9 or active == self.num_workers:
+                return duties
+            active += 1
+
+    def split_load(self, target_percentage):
+        """Open-loop split of the target across workers (see distribute)"""
+        return self.distribute(self.cpu_count * target_percentage / 100)
+
+    def set_target(self, target_percentage, announce=True):
+        """
+        Set a new target and recompute the open-loop duty cycle of every worker
+
+        Args:
+            target_percentage: New target CPU usage percentage
+            announce: Bump the generation so workers log the change and the PID
+                controller treats it as a setpoint step. Profile ticks pass False.
+        """
+        duties = self.split_load(target_percentage)
+        with self.array.get_lock():
+            self.array[self.TARGET] = target_percentage
+            if announce:
+                self.array[self.GENERATION] += 1
+            if not self.closed_loop:
+                for i, duty in enumerate(duties):
+                    self.array[self.DUTY_OFFSET + i] = duty
+
+    def set_duties(self, duties):
+        """Overwrite per-worker duty cycles (used by the closed-loop controller)"""
+        with self.array.get_lock():
+            for i, duty in enumerate(duties):
+                self.array[self.DUTY_OFFSET + i] = min(self.max_duty[i], max(0.0, duty))
+
+    def get_target(self):
+        return self.array[self.TARGET]
+
+    def get_generation(self):
+        return int(self.array[self.GENERATION])
+
+    def get_duty(self, worker_index):
+        return self.array[self.DUTY_OFFSET + worker_index]
+
+    def get_duties(self):
+        with self.array.get_lock():
+            return list(self.array[self.DUTY_OFFSET:self.achieved_offset])
+    
+    def set_achieved(self, worker_index, duty):
+        """Report the duty cycle a worker actually achieved (written by the worker)"""
+        self.array[self.achieved_offset + worker_index] = duty
+    
+    def get_achieved(self):
+        with self.array.get_lock():
+            return list(self.array[self.achieved_offset:])
+
+    def get_state(self):
+        """Get a consistent snapshot for reporting"""
+        with self.array.get_lock():
+            return {
+                'target_percentage': self.array[self.TARGET],
+                'generation': int(self.array[self.GENERATION]),
+                'target_cores': self.cpu_count * self.array[self.TARGET] / 100,
+                'cpu_count': self.cpu_count,
+                'duty_cycles': list(self.array[self.DUTY_OFFSET:self.achieved_offset]),
+                'achieved_duty_cycles': list(self.array[self.achieved_offset:]),
+            }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Closed-loop CPU controller - PID feedback on cgroup CPU usage
+Samples usage_usec from cpu.stat and retunes the duty cycle of every
+cpu_load_worker so the container converges on CPU_TARGET and holds it
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from cpu_load import get_container_cpu_usage
+
+class PidCpuController:
+    def __init__(self, control,
+                 kp=0.3, ki=0.6, kd=0.0, interval=0.5,
+                 tolerance=3.0, settle_samples=5, report_interval=10):
+        """
+        Initialize PID CPU controller
+
+        Args:
+            control: Shared ControlBlock holding the target and per-worker duty cycles
+            kp, ki, kd: PID gains (normalized: error and output as fractions of cpu_count)
+            interval: Sampling interval in seconds
+            tolerance: Error band in percentage points considered "on target"
+            settle_samples: Consecutive in-band samples required to call it settled
+            report_interval: Seconds between progress log lines
+        """
+        self.control = control
+        control.closed_loop = True
+        self.num_workers = control.num_workers
+        self.cpu_count = control.cpu_count
+        self.target_percentage = control.get_target()
+        self.generation = control.get_generation()
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.interval = interval
+        self.tolerance = tolerance
+        self.settle_samples = settle_samples
+        self.report_interval = report_interval
+
+        self.integral = 0.0
+        self.last_error = None
+        self.output = self.feedforward()  # Total load in cores
+
+        self.actual_percentage = None
+        self.error = None
+        self.in_band_count = 0
+        self.settled = False
+        self.settling_time = None
+        self.start_time = None
+        self.abs_error_sum = 0.0
+        self.abs_error_samples = 0
+        self.running = False
+
+    def feedforward(self):
+        """Open-loop load (cores) that would hit the target with no disturbance"""
+        return self.cpu_count * self.target_percentage / 100
+
+    def apply_output(self, output):
+        """Spread total load (cores) across workers within their duty caps"""
+        self.control.set_duties(self.control.distribute(output))
+
+    def update(self, actual_percentage, dt):
+        """
+        Run one PID step
+
+        Args:
+            actual_percentage: Measured container CPU usage (% of cpu_count)
+            dt: Seconds since the previous sample
+
+        Returns:
+            New total load in cores
+        """
+        error = (self.target_percentage - actual_percentage) / 100
+
+        derivative = 0.0
+        if self.last_error is not None and dt > 0:
+            derivative = (error - self.last_error) / dt
+        self.last_error = error
+
+        candidate_integral = self.integral + error * dt
+        correction = self.kp * error + self.ki * candidate_integral + self.kd * derivative
+        output = self.feedforward() + correction * self.cpu_count
+
+        # Anti-windup: stop integrating while the output is saturated at what the
+        # capped workers can actually apply
+        max_output = self.control.max_load()
+        if output > max_output:
+            output = max_output
+            if error < 0:
+                self.integral = candidate_integral
+        elif output < 0:
+            output = 0.0
+            if error > 0:
+                self.integral = candidate_integral
+        else:
+            self.integral = candidate_integral
+
+        self.output = output
+        return output
+
+    def track_settling(self, now):
+        """Update settled flag, settling time and steady-state error"""
+        abs_error = abs(self.error)
+        if abs_error <= self.tolerance:
+            self.in_band_count += 1
+            if not self.settled and self.in_band_count >= self.settle_samples:
+                self.settled = True
+                if self.settling_time is None:
+                    # Settling time is measured to the first sample of the in-band run
+                    self.settling_time = (now - self.start_time) - (self.settle_samples - 1) * self.interval
+                    print(f"[{datetime.now()}] PID controller settled in {self.settling_time:.1f}s "
+                          f"(error {self.error:+.1f} pts, tolerance ±{self.tolerance:.1f})")
+                else:
+                    print(f"[{datetime.now()}] PID controller back within tolerance (error {self.error:+.1f} pts)")
+        else:
+            if self.settled:
+                print(f"[{datetime.now()}] PID controller left tolerance band (error {self.error:+.1f} pts)")
+            self.in_band_count = 0
+            self.settled = False
+
+        if self.settled:
+            self.abs_error_sum += abs_error
+            self.abs_error_samples += 1
+
+    def reset(self, now):
+        """Pick up a new setpoint from the control block and restart settling measurement"""
+        self.target_percentage = self.control.get_target()
+        self.generation = self.control.get_generation()
+        self.integral = 0.0
+        self.last_error = None
+        self.output = self.feedforward()
+        self.in_band_count = 0
+        self.settled = False
+        self.settling_time = None
+        self.start_time = now
+        self.abs_error_sum = 0.0
+        self.abs_error_samples = 0
+        print(f"[{datetime.now()}] PID setpoint changed to {self.target_percentage:.0f}%")
+
+    def get_stats(self):
+        """Get controller state for reporting"""
+        steady_state_error = None
+        if self.abs_error_samples:
+            steady_state_error = self.abs_error_sum / self.abs_error_samples
+        # Duties are uneven once caps apply, so report the mean over busy workers
+        duties = [d for d in (self.control.get_duty(i) for i in range(self.num_workers)) if d > 0]
+        return {
+            'target_percentage': self.target_percentage,
+            'actual_percentage': self.actual_percentage,
+            'error': self.error,
+            'output_cores': self.output,
+            'duty_per_worker': sum(duties) / len(duties) if duties else 0.0,
+            'settled': self.settled,
+            'settling_time': self.settling_time,
+            'steady_state_error': steady_state_error,
+        }
+
+    def run(self):
+        """Control loop: sample cgroup usage, update PID, write duty cycles"""
+        self.running = True
+        self.start_time = time.time()
+        self.apply_output(self.output)
+
+        last_usage = get_container_cpu_usage()
+        if last_usage is None:
+            print(f"[{datetime.now()}] Warning: cgroup CPU usage not available, "
+                  f"PID controller disabled (open-loop {self.output:.2f} cores)")
+            self.running = False
+            return
+
+        print(f"[{datetime.now()}] PID controller started: target {self.target_percentage:.0f}% of "
+              f"{self.cpu_count:.2f} cores, {self.num_workers} worker(s), "
+              f"kp={self.kp} ki={self.ki} kd={self.kd}, interval={self.interval}s")
+
+        last_time = time.time()
+        last_report = last_time
+        while self.running:
+            time.sleep(self.interval)
+
+            usage = get_container_cpu_usage()
+            now = time.time()
+            dt = now - last_time
+            if usage is None or dt <= 0:
+                continue
+
+            if self.control.get_generation() != self.generation:
+                self.reset(now)
+            else:
+                # Track gradual setpoint changes (load profiles) without resetting
+                self.target_percentage = self.control.get_target()
+
+            self.actual_percentage = max(0.0, (usage - last_usage) / dt / self.cpu_count * 100)
+            self.error = self.target_percentage - self.actual_percentage
+            last_usage = usage
+            last_time = now
+
+            self.apply_output(self.update(self.actual_percentage, dt))
+            self.track_settling(now)
+
+            if now - last_report >= self.report_interval:
+                last_report = now
+                stats = self.get_stats()
+                settling = f"{stats['settling_time']:.1f}s" if stats['settling_time'] is not None else "not yet"
+                print(f"[{datetime.now()}] PID | Actual: {self.actual_percentage:.1f}% | "
+                      f"Target: {self.target_percentage:.0f}% | Error: {self.error:+.1f} pts | "
+                      f"Output: {self.output:.2f} cores ({stats['duty_per_worker']*100:.1f}%/worker) | "
+                      f"Settled: {settling}")
+
+    def start(self):
+        """Run the control loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop the control loop"""
+        self.running = False
+
+def create_pid_controller(control):
+    """
+    Create a PID controller for a control block, configured from env
+
+    Env variables: PID_KP, PID_KI, PID_KD, PID_INTERVAL, PID_TOLERANCE
+    """
+    return PidCpuController(
+        control,
+        kp=float(os.getenv('PID_KP', '0.3')),
+        ki=float(os.getenv('PID_KI', '0.6')),
+        kd=float(os.getenv('PID_KD', '0.0')),
+        interval=float(os.getenv('PID_INTERVAL', '0.5')),
+        tolerance=float(os.getenv('PID_TOLERANCE', '3.0')),
+    )
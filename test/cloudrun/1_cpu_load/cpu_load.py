@@ -8,45 +8,101 @@ import time
 import os
 from datetime import datetime
 
-def cpu_load_worker(target_load=1.0, duration=None):
+from control_block import ControlBlock
+from load_profile import ProfileRunner, load_profile_from_env
+from work_kernels import get_kernel, calibrate_kernel, kernel_for_worker
+from placement import create_placement_plan, pin_current_process
+
+# Window over which workers report their achieved duty cycle
+ACHIEVED_WINDOW_NS = 1_000_000_000
+
+def get_duty_cycle_ns():
+    """
+    Get the duty-cycle length in nanoseconds
+    
+    CPU_CYCLE_MS sets the requested length (default 10ms). It is snapped so
+    that a whole number of cycles fits the cgroup CFS period, which keeps each
+    period's CPU time even instead of bursting into throttling. Minimum 1ms.
+    """
+    period_us = get_container_cpu_period()
+    requested_ns = max(1_000_000, int(float(os.getenv('CPU_CYCLE_MS', '10')) * 1_000_000))
+    period_ns = period_us * 1000
+    cycles_per_period = max(1, round(period_ns / requested_ns))
+    return max(1_000_000, period_ns // cycles_per_period)
+
+def cpu_load_worker(target_load=1.0, duration=None, control=None, worker_index=0, kernel_name=None, cpu=None):
     """
     Worker function that generates CPU load
     
+    Each cycle is busy for cycle * target_load and sleeps for the rest. Time is
+    measured with perf_counter_ns and cycles run on absolute deadlines, so
+    sleep overshoot does not accumulate and load stays smooth at ms granularity.
+    With a control block, the achieved duty (process CPU time / wall time over
+    ACHIEVED_WINDOW_NS) is written back to the worker's slot for /metrics.
+    
     Args:
         target_load: Target load for this worker (0.0 to 1.0, where 1.0 = 100%)
         duration: Optional duration in seconds
+        control: Optional shared ControlBlock. When given, the load is re-read
+            from the worker's slot every cycle so the parent can retune it live.
+        worker_index: Slot of this worker in the control block
+        kernel_name: Work kernel to run (see work_kernels.KERNELS). Defaults to
+            CPU_KERNEL_MIX / CPU_KERNEL for this worker_index.
+        cpu: Optional CPU id to pin this worker to (from the placement plan)
     """
-    print(f"[{datetime.now()}] Worker {os.getpid()} started (target load: {target_load*100:.0f}%)")
-    start_time = time.time()
-    
-    if target_load >= 0.99:
-        # If target is ~100%, just run continuously
-        while True:
-            for i in range(10000):
-                _ = i ** 2
-            
-            if duration and (time.time() - start_time) > duration:
-                break
-    else:
-        # For partial load, use busy-wait cycle
-        # busy_time / (busy_time + sleep_time) = target_load
-        cycle_time = 0.1  # 100ms cycle
-        busy_time = cycle_time * target_load
-        sleep_time = cycle_time * (1 - target_load)
+    pinned = pin_current_process(cpu)
+    generation = None
+    if control is not None:
+        target_load = control.get_duty(worker_index)
+        generation = control.get_generation()
+    
+    cycle_ns = get_duty_cycle_ns()
+    kernel = get_kernel(kernel_name or kernel_for_worker(worker_index))
+    quantum, ops_per_ms = calibrate_kernel(kernel)
+    print(f"[{datetime.now()}] Worker {os.getpid()} started (target load: {target_load*100:.0f}%, "
+          f"cycle: {cycle_ns / 1_000_000:.1f}ms, kernel: {kernel.name} @ {ops_per_ms:.0f} ops/ms, "
+          f"quantum: {quantum} ops{f', pinned to CPU {cpu}' if pinned else ''})")
+    
+    start_ns = time.perf_counter_ns()
+    end_ns = start_ns + int(duration * 1_000_000_000) if duration else None
+    
+    # Stagger workers across the cycle so their busy phases do not line up
+    num_workers = control.num_workers if control is not None else 1
+    cycle_start = start_ns + cycle_ns * worker_index // max(1, num_workers)
+    window_start = start_ns
+    window_cpu = time.process_time_ns()
+    
+    while True:
+        if control is not None:
+            target_load = control.get_duty(worker_index)
+            if control.get_generation() != generation:
+                generation = control.get_generation()
+                print(f"[{datetime.now()}] Worker {os.getpid()} retuned (target load: {target_load*100:.0f}%)")
         
-        while True:
-            # Busy period
-            busy_start = time.time()
-            while (time.time() - busy_start) < busy_time:
-                for i in range(1000):
-                    _ = i ** 2
-            
-            # Sleep period
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            
-            if duration and (time.time() - start_time) > duration:
-                break
+        # busy_time / cycle_time = target_load
+        busy_ns = cycle_ns if target_load >= 0.99 else int(cycle_ns * max(0.0, target_load))
+        busy_deadline = cycle_start + busy_ns
+        
+        # Busy period: whole calibrated quanta until the deadline
+        while time.perf_counter_ns() < busy_deadline:
+            kernel.run(quantum)
+        
+        # Sleep period: until the absolute start of the next cycle
+        cycle_start += cycle_ns
+        now = time.perf_counter_ns()
+        if now < cycle_start:
+            time.sleep((cycle_start - now) / 1_000_000_000)
+        elif now - cycle_start > cycle_ns:
+            # Fell more than a cycle behind (e.g. CFS throttled): resync rather than burst
+            cycle_start = now
+        
+        if control is not None and now - window_start >= ACHIEVED_WINDOW_NS:
+            cpu_ns = time.process_time_ns()
+            control.set_achieved(worker_index, (cpu_ns - window_cpu) / (now - window_start))
+            window_start, window_cpu = now, cpu_ns
+        
+        if end_ns and time.perf_counter_ns() > end_ns:
+            break
 
 def get_container_cpu_quota():
     """Get container CPU quota from cgroup"""
@@ -77,6 +133,44 @@ def get_container_cpu_quota():
     
     return None
 
+def get_container_cpu_period():
+    """Get CFS period in microseconds from cgroup (default 100000 = 100ms)"""
+    try:
+        # Try cgroup v2 first
+        if os.path.exists('/sys/fs/cgroup/cpu.max'):
+            with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+                content = f.read().strip().split()
+                if len(content) > 1:
+                    return int(content[1])
+        
+        # Try cgroup v1
+        period_file = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+        if os.path.exists(period_file):
+            with open(period_file, 'r') as f:
+                return int(f.read().strip())
+    except Exception as e:
+        print(f"[{datetime.now()}] Warning: Could not read cgroup CPU period: {e}")
+    
+    return 100000
+
+def get_container_cpu_usage():
+    """Get actual CPU usage from cgroup"""
+    try:
+        # Try cgroup v2
+        if os.path.exists('/sys/fs/cgroup/cpu.stat'):
+            with open('/sys/fs/cgroup/cpu.stat', 'r') as f:
+                for line in f:
+                    if line.startswith('usage_usec'):
+                        return int(line.split()[1]) / 1000000  # Convert to seconds
+        
+        # Try cgroup v1
+        if os.path.exists('/sys/fs/cgroup/cpuacct/cpuacct.usage'):
+            with open('/sys/fs/cgroup/cpuacct/cpuacct.usage', 'r') as f:
+                return int(f.read().strip()) / 1000000000  # Convert nanoseconds to seconds
+    except:
+        pass
+    return None
+
 def get_cpu_count():
     """Get the number of CPU cores available (considering container limits)"""
     # Check if running in container with CPU limit
@@ -119,21 +213,46 @@ def calculate_target_processes(cpu_count, target_percentage=85):
 
 def main():
     """Main function to start CPU load generator"""
+    # Optional load profile (CPU_PROFILE / CPU_PROFILE_FILE) replaces the fixed target
+    profile = load_profile_from_env()
+    
     # Get target CPU percentage from environment variable (default: 85%)
     target_percentage = int(os.getenv('CPU_TARGET', '85'))
     
-    # Validate target percentage
-    if target_percentage not in [75, 85, 99]:
+    if profile:
+        # Start from the profile's first value
+        target_percentage = round(profile.target_at(0)[0])
+    elif target_percentage not in [75, 85, 99]:
+        # Validate target percentage
         print(f"[{datetime.now()}] Warning: CPU_TARGET={target_percentage} not in [75, 85, 99]. Using default 85%")
         target_percentage = 85
     
     print(f"[{datetime.now()}] ===== CPU Load Generator Started =====")
     print(f"[{datetime.now()}] Target: {target_percentage}% CPU utilization")
     
+    # Control mode: "open" (fixed duty cycle) or "pid" (closed-loop on cgroup usage)
+    control_mode = os.getenv('CPU_CONTROL_MODE', 'open').lower()
+    if control_mode not in ['open', 'pid']:
+        print(f"[{datetime.now()}] Warning: CPU_CONTROL_MODE={control_mode} not in [open, pid]. Using open")
+        control_mode = 'open'
+    
+    # Validate kernel selection up front (raises ValueError on unknown kernels)
+    kernel_for_worker(0)
+    print(f"[{datetime.now()}] Work kernel(s): {os.getenv('CPU_KERNEL_MIX') or os.getenv('CPU_KERNEL', 'integer')}")
+    
     # Get system CPU count (considering container limits)
     cpu_count = get_cpu_count()
     target_processes_float = cpu_count * target_percentage / 100
-    target_processes = max(1, int(cpu_count))  # At least 1 full process
+    
+    # One worker slot per (partial) core of capacity, pinned to CPUs; slots
+    # beyond the current target idle until the controller/profile needs them
+    # (no HTTP plane here, so nothing is reserved unless CPU_RESERVED_CORES is set)
+    plan = create_placement_plan(cpu_count, default_reserved_cores=0.0)
+    plan.print_plan()
+    target_processes = plan.num_workers
+    
+    # Shared control block lets workers be retuned without respawning
+    control = ControlBlock(target_processes, cpu_count, target_percentage, max_duty=plan.max_duty)
     
     # Calculate load per process
     if target_processes > 0:
@@ -146,15 +265,34 @@ def main():
     print(f"[{datetime.now()}] Target load: {target_processes_float:.2f} cores")
     print(f"[{datetime.now()}] Spawning {target_processes} process(es)")
     print(f"[{datetime.now()}] Load per process: {load_per_process*100:.1f}%")
+    print(f"[{datetime.now()}] Control mode: {control_mode}")
+    
+    controller = None
+    if control_mode == 'pid':
+        from cpu_controller import create_pid_controller
+        controller = create_pid_controller(control)
     
     # Create and start worker processes
     processes = []
     for i in range(target_processes):
-        p = multiprocessing.Process(target=cpu_load_worker, args=(load_per_process,))
+        p = multiprocessing.Process(target=cpu_load_worker, args=(load_per_process, None, control, i, None, plan.worker_cpu(i)))
         p.start()
         processes.append(p)
         print(f"[{datetime.now()}] Started process {i+1}/{target_processes} (PID: {p.pid})")
     
+    # Pin the parent (controller / profile threads) after forking so workers
+    # do not inherit its affinity
+    if plan.pin:
+        pin_current_process(plan.control_cpu)
+    
+    if controller:
+        controller.start()
+    
+    runner = None
+    if profile:
+        runner = ProfileRunner(control, profile)
+        runner.start()
+    
     print(f"[{datetime.now()}] ===== All processes started successfully =====")
     print(f"[{datetime.now()}] Press Ctrl+C to stop")
     
@@ -164,6 +302,10 @@ def main():
             p.join()
     except KeyboardInterrupt:
         print(f"\n[{datetime.now()}] Stopping all processes...")
+        if controller:
+            controller.stop()
+        if runner:
+            runner.stop()
         for p in processes:
             p.terminate()
             p.join()
@@ -8,73 +8,212 @@ import time
 import os
 import math
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
-import socket
-import psutil
+import json
+from urllib.parse import urlparse, parse_qs
 
 # Import the existing CPU load logic
 from cpu_load import get_container_cpu_quota, cpu_load_worker
+from cpu_controller import create_pid_controller
+from control_block import ControlBlock
+from load_profile import LoadProfile, ProfileRunner, load_profile_from_env
+from work_kernels import kernel_for_worker
+from placement import create_placement_plan, pin_current_process
+from metrics_sampler import create_metrics_sampler
+from gce_metadata import prefetch_metadata, get_metadata
+from metrics_exporter import CONTENT_TYPE, MetricsWriter, add_sampler_metrics
 
 # Global flag to track if CPU load should start
 cpu_load_ready = threading.Event()
+# Set once the HTTP socket is bound and listening
+http_ready = threading.Event()
 
-def get_container_cpu_usage():
-    """Get actual CPU usage from cgroup"""
-    try:
-        # Try cgroup v2
-        if os.path.exists('/sys/fs/cgroup/cpu.stat'):
-            with open('/sys/fs/cgroup/cpu.stat', 'r') as f:
-                for line in f:
-                    if line.startswith('usage_usec'):
-                        return int(line.split()[1]) / 1000000  # Convert to seconds
-        
-        # Try cgroup v1
-        if os.path.exists('/sys/fs/cgroup/cpuacct/cpuacct.usage'):
-            with open('/sys/fs/cgroup/cpuacct/cpuacct.usage', 'r') as f:
-                return int(f.read().strip()) / 1000000000  # Convert nanoseconds to seconds
-    except:
-        pass
-    return None
-
-def calculate_cpu_percent(interval=1.0):
-    """Calculate CPU percentage over an interval using cgroup data"""
-    usage1 = get_container_cpu_usage()
-    if usage1 is None:
-        # Fallback to psutil if cgroup not available
-        return psutil.cpu_percent(interval=interval)
-    
-    time.sleep(interval)
-    
-    usage2 = get_container_cpu_usage()
-    if usage2 is None:
-        return psutil.cpu_percent(interval=0)
-    
-    # Calculate CPU percentage
-    cpu_quota = get_container_cpu_quota()
-    if cpu_quota:
-        cpu_cores = cpu_quota
-    else:
-        cpu_cores = multiprocessing.cpu_count()
+def add_cpu_metrics(writer, control, controller=None, placement=None, processes=()):
+    """Add CPU target, per-worker duty and PID metrics (shared with the combined generator)"""
+    if control:
+        state = control.get_state()
+        writer.add('cpu_target_percent', 'gauge', 'Target CPU usage percentage', state['target_percentage'])
+        writer.add('cpu_target_cores', 'gauge', 'Target CPU usage in cores', state['target_cores'])
+        writer.add('cpu_target_generation_total', 'counter', 'Announced target changes', state['generation'])
+        for i, (duty, achieved) in enumerate(zip(state['duty_cycles'], state['achieved_duty_cycles'])):
+            labels = {'worker': i, 'cpu': placement.worker_cpus[i] if placement else ''}
+            writer.add('cpu_worker_duty_setpoint', 'gauge', 'Duty cycle requested from each worker', duty, labels)
+            writer.add('cpu_worker_duty_achieved', 'gauge', 'Duty cycle achieved by each worker (CPU time / wall time)',
+                       achieved, labels)
     
-    # Calculate percentage
-    usage_diff = usage2 - usage1
-    cpu_percent = (usage_diff / interval / cpu_cores) * 100
+    if controller:
+        stats = controller.get_stats()
+        writer.add('cpu_pid_measured_percent', 'gauge', 'CPU usage measured by the PID controller',
+                   stats['actual_percentage'])
+        writer.add('cpu_pid_error_percent', 'gauge', 'PID error (target - measured) in percentage points', stats['error'])
+        writer.add('cpu_pid_output_cores', 'gauge', 'PID controller output in cores', stats['output_cores'])
+        writer.add('cpu_pid_settled', 'gauge', '1 when the measured usage is within tolerance', stats['settled'])
     
-    return min(100, max(0, cpu_percent))
+    writer.add('workers_alive', 'gauge', 'CPU worker processes alive', sum(1 for p in processes if p.is_alive()))
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     """Simple HTTP handler for Cloud Run health checks"""
     
+    # Store shared control block, PID controller and profile runner as class
+    # variables (controller is None in open-loop mode)
+    control = None
+    controller = None
+    profile_runner = None
+    placement = None
+    sampler = None
+    processes = []
+    
+    def send_json(self, status, payload):
+        """Send a JSON response"""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        """Handle POST requests"""
+        path = urlparse(self.path).path
+        if path == '/target':
+            self.handle_set_target()
+        elif path == '/profile':
+            self.handle_set_profile()
+        else:
+            self.send_response(404)
+            self.end_headers()
+    
+    def handle_set_target(self):
+        """
+        Retune running workers to a new CPU target
+        
+        Accepts JSON body {"target": 85} or query string ?target=85
+        """
+        control = HealthCheckHandler.control
+        if control is None:
+            self.send_json(503, {'error': 'CPU workers not started yet'})
+            return
+        
+        try:
+            target = None
+            query = parse_qs(urlparse(self.path).query)
+            if 'target' in query:
+                target = query['target'][0]
+            else:
+                length = int(self.headers.get('Content-Length', 0))
+                if length > 0:
+                    target = json.loads(self.rfile.read(length)).get('target')
+            target = float(target)
+        except (TypeError, ValueError, AttributeError):
+            self.send_json(400, {'error': 'Expected {"target": <percent>} or ?target=<percent>'})
+            return
+        
+        if not 0 <= target <= 100:
+            self.send_json(400, {'error': 'target must be between 0 and 100'})
+            return
+        
+        # A manual target overrides any running profile
+        if HealthCheckHandler.profile_runner and HealthCheckHandler.profile_runner.running:
+            HealthCheckHandler.profile_runner.stop()
+            print(f"[{datetime.now()}] Load profile stopped (manual target override)")
+        
+        previous = control.get_target()
+        control.set_target(target)
+        print(f"[{datetime.now()}] 🎯 CPU target changed via HTTP: {previous:.0f}% -> {target:.0f}%")
+        
+        state = control.get_state()
+        state['previous_target_percentage'] = previous
+        self.send_json(200, state)
+    
+    def handle_set_profile(self):
+        """Start a new load profile from a JSON spec body (see load_profile.py)"""
+        control = HealthCheckHandler.control
+        if control is None:
+            self.send_json(503, {'error': 'CPU workers not started yet'})
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            # Remote specs may only replay traces from CPU_PROFILE_REPLAY_DIR
+            profile = LoadProfile.from_spec(json.loads(self.rfile.read(length)),
+                                            base_dir=os.getenv('CPU_PROFILE_REPLAY_DIR'), confine=True)
+        except (ValueError, TypeError, AttributeError, OSError) as e:
+            self.send_json(400, {'error': f'Invalid profile: {e}'})
+            return
+        
+        if HealthCheckHandler.profile_runner:
+            HealthCheckHandler.profile_runner.stop()
+        runner = ProfileRunner(control, profile)
+        HealthCheckHandler.profile_runner = runner
+        runner.start()
+        print(f"[{datetime.now()}] 📈 New load profile started via HTTP")
+        self.send_json(200, {'duration': profile.duration, 'segments': len(profile.segments), 'loop': profile.loop})
+    
+    def send_text(self, status, text, content_type='text/plain; charset=utf-8'):
+        """Send a small response body"""
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def handle_readyz(self):
+        """Ready once CPU workers are started and all of them are alive"""
+        if not cpu_load_ready.is_set():
+            self.send_json(503, {'ready': False, 'reason': 'CPU workers not started yet'})
+            return
+        dead = [p.pid for p in HealthCheckHandler.processes if not p.is_alive()]
+        if dead:
+            self.send_json(503, {'ready': False, 'reason': 'CPU worker(s) exited', 'dead_pids': dead})
+            return
+        self.send_json(200, {'ready': True, 'workers': len(HealthCheckHandler.processes)})
+    
+    def render_metrics(self):
+        """Render /metrics from the cached sample and control block snapshot"""
+        writer = MetricsWriter()
+        sampler = HealthCheckHandler.sampler
+        add_sampler_metrics(writer, sampler.latest() if sampler else None)
+        add_cpu_metrics(writer, HealthCheckHandler.control, HealthCheckHandler.controller,
+                        HealthCheckHandler.placement, HealthCheckHandler.processes)
+        return writer.render()
+    
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/health' or self.path == '/':
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self.send_text(200, self.render_metrics(), CONTENT_TYPE)
+        elif path == '/livez':
+            # Constant-time liveness: the server thread is answering
+            self.send_text(200, 'ok')
+        elif path == '/readyz':
+            self.handle_readyz()
+        elif path == '/placement':
+            if HealthCheckHandler.placement is None:
+                self.send_json(503, {'error': 'Placement not planned yet'})
+            else:
+                self.send_json(200, HealthCheckHandler.placement.to_dict())
+        elif path == '/profile':
+            if HealthCheckHandler.profile_runner is None:
+                self.send_json(404, {'error': 'No load profile'})
+            else:
+                self.send_json(200, HealthCheckHandler.profile_runner.get_status())
+        elif path == '/target':
+            if HealthCheckHandler.control is None:
+                self.send_json(503, {'error': 'CPU workers not started yet'})
+            else:
+                self.send_json(200, HealthCheckHandler.control.get_state())
+        elif path in ['/status', '/health', '/']:
+            # Full dashboard (/health and / kept as aliases for existing scripts)
             self.send_response(200)
             self.send_header('Content-type', 'text/html; charset=utf-8')
             self.end_headers()
             
             # Get current status
             target_percentage = int(os.getenv('CPU_TARGET', '50'))
+            if HealthCheckHandler.control:
+                target_percentage = round(HealthCheckHandler.control.get_target())
             
             # Get CPU info
             cpu_limit_env = os.getenv('CPU_LIMIT')
@@ -88,24 +227,65 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             # Calculate target load
             target_processes_float = cpu_count * target_percentage / 100
             
-            # Get memory info
+            # Get CPU / memory / throttling from the background sampler (never blocks)
             mem_limit = "N/A"
             mem_usage = "N/A"
-            try:
-                mem_info = psutil.virtual_memory()
-                mem_limit = f"{mem_info.total / (1024**3):.2f} GB"
-                mem_usage = f"{mem_info.percent:.1f}%"
-            except:
-                pass
-            
-            # Get actual CPU usage (average over 1 second)
             cpu_usage_percent = "N/A"
-            try:
-                # Get CPU percentage over 1 second interval from cgroup
-                cpu_percent_val = calculate_cpu_percent(interval=1.0)
-                cpu_usage_percent = f"{cpu_percent_val:.1f}%"
-            except:
-                pass
+            cpu_usage_avg = "N/A"
+            throttled = "N/A"
+            python_processes = "N/A"
+            sample = HealthCheckHandler.sampler.latest() if HealthCheckHandler.sampler else None
+            if sample:
+                mem_limit = f"{sample['memory_limit'] / (1024**3):.2f} GB"
+                mem_usage = f"{sample['memory_percent']:.1f}%"
+                if sample['cpu_percent'] is not None:
+                    cpu_usage_percent = f"{sample['cpu_percent']:.1f}%"
+                avg = HealthCheckHandler.sampler.average('cpu_percent', 60)
+                if avg is not None:
+                    cpu_usage_avg = f"{avg:.1f}%"
+                if sample['throttled_percent'] is not None:
+                    throttled = f"{sample['throttled_percent']:.1f}% of periods"
+                if sample['python_processes'] is not None:
+                    python_processes = sample['python_processes']
+            
+            # Get PID controller status
+            control_mode = os.getenv('CPU_CONTROL_MODE', 'open').lower()
+            
+            # Get load profile status
+            profile_status = "None (fixed target)"
+            if HealthCheckHandler.profile_runner:
+                status = HealthCheckHandler.profile_runner.get_status()
+                state = "finished" if status['finished'] else ("running" if status['running'] else "stopped")
+                profile_status = (f"{state} - segment {status['segment']}/{status['segments']}, "
+                                  f"{status['elapsed']:.0f}s / {status['duration']:.0f}s")
+            
+            # Get placement plan summary (full plan at /placement)
+            placement_summary = "N/A"
+            plan = HealthCheckHandler.placement
+            if plan:
+                workers = ", ".join(f"W{i+1}→CPU{cpu}" for i, cpu in enumerate(plan.worker_cpus))
+                placement_summary = (f"{workers} | control→CPU{plan.control_cpu}"
+                                     f"{' (shared)' if plan.control_shared else ''}"
+                                     f"{'' if plan.pin else ' | unpinned'}")
+            
+            controller_html = ""
+            if HealthCheckHandler.controller:
+                stats = HealthCheckHandler.controller.get_stats()
+                actual = f"{stats['actual_percentage']:.1f}%" if stats['actual_percentage'] is not None else "N/A"
+                error = f"{stats['error']:+.1f} pts" if stats['error'] is not None else "N/A"
+                settling = f"{stats['settling_time']:.1f}s" if stats['settling_time'] is not None else "Not settled yet"
+                steady = f"±{stats['steady_state_error']:.2f} pts" if stats['steady_state_error'] is not None else "N/A"
+                controller_html = f"""
+    <div class="section">
+        <h2>🎛️ PID Controller</h2>
+        <p><span class="label">Measured Usage:</span> <span class="value">{actual}</span></p>
+        <p><span class="label">Error:</span> <span class="highlight">{error}</span></p>
+        <p><span class="label">Output:</span> <span class="value">{stats['output_cores']:.2f} cores ({stats['duty_per_worker']*100:.1f}% per worker)</span></p>
+        <p><span class="label">Settled:</span> <span class="value">{"Yes" if stats['settled'] else "No"}</span></p>
+        <p><span class="label">Settling Time:</span> <span class="value">{settling}</span></p>
+        <p><span class="label">Steady-State Error:</span> <span class="value">{steady}</span></p>
+    </div>
+    """
             
             # Get environment variables
             startup_delay = os.getenv('STARTUP_DELAY', 'Not set')
@@ -114,57 +294,11 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             k_revision = os.getenv('K_REVISION', 'N/A')
             k_configuration = os.getenv('K_CONFIGURATION', 'N/A')
             
-            # Try to get metadata from Cloud Run metadata server
-            project_id = "N/A"
-            region = "N/A"
-            service_url = "N/A"
-            instance_id = "N/A"
-            try:
-                import urllib.request
-                import json
-                
-                # Set metadata server headers
-                headers = {'Metadata-Flavor': 'Google'}
-                
-                # Get project ID
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/project/project-id',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        project_id = response.read().decode()
-                except:
-                    pass
-                
-                # Get instance ID
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/instance/id',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        instance_id = response.read().decode()
-                except:
-                    pass
-                
-                # Get region from zone
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/instance/region',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        region_path = response.read().decode()
-                        region = region_path.split('/')[-1] if '/' in region_path else region_path
-                except:
-                    # Try to extract from K_SERVICE env
-                    if k_service != 'Not in Cloud Run':
-                        # Region might be in service URL
-                        pass
-                
-            except Exception as e:
-                pass
+            # Cloud Run metadata (fetched once at startup, cached)
+            metadata = get_metadata()
+            project_id = metadata['project_id']
+            region = metadata['region']
+            instance_id = metadata['instance_id']
             
             # Build HTML response
             html = f"""<!DOCTYPE html>
@@ -189,8 +323,13 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         <p><span class="label">CPU Target:</span> <span class="highlight">{target_percentage}%</span></p>
         <p><span class="label">Target Load:</span> <span class="value">{target_processes_float:.2f} cores</span></p>
         <p><span class="label">Actual CPU Usage:</span> <span class="highlight">{cpu_usage_percent}</span></p>
+        <p><span class="label">CPU Usage (1 min avg):</span> <span class="value">{cpu_usage_avg}</span></p>
+        <p><span class="label">CPU Throttled:</span> <span class="value">{throttled}</span></p>
+        <p><span class="label">Control Mode:</span> <span class="value">{control_mode}</span></p>
+        <p><span class="label">Work Kernel(s):</span> <span class="value">{os.getenv('CPU_KERNEL_MIX') or os.getenv('CPU_KERNEL', 'integer')}</span></p>
+        <p><span class="label">Load Profile:</span> <span class="value">{profile_status}</span></p>
     </div>
-    
+    {controller_html}
     <div class="section">
         <h2>💻 Resource Limits</h2>
         <p><span class="label">CPU Cores:</span> <span class="value">{cpu_count:.2f} cores</span></p>
@@ -217,8 +356,9 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
     
     <div class="section">
         <h2>📊 Process Information</h2>
-        <p><span class="label">Active Processes:</span> <span class="value">{len([p for p in psutil.process_iter() if 'python' in p.name().lower()])} Python processes</span></p>
+        <p><span class="label">Active Processes:</span> <span class="value">{python_processes} Python processes</span></p>
         <p><span class="label">Main PID:</span> <span class="value">{os.getpid()}</span></p>
+        <p><span class="label">Placement:</span> <span class="value">{placement_summary}</span></p>
     </div>
     
     <p style="color: #666; margin-top: 30px; text-align: center;">
@@ -237,38 +377,37 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         pass
 
 def start_http_server(port=8080):
-    """Start HTTP server for Cloud Run"""
+    """
+    Bind the HTTP server for Cloud Run and serve it from a daemon thread
+
+    The socket is listening when this returns (http_ready is set), so there
+    is no port polling and the load can start right away
+    """
     try:
-        server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-        print(f"[{datetime.now()}] ✅ HTTP server bound to port {port}")
-        print(f"[{datetime.now()}] ✅ Ready to accept health checks")
-        server.serve_forever()
+        # Threaded so probes never queue behind a dashboard render
+        server = ThreadingHTTPServer(('0.0.0.0', port), HealthCheckHandler)
     except Exception as e:
         print(f"[{datetime.now()}] ❌ Failed to start HTTP server: {e}")
         raise
-
-def wait_for_port(port, timeout=10):
-    """Wait for port to be available"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(1)
-                result = s.connect_ex(('127.0.0.1', port))
-                if result == 0:
-                    return True
-        except:
-            pass
-        time.sleep(0.1)
-    return False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_ready.set()
+    print(f"[{datetime.now()}] ✅ HTTP server bound to port {port}")
+    print(f"[{datetime.now()}] ✅ Ready to accept health checks")
+    return server
 
 def main():
     """Main function"""
-    # Get target CPU percentage from environment variable (REQUIRED)
+    # Optional load profile (CPU_PROFILE / CPU_PROFILE_FILE) replaces the fixed target
+    profile = load_profile_from_env()
+    
+    # Get target CPU percentage from environment variable (REQUIRED unless a profile is set)
     target_percentage = int(os.getenv('CPU_TARGET', '0'))
     
-    # Validate target percentage
-    if target_percentage not in [75, 85, 95]:
+    if profile:
+        # Start from the profile's first value
+        target_percentage = round(profile.target_at(0)[0])
+    elif target_percentage not in [75, 85, 95]:
+        # Validate target percentage
         print(f"[{datetime.now()}] ERROR: CPU_TARGET must be set to 75, 85, or 95")
         print(f"[{datetime.now()}] Current value: {target_percentage}")
         raise ValueError("Invalid CPU_TARGET. Must be 75, 85, or 95")
@@ -276,33 +415,42 @@ def main():
     print(f"[{datetime.now()}] ===== CPU Load Generator Started (Cloud Run Mode) =====")
     print(f"[{datetime.now()}] Target: {target_percentage}% CPU utilization")
     
+    # Control mode: "open" (fixed duty cycle) or "pid" (closed-loop on cgroup usage)
+    control_mode = os.getenv('CPU_CONTROL_MODE', 'open').lower()
+    if control_mode not in ['open', 'pid']:
+        print(f"[{datetime.now()}] ERROR: CPU_CONTROL_MODE must be open or pid")
+        raise ValueError("Invalid CPU_CONTROL_MODE. Must be open or pid")
+    print(f"[{datetime.now()}] Control mode: {control_mode}")
+    
+    # Validate kernel selection up front (raises ValueError on unknown kernels)
+    kernel_for_worker(0)
+    print(f"[{datetime.now()}] Work kernel(s): {os.getenv('CPU_KERNEL_MIX') or os.getenv('CPU_KERNEL', 'integer')}")
+    
     # Get PORT from environment (Cloud Run sets this)
     port = int(os.environ.get('PORT', 8080))
     print(f"[{datetime.now()}] Port: {port}")
     
-    # Start HTTP server in background thread (MUST be ready immediately)
-    http_thread = threading.Thread(target=start_http_server, args=(port,), daemon=True)
-    http_thread.start()
+    # Bind the HTTP server first so the startup probe passes as early as possible
+    start_http_server(port)
     
-    print(f"[{datetime.now()}] HTTP server starting on port {port}...")
+    # Fetch Cloud Run metadata once, concurrently, without delaying the HTTP bind
+    prefetch_metadata()
     
-    # Wait for HTTP server to actually be listening
-    print(f"[{datetime.now()}] Waiting for HTTP server to bind...")
-    if wait_for_port(port, timeout=10):
-        print(f"[{datetime.now()}] ✅ HTTP server is ready and listening on port {port}")
-    else:
-        print(f"[{datetime.now()}] ❌ HTTP server failed to start in time!")
-        return
+    # Start background metrics sampler so HTTP handlers never block on measurements
+    cpu_limit_env = os.getenv('CPU_LIMIT')
+    sampler = create_metrics_sampler(cpu_count=float(cpu_limit_env) if cpu_limit_env else None)
+    sampler.start()
+    HealthCheckHandler.sampler = sampler
     
-    # Additional delay before CPU load (configurable)
-    startup_delay = int(os.getenv('STARTUP_DELAY', '10'))
+    # Load is gated on the listening socket (http_ready), not on a fixed sleep;
+    # STARTUP_DELAY (default 0) optionally holds it back further
+    http_ready.wait()
+    startup_delay = float(os.getenv('STARTUP_DELAY', '0'))
     if startup_delay > 0:
-        print(f"[{datetime.now()}] Delaying {startup_delay}s before starting CPU load...")
-        print(f"[{datetime.now()}] (This ensures Cloud Run health check passes first)")
+        print(f"[{datetime.now()}] Delaying {startup_delay:g}s before starting CPU load...")
         time.sleep(startup_delay)
     
     # Get CPU count (prioritize env variable, then container limits)
-    cpu_limit_env = os.getenv('CPU_LIMIT')
     if cpu_limit_env:
         cpu_count = float(cpu_limit_env)
         print(f"[{datetime.now()}] Running in: CLOUD RUN (CPU_LIMIT env)")
@@ -326,6 +474,15 @@ def main():
     # Example: 1.7 cores = 2 processes (1 at 100%, 1 at 70%)
     target_processes = max(1, math.ceil(target_processes_float))
     
+    # Spawn one worker slot per (partial) core of capacity, pinned to CPUs, so
+    # the target can later be raised via POST /target (or by the PID
+    # controller) without respawning. Slots beyond the current target idle.
+    plan = create_placement_plan(cpu_count)
+    plan.print_plan()
+    HealthCheckHandler.placement = plan
+    worker_slots = plan.num_workers
+    target_processes = min(target_processes, worker_slots)
+    
     # Calculate load per process
     # Distribute the target load across processes
     # Example: 1.7 cores / 2 processes = 0.85 load per process
@@ -336,16 +493,42 @@ def main():
     print(f"[{datetime.now()}] Target load: {target_processes_float:.2f} cores")
     print(f"[{datetime.now()}] Spawning {target_processes} process(es)")
     print(f"[{datetime.now()}] Load per process: {load_per_process*100:.1f}%")
+    print(f"[{datetime.now()}] Worker slots: {worker_slots} (retune live with POST /target)")
     
     print(f"[{datetime.now()}] ===== Starting CPU Load Workers =====")
     
+    # Shared control block lets workers be retuned without respawning
+    control = ControlBlock(worker_slots, cpu_count, target_percentage, max_duty=plan.max_duty)
+    HealthCheckHandler.control = control
+    
+    controller = None
+    if control_mode == 'pid':
+        controller = create_pid_controller(control)
+        HealthCheckHandler.controller = controller
+    
     # Create and start worker processes
     processes = []
-    for i in range(target_processes):
-        p = multiprocessing.Process(target=cpu_load_worker, args=(load_per_process,))
+    for i in range(worker_slots):
+        p = multiprocessing.Process(target=cpu_load_worker, args=(load_per_process, None, control, i, None, plan.worker_cpu(i)))
         p.start()
         processes.append(p)
-        print(f"[{datetime.now()}] Started process {i+1}/{target_processes} (PID: {p.pid})")
+        print(f"[{datetime.now()}] Started process {i+1}/{worker_slots} (PID: {p.pid})")
+    
+    # Pin the HTTP/control plane after forking so workers do not inherit it
+    if plan.pin:
+        pin_current_process(plan.control_cpu)
+    
+    if controller:
+        controller.start()
+    
+    if profile:
+        runner = ProfileRunner(control, profile)
+        HealthCheckHandler.profile_runner = runner
+        runner.start()
+    
+    # Workers are running: /readyz starts returning 200
+    HealthCheckHandler.processes = processes
+    cpu_load_ready.set()
     
     print(f"[{datetime.now()}] ===== All processes started successfully =====")
     print(f"[{datetime.now()}] HTTP server listening on port {port}")
@@ -357,6 +540,10 @@ def main():
             p.join()
     except KeyboardInterrupt:
         print(f"\n[{datetime.now()}] Stopping all processes...")
+        if controller:
+            controller.stop()
+        if HealthCheckHandler.profile_runner:
+            HealthCheckHandler.profile_runner.stop()
         for p in processes:
             p.terminate()
             p.join()
@@ -47,7 +47,7 @@ echo "📊 Deploying cpu-load-75 (75% CPU target)..."
 gcloud run deploy cpu-load-75 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars CPU_TARGET=75,STARTUP_DELAY=5 \
+  --set-env-vars CPU_TARGET=75 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -65,7 +65,7 @@ echo "📊 Deploying cpu-load-85 (85% CPU target)..."
 gcloud run deploy cpu-load-85 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars CPU_TARGET=85,STARTUP_DELAY=5 \
+  --set-env-vars CPU_TARGET=85 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -83,7 +83,7 @@ echo "📊 Deploying cpu-load-99 (99% CPU target)..."
 gcloud run deploy cpu-load-99 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars CPU_TARGET=99,STARTUP_DELAY=5 \
+  --set-env-vars CPU_TARGET=99 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -53,7 +53,7 @@ gcloud run deploy $SERVICE_NAME \
   --source . \
   --region $REGION \
   --project $PROJECT_ID \
-  --set-env-vars CPU_TARGET=$CPU_TARGET,STARTUP_DELAY=10,CPU_LIMIT=1 \
+  --set-env-vars CPU_TARGET=$CPU_TARGET,CPU_LIMIT=1 \
   --timeout 300 \
   --max-instances 1 \
   --min-instances 1 \
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+GCE / Cloud Run metadata server lookups, fetched once and cached
+Project ID, region and instance ID are requested concurrently at startup
+and served from memory to every HTTP handler afterwards
+
+Set METADATA_STUB to skip the metadata server (local docker-compose, tests):
+    METADATA_STUB=1                                   built-in stub values
+    METADATA_STUB='{"project_id": "my-project"}'      override some fields
+
+Shared module: edit test/cloudrun/common/gce_metadata.py and run
+common/sync.sh, which copies it into the 1_cpu_load and 2_mem_load build contexts
+"""
+import json
+import os
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+METADATA_URL = 'http://metadata.google.internal/computeMetadata/v1/'
+METADATA_PATHS = {
+    'project_id': 'project/project-id',
+    'instance_id': 'instance/id',
+    'region': 'instance/region',
+}
+STUB_METADATA = {
+    'project_id': 'local-project',
+    'instance_id': 'local-instance',
+    'region': 'local',
+}
+
+_metadata = None
+_loaded = threading.Event()
+_lock = threading.Lock()
+
+def fetch_metadata_value(path, timeout=1.0):
+    """Fetch one metadata value, or None when the server is unreachable"""
+    try:
+        req = urllib.request.Request(METADATA_URL + path, headers={'Metadata-Flavor': 'Google'})
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.read().decode()
+    except Exception:
+        return None
+
+def load_stub_metadata(stub):
+    """Build metadata from METADATA_STUB ("1" or a JSON object of overrides)"""
+    metadata = dict(STUB_METADATA)
+    if stub.strip().startswith('{'):
+        try:
+            metadata.update(json.loads(stub))
+        except json.JSONDecodeError as e:
+            print(f"[{datetime.now()}] Warning: Invalid METADATA_STUB JSON, using defaults: {e}")
+    metadata['source'] = 'stub'
+    return metadata
+
+def load_metadata(timeout=1.0):
+    """Fetch all metadata values concurrently (one timeout total, not one per value)"""
+    stub = os.getenv('METADATA_STUB')
+    if stub:
+        return load_stub_metadata(stub)
+
+    with ThreadPoolExecutor(max_workers=len(METADATA_PATHS)) as executor:
+        futures = {key: executor.submit(fetch_metadata_value, path, timeout)
+                   for key, path in METADATA_PATHS.items()}
+        values = {key: future.result() for key, future in futures.items()}
+
+    # Region comes back as projects/<number>/regions/<region>
+    if values['region'] and '/' in values['region']:
+        values['region'] = values['region'].split('/')[-1]
+
+    found = any(value is not None for value in values.values())
+    metadata = {key: (value if value is not None else 'N/A') for key, value in values.items()}
+    metadata['source'] = 'metadata-server' if found else 'unavailable'
+    return metadata
+
+def refresh_metadata(timeout=1.0):
+    """Load metadata and store it in the process-wide cache"""
+    global _metadata
+    metadata = load_metadata(timeout)
+    with _lock:
+        _metadata = metadata
+    _loaded.set()
+    print(f"[{datetime.now()}] Metadata loaded ({metadata['source']}): project={metadata['project_id']}, "
+          f"region={metadata['region']}, instance={str(metadata['instance_id'])[:16]}")
+    return metadata
+
+def prefetch_metadata(timeout=1.0):
+    """Start loading metadata in a background thread (call once at startup)"""
+    thread = threading.Thread(target=refresh_metadata, args=(timeout,), daemon=True)
+    thread.start()
+    return thread
+
+def get_metadata(wait=0):
+    """
+    Get cached metadata
+
+    Args:
+        wait: Seconds to wait for an in-flight prefetch (0 = never block)
+
+    Returns:
+        Dict with project_id, region, instance_id and source. Values are
+        'N/A' (source 'loading') until the prefetch finishes.
+    """
+    if not _loaded.is_set() and wait:
+        _loaded.wait(wait)
+    with _lock:
+        if _metadata is not None:
+            return dict(_metadata)
+    return {'project_id': 'N/A', 'region': 'N/A', 'instance_id': 'N/A', 'source': 'loading'}
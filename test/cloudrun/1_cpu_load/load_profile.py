@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Scheduled CPU load profiles - ramp, step, sine, square/burst and CSV replay
+A ProfileRunner drives the shared ControlBlock target on a fixed tick so
+workers follow the shaped load curve
+
+Profile spec (JSON via CPU_PROFILE env, or a file via CPU_PROFILE_FILE):
+    {
+        "loop": false,
+        "tick": 0.05,
+        "segments": [
+            {"type": "hold", "target": 50, "duration": 30},
+            {"type": "ramp", "from": 50, "to": 95, "duration": 120},
+            {"type": "step", "targets": [75, 85, 95], "step_duration": 60},
+            {"type": "sine", "min": 50, "max": 95, "period": 60, "duration": 300},
+            {"type": "square", "low": 20, "high": 95, "period": 10, "duty": 0.3, "duration": 120},
+            {"type": "replay", "file": "trace.csv", "time_scale": 1.0}
+        ]
+    }
+A bare list of segments is also accepted. The schedule engine (ticking,
+segment lookup, hold/step) is shared with the memory profiles in schedule.py
+"""
+import csv
+import json
+import math
+import os
+from functools import partial
+
+from schedule import HoldSegment, Schedule, ScheduleRunner, StepSegment, require
+
+def clamp_percentage(value):
+    return min(100.0, max(0.0, float(value)))
+
+class RampSegment:
+    """Linear ramp from one target to another"""
+    def __init__(self, spec):
+        self.start = clamp_percentage(require(spec, 'from'))
+        self.end = clamp_percentage(require(spec, 'to'))
+        self.duration = float(require(spec, 'duration'))
+
+    def value_at(self, t):
+        if self.duration <= 0:
+            return self.end
+        return self.start + (self.end - self.start) * min(1.0, t / self.duration)
+
+class SineSegment:
+    """Sine wave between min and max, starting at the midpoint"""
+    def __init__(self, spec):
+        self.low = clamp_percentage(require(spec, 'min'))
+        self.high = clamp_percentage(require(spec, 'max'))
+        self.period = float(require(spec, 'period'))
+        self.duration = float(require(spec, 'duration'))
+        self.phase = float(spec.get('phase', 0.0))
+        if self.period <= 0:
+            raise ValueError("Profile segment 'sine' requires period > 0")
+
+    def value_at(self, t):
+        mid = (self.high + self.low) / 2
+        amplitude = (self.high - self.low) / 2
+        return mid + amplitude * math.sin(2 * math.pi * t / self.period + self.phase)
+
+class SquareSegment:
+    """Square wave / burst train: high for duty * period, low for the rest"""
+    def __init__(self, spec):
+        self.low = clamp_percentage(require(spec, 'low'))
+        self.high = clamp_percentage(require(spec, 'high'))
+        self.period = float(require(spec, 'period'))
+        self.duty = float(spec.get('duty', 0.5))
+        self.duration = float(require(spec, 'duration'))
+        if self.period <= 0:
+            raise ValueError(f"Profile segment '{spec.get('type')}' requires period > 0")
+
+    def value_at(self, t):
+        return self.high if (t % self.period) < self.period * self.duty else self.low
+
+class ReplaySegment:
+    """
+    Replay recorded utilization from a CSV file
+
+    Rows are "seconds,percent" (header rows are skipped). A single-column
+    file is treated as samples spaced `interval` seconds apart. Values are
+    multiplied by `scale` (use 100 for 0.0-1.0 traces) and linearly interpolated.
+    With `confine`, the file must resolve inside base_dir (specs from HTTP).
+    """
+    def __init__(self, spec, base_dir=None, confine=False):
+        path = require(spec, 'file')
+        if confine:
+            if not base_dir:
+                raise ValueError("Replay segments from HTTP require CPU_PROFILE_REPLAY_DIR")
+            root = os.path.realpath(base_dir)
+            path = os.path.realpath(os.path.join(root, str(path)))
+            if os.path.commonpath([root, path]) != root:
+                raise ValueError("Replay file must be inside CPU_PROFILE_REPLAY_DIR")
+        elif base_dir and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        self.path = path
+        self.time_scale = float(spec.get('time_scale', 1.0))
+        self.scale = float(spec.get('scale', 1.0))
+        interval = float(spec.get('interval', 1.0))
+
+        self.points = []
+        with open(path, 'r', newline='') as f:
+            for row in csv.reader(f):
+                try:
+                    values = [float(v) for v in row if v.strip()]
+                except ValueError:
+                    continue  # Header or comment row
+                if len(values) >= 2:
+                    self.points.append((values[0] * self.time_scale, clamp_percentage(values[1] * self.scale)))
+                elif len(values) == 1:
+                    t = len(self.points) * interval * self.time_scale
+                    self.points.append((t, clamp_percentage(values[0] * self.scale)))
+
+        if not self.points:
+            raise ValueError(f"Replay file {path} contains no samples")
+        self.points.sort()
+        start = self.points[0][0]
+        self.points = [(t - start, v) for t, v in self.points]
+        self.duration = float(spec.get('duration', self.points[-1][0]))
+        self.cursor = 0
+
+    def value_at(self, t):
+        points = self.points
+        if t <= points[0][0]:
+            return points[0][1]
+        if t >= points[-1][0]:
+            return points[-1][1]
+        # Ticks move forward, so resume the search from the previous position
+        if self.cursor >= len(points) - 1 or points[self.cursor][0] > t:
+            self.cursor = 0
+        while points[self.cursor + 1][0] < t:
+            self.cursor += 1
+        t0, v0 = points[self.cursor]
+        t1, v1 = points[self.cursor + 1]
+        if t1 == t0:
+            return v1
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+SEGMENT_TYPES = {
+    'hold': partial(HoldSegment, key='target', normalize=clamp_percentage),
+    'constant': partial(HoldSegment, key='target', normalize=clamp_percentage),
+    'ramp': RampSegment,
+    'step': partial(StepSegment, key='targets', normalize=clamp_percentage),
+    'sine': SineSegment,
+    'square': SquareSegment,
+    'burst': SquareSegment,
+    'replay': ReplaySegment,
+}
+
+class LoadProfile(Schedule):
+    def __init__(self, segments, loop=False, tick=0.05):
+        """
+        Initialize load profile
+
+        Args:
+            segments: List of segment objects (see SEGMENT_TYPES)
+            loop: Restart from the first segment when the schedule ends
+            tick: Seconds between target updates
+        """
+        super().__init__(segments, loop=loop, tick=tick, normalize=clamp_percentage)
+
+    @classmethod
+    def from_spec(cls, spec, base_dir=None, confine=False):
+        """
+        Build a profile from a parsed JSON spec (dict with segments, or a list)
+
+        Args:
+            base_dir: Directory relative replay files resolve against
+            confine: Reject replay files outside base_dir (untrusted specs)
+        """
+        segment_types = dict(SEGMENT_TYPES, replay=partial(ReplaySegment, base_dir=base_dir, confine=confine))
+        segments, loop, tick = cls.parse_spec(spec, segment_types, default_tick=0.05)
+        return cls(segments, loop=loop, tick=tick)
+
+    def target_at(self, elapsed):
+        """(target_percentage, segment_index, finished) at a point in the schedule"""
+        return self.value_at(elapsed)
+
+def load_profile_from_env():
+    """
+    Load a profile from CPU_PROFILE (inline JSON) or CPU_PROFILE_FILE (path)
+
+    Returns:
+        LoadProfile, or None when neither variable is set
+    """
+    inline = os.getenv('CPU_PROFILE')
+    path = os.getenv('CPU_PROFILE_FILE')
+    try:
+        if inline:
+            return LoadProfile.from_spec(json.loads(inline))
+        if path:
+            with open(path, 'r') as f:
+                return LoadProfile.from_spec(json.load(f), base_dir=os.path.dirname(os.path.abspath(path)))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid load profile JSON: {e}")
+    return None
+
+class ProfileRunner(ScheduleRunner):
+    name = 'Load profile'
+
+    def __init__(self, control, profile):
+        """
+        Initialize profile runner
+
+        Args:
+            control: Shared ControlBlock whose target is driven
+            profile: LoadProfile to execute
+        """
+        super().__init__(profile)
+        self.control = control
+        self.profile = profile
+
+    def apply(self, target, segment_changed):
+        # Announce segment changes (workers log them); in-segment updates are silent
+        self.control.set_target(target, announce=segment_changed)
+
+    def describe(self, target):
+        return f"{target:.1f}%"
+
+    def get_status(self):
+        status = super().get_status()
+        status['target_percentage'] = self.value
+        return status
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Prometheus text exposition (format 0.0.4) for the load generator HTTP servers
+Only cached values are rendered (metrics sampler ring buffer, control block
+snapshot), so scraping /metrics every second never touches cgroup files
+
+Shared module: edit test/cloudrun/common/metrics_exporter.py and run
+common/sync.sh, which copies it into the 1_cpu_load and 2_mem_load build contexts
+"""
+import math
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def format_value(value):
+    """Format a sample value (Prometheus spells infinities/NaN out)"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+def format_labels(labels):
+    """Format a label dict as {key="value",...} with escaping"""
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+class MetricsWriter:
+    """Collects metric families and renders them in exposition order"""
+
+    def __init__(self, prefix='loadgen_'):
+        self.prefix = prefix
+        self.families = {}
+
+    def add(self, name, metric_type, help_text, value, labels=None):
+        """
+        Add one sample (None values are skipped)
+
+        Args:
+            name: Metric name without prefix
+            metric_type: 'gauge' or 'counter'
+            help_text: HELP line, written once per family
+            value: Sample value
+            labels: Optional label dict
+        """
+        if value is None:
+            return
+        family = self.families.setdefault(self.prefix + name, (metric_type, help_text, []))
+        family[2].append((labels, value))
+
+    def render(self):
+        lines = []
+        for name, (metric_type, help_text, samples) in self.families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+def add_sampler_metrics(writer, sample):
+    """Add container CPU/throttling/memory metrics from a MetricsSampler sample"""
+    if sample is None:
+        return
+    usage_usec = sample.get('usage_usec')
+    throttled_usec = sample.get('throttled_usec')
+    writer.add('sample_timestamp_seconds', 'gauge', 'Unix time of the cached metrics sample', sample['timestamp'])
+    writer.add('container_cpu_limit_cores', 'gauge', 'CPU cores counted as 100%', sample.get('cpu_count'))
+    writer.add('container_cpu_usage_seconds_total', 'counter', 'cgroup cpu.stat usage_usec in seconds',
+               usage_usec / 1000000 if usage_usec is not None else None)
+    writer.add('container_cpu_usage_percent', 'gauge', 'Container CPU usage over the last sample interval',
+               sample.get('cpu_percent'))
+    writer.add('container_cpu_periods_total', 'counter', 'cgroup cpu.stat nr_periods', sample.get('nr_periods'))
+    writer.add('container_cpu_throttled_periods_total', 'counter', 'cgroup cpu.stat nr_throttled',
+               sample.get('nr_throttled'))
+    writer.add('container_cpu_throttled_seconds_total', 'counter', 'cgroup cpu.stat throttled_usec in seconds',
+               throttled_usec / 1000000 if throttled_usec is not None else None)
+    writer.add('container_memory_usage_bytes', 'gauge', 'cgroup memory.current (host used memory outside a container)',
+               sample.get('memory_used'))
+    writer.add('container_memory_limit_bytes', 'gauge', 'cgroup memory.max (host total memory outside a container)',
+               sample.get('memory_limit'))
+    writer.add('container_memory_is_cgroup', 'gauge', '1 when memory values come from a cgroup limit',
+               sample.get('memory_is_container'))
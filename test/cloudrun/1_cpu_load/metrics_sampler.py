@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Background metrics sampler for the load generator HTTP servers
+Samples container CPU, CPU throttling and memory on a timer into a ring
+buffer so HTTP handlers read precomputed values instead of blocking
+
+Shared module: edit test/cloudrun/common/metrics_sampler.py and run
+common/sync.sh, which copies it into the 1_cpu_load and 2_mem_load build contexts
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import psutil
+
+def read_cpu_stat():
+    """Read cgroup cpu.stat counters (usage_usec, nr_periods, nr_throttled, throttled_usec)"""
+    stats = {}
+    try:
+        # cgroup v2
+        if os.path.exists('/sys/fs/cgroup/cpu.stat'):
+            with open('/sys/fs/cgroup/cpu.stat', 'r') as f:
+                for line in f:
+                    key, value = line.split()
+                    stats[key] = int(value)
+            return stats
+
+        # cgroup v1: usage from cpuacct, throttling from cpu.stat (throttled_time in ns)
+        if os.path.exists('/sys/fs/cgroup/cpuacct/cpuacct.usage'):
+            with open('/sys/fs/cgroup/cpuacct/cpuacct.usage', 'r') as f:
+                stats['usage_usec'] = int(f.read().strip()) // 1000
+        if os.path.exists('/sys/fs/cgroup/cpu/cpu.stat'):
+            with open('/sys/fs/cgroup/cpu/cpu.stat', 'r') as f:
+                for line in f:
+                    key, value = line.split()
+                    if key == 'throttled_time':
+                        stats['throttled_usec'] = int(value) // 1000
+                    else:
+                        stats[key] = int(value)
+    except Exception:
+        pass
+    return stats
+
+def read_cpu_quota():
+    """Get container CPU quota in cores from cgroup, or None when unlimited"""
+    try:
+        if os.path.exists('/sys/fs/cgroup/cpu.max'):
+            with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+                content = f.read().strip().split()
+                if content[0] != 'max':
+                    return int(content[0]) / int(content[1])
+        quota_file = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+        period_file = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+        if os.path.exists(quota_file) and os.path.exists(period_file):
+            with open(quota_file, 'r') as f:
+                quota = int(f.read().strip())
+            with open(period_file, 'r') as f:
+                period = int(f.read().strip())
+            if quota > 0:
+                return quota / period
+    except Exception:
+        pass
+    return None
+
+def read_memory():
+    """Get (used, limit) bytes from cgroup, or (None, None) outside a limited container"""
+    try:
+        if os.path.exists('/sys/fs/cgroup/memory.max'):
+            with open('/sys/fs/cgroup/memory.max', 'r') as f:
+                limit = f.read().strip()
+            with open('/sys/fs/cgroup/memory.current', 'r') as f:
+                used = int(f.read().strip())
+            return used, (None if limit == 'max' else int(limit))
+        if os.path.exists('/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+            with open('/sys/fs/cgroup/memory/memory.limit_in_bytes', 'r') as f:
+                limit = int(f.read().strip())
+            with open('/sys/fs/cgroup/memory/memory.usage_in_bytes', 'r') as f:
+                used = int(f.read().strip())
+            return used, (limit if limit < (1 << 60) else None)
+    except Exception:
+        pass
+    return None, None
+
+class MetricsSampler:
+    def __init__(self, interval=1.0, history=300, cpu_count=None, process_refresh=10.0):
+        """
+        Initialize metrics sampler
+
+        Args:
+            interval: Seconds between samples
+            history: Number of samples kept in the ring buffer
+            cpu_count: Cores used as 100% CPU (default: cgroup quota, else host CPUs)
+            process_refresh: Seconds between process table scans (the Python
+                process count is reused in between)
+        """
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self.cpu_count = cpu_count or read_cpu_quota() or psutil.cpu_count()
+        self.running = False
+        self.previous = None
+        self.lock = threading.Lock()
+        self.process_refresh = process_refresh
+        self.python_processes = None
+        self.processes_scanned = None
+
+    def take_sample(self):
+        """Collect one sample; rates are computed against the previous sample"""
+        now = time.time()
+        cpu_stat = read_cpu_stat()
+        sample = {
+            'timestamp': now,
+            'cpu_count': self.cpu_count,
+            'usage_usec': cpu_stat.get('usage_usec'),
+            'nr_periods': cpu_stat.get('nr_periods'),
+            'nr_throttled': cpu_stat.get('nr_throttled'),
+            'throttled_usec': cpu_stat.get('throttled_usec'),
+            'cpu_percent': None,
+            'cpu_cores_used': None,
+            'throttled_percent': None,
+        }
+
+        previous = self.previous
+        if previous and sample['usage_usec'] is not None and previous['usage_usec'] is not None:
+            elapsed = now - previous['timestamp']
+            if elapsed > 0:
+                cores = (sample['usage_usec'] - previous['usage_usec']) / 1000000 / elapsed
+                sample['cpu_cores_used'] = cores
+                sample['cpu_percent'] = min(100.0, max(0.0, cores / self.cpu_count * 100))
+        elif sample['usage_usec'] is None:
+            # No cgroup accounting: non-blocking psutil (delta since the last call)
+            sample['cpu_percent'] = psutil.cpu_percent(interval=None)
+
+        if previous and sample['nr_periods'] is not None and previous['nr_periods'] is not None:
+            periods = sample['nr_periods'] - previous['nr_periods']
+            if periods > 0:
+                sample['throttled_percent'] = (sample['nr_throttled'] - previous['nr_throttled']) / periods * 100
+
+        used, limit = read_memory()
+        if limit:
+            sample.update({'memory_used': used, 'memory_limit': limit,
+                           'memory_percent': used / limit * 100, 'memory_is_container': True})
+        else:
+            mem = psutil.virtual_memory()
+            sample.update({'memory_used': mem.used, 'memory_limit': mem.total,
+                           'memory_percent': mem.percent, 'memory_is_container': False})
+
+        sample['python_processes'] = self.count_python_processes()
+
+        self.previous = sample
+        with self.lock:
+            self.samples.append(sample)
+        return sample
+
+    def count_python_processes(self):
+        """Python process count; walking every process in /proc is the costliest
+        part of a sample, so the table is rescanned only every process_refresh seconds"""
+        now = time.monotonic()
+        if self.processes_scanned is None or now - self.processes_scanned >= self.process_refresh:
+            self.processes_scanned = now
+            try:
+                self.python_processes = len([p for p in psutil.process_iter(['name'])
+                                             if 'python' in (p.info['name'] or '').lower()])
+            except Exception:
+                self.python_processes = None
+        return self.python_processes
+
+    def latest(self):
+        """Latest sample, or None before the first one"""
+        with self.lock:
+            return self.samples[-1] if self.samples else None
+
+    def history(self, seconds=None):
+        """Samples from the last `seconds` (all buffered samples when None)"""
+        with self.lock:
+            samples = list(self.samples)
+        if seconds is None:
+            return samples
+        cutoff = time.time() - seconds
+        return [s for s in samples if s['timestamp'] >= cutoff]
+
+    def average(self, key, seconds):
+        """Average of a sample field over the last `seconds`, or None"""
+        values = [s[key] for s in self.history(seconds) if s.get(key) is not None]
+        return sum(values) / len(values) if values else None
+
+    def run(self):
+        self.running = True
+        next_sample = time.monotonic()
+        while self.running:
+            next_sample += self.interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+            try:
+                self.take_sample()
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: metrics sample failed: {e}")
+
+    def start(self):
+        """Take a first sample synchronously, then sample in a daemon thread"""
+        self.take_sample()
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+def create_metrics_sampler(cpu_count=None):
+    """
+    Create a sampler configured from env
+
+    Env variables: METRICS_SAMPLE_INTERVAL (seconds, default 1.0),
+    METRICS_HISTORY (samples kept, default 300), METRICS_PROCESS_REFRESH
+    (seconds between process table scans, default 10)
+    """
+    return MetricsSampler(
+        interval=float(os.getenv('METRICS_SAMPLE_INTERVAL', '1.0')),
+        history=int(os.getenv('METRICS_HISTORY', '300')),
+        cpu_count=cpu_count,
+        process_refresh=float(os.getenv('METRICS_PROCESS_REFRESH', '10')),
+    )
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Worker placement planner - fractional-core aware CPU affinity pinning
+Decides how many CPU workers to run, which CPU each one is pinned to, and
+which CPU the control/HTTP plane keeps for itself
+"""
+import math
+import multiprocessing
+import os
+from datetime import datetime
+
+def get_allowed_cpus():
+    """Get the CPUs this process may run on (sched_getaffinity, or all CPUs)"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return list(range(multiprocessing.cpu_count()))
+
+class PlacementPlan:
+    def __init__(self, cpu_count, allowed_cpus, reserved_cores=0.05, pin=True):
+        """
+        Build a placement plan
+
+        Args:
+            cpu_count: CPU cores available to the container (quota, can be fractional)
+            allowed_cpus: CPU ids from sched_getaffinity
+            reserved_cores: Slice kept free for the control/HTTP plane
+            pin: Whether workers and the control plane are pinned with sched_setaffinity
+
+        Example: quota 1.7, reserve 0.05, 4 CPUs allowed
+            -> capacity 1.65 cores, 2 workers (max 100% + 65%),
+               workers on CPU 0 and 1, control plane on CPU 3
+        """
+        self.cpu_count = cpu_count
+        self.allowed_cpus = list(allowed_cpus) or [0]
+        self.reserved_cores = min(max(0.0, reserved_cores), cpu_count)
+        self.pin = pin
+
+        # Worker capacity is the quota minus the control-plane slice
+        self.capacity = max(0.0, cpu_count - self.reserved_cores)
+        self.num_workers = max(1, math.ceil(self.capacity - 1e-9))
+
+        # Full cores first, the fractional remainder goes to the last worker
+        self.max_duty = []
+        remaining = self.capacity
+        for _ in range(self.num_workers):
+            self.max_duty.append(min(1.0, max(0.0, remaining)))
+            remaining -= 1.0
+
+        if len(self.allowed_cpus) > self.num_workers:
+            # Spare CPU: dedicate the last allowed CPU to the control plane
+            self.worker_cpus = self.allowed_cpus[:self.num_workers]
+            self.control_cpu = self.allowed_cpus[-1]
+            self.control_shared = False
+        else:
+            # No spare CPU: share with the least-loaded (fractional) worker
+            self.worker_cpus = [self.allowed_cpus[i % len(self.allowed_cpus)] for i in range(self.num_workers)]
+            self.control_cpu = self.worker_cpus[-1]
+            self.control_shared = True
+
+    def worker_cpu(self, worker_index):
+        """CPU to pin a worker to, or None when pinning is disabled"""
+        return self.worker_cpus[worker_index] if self.pin else None
+
+    def to_dict(self):
+        return {
+            'cpu_count': self.cpu_count,
+            'allowed_cpus': self.allowed_cpus,
+            'reserved_cores': self.reserved_cores,
+            'capacity': self.capacity,
+            'num_workers': self.num_workers,
+            'pinning': self.pin,
+            'workers': [
+                {'worker': i, 'cpu': self.worker_cpus[i], 'max_duty': self.max_duty[i]}
+                for i in range(self.num_workers)
+            ],
+            'control_cpu': self.control_cpu,
+            'control_shared': self.control_shared,
+        }
+
+    def print_plan(self):
+        print(f"[{datetime.now()}] ===== Placement Plan =====")
+        print(f"[{datetime.now()}] Quota: {self.cpu_count:.2f} cores | Allowed CPUs: {self.allowed_cpus}")
+        print(f"[{datetime.now()}] Reserved for control plane: {self.reserved_cores:.2f} cores | "
+              f"Worker capacity: {self.capacity:.2f} cores")
+        for i in range(self.num_workers):
+            print(f"[{datetime.now()}] Worker {i+1}: CPU {self.worker_cpus[i]} "
+                  f"(max {self.max_duty[i]*100:.0f}%)")
+        print(f"[{datetime.now()}] Control/HTTP plane: CPU {self.control_cpu}"
+              f"{' (shared with worker)' if self.control_shared else ' (dedicated)'}")
+        if not self.pin:
+            print(f"[{datetime.now()}] Pinning disabled (CPU_AFFINITY=0), plan is advisory only")
+        print(f"[{datetime.now()}] =====================================")
+
+def create_placement_plan(cpu_count, default_reserved_cores=0.05):
+    """
+    Create a placement plan configured from env
+
+    Env variables: CPU_RESERVED_CORES (default default_reserved_cores),
+    CPU_AFFINITY (default 1)
+    """
+    return PlacementPlan(
+        cpu_count,
+        get_allowed_cpus(),
+        reserved_cores=float(os.getenv('CPU_RESERVED_CORES', str(default_reserved_cores))),
+        pin=os.getenv('CPU_AFFINITY', '1') not in ['0', 'false', 'no'],
+    )
+
+def pin_current_process(cpu):
+    """
+    Pin the calling process to one CPU (no-op when unsupported)
+
+    sched_setaffinity(0) only affects the calling thread on Linux, so every
+    thread listed in /proc/self/task (e.g. an already running HTTP thread)
+    is pinned as well.
+    """
+    if cpu is None:
+        return False
+    try:
+        tids = [int(tid) for tid in os.listdir('/proc/self/task')] if os.path.isdir('/proc/self/task') else [0]
+        for tid in tids:
+            os.sched_setaffinity(tid, {cpu})
+        return True
+    except (AttributeError, OSError) as e:
+        print(f"[{datetime.now()}] Warning: Could not pin PID {os.getpid()} to CPU {cpu}: {e}")
+        return False
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Pluggable CPU work kernels for cpu_load_worker
+Each kernel exercises a different part of the machine (interpreter loop,
+vector FPU, hashing, compression, memory latency) and self-calibrates to a
+known ops-per-ms so the duty-cycle math stays accurate
+
+Selection (env):
+    CPU_KERNEL=integer                       same kernel for every worker
+    CPU_KERNEL_MIX=integer:2,hash:1,memory:1 weighted mix, assigned per worker
+    CPU_KERNEL_MEMORY_MB=64                  table size for the memory kernel
+"""
+import hashlib
+import os
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+# numpy is imported on first use by the kernels that need it, so importing
+# this module (and binding the HTTP server) does not pay the ~100 ms import
+np = None
+_numpy_loaded = False
+
+def load_numpy():
+    """Import numpy once; returns None when it is not installed"""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+class IntegerKernel:
+    """Tight integer loop (interpreter dispatch bound)"""
+    name = 'integer'
+
+    def setup(self):
+        pass
+
+    def run(self, ops):
+        for i in range(ops):
+            _ = i ** 2
+
+class FloatKernel:
+    """Float math: NumPy-vectorized when available, pure Python otherwise"""
+    name = 'float'
+    size = 4096
+
+    def setup(self):
+        if load_numpy() is not None:
+            self.a = np.random.default_rng(1).random(self.size)
+            self.b = np.random.default_rng(2).random(self.size)
+            self.out = np.empty(self.size)
+        else:
+            print(f"[{datetime.now()}] Warning: numpy not installed, float kernel uses pure Python math")
+            self.values = [i / self.size for i in range(64)]
+
+    def run(self, ops):
+        if np is not None:
+            # One op = one fused multiply-add + sqrt over the vector
+            for _ in range(ops):
+                np.multiply(self.a, self.b, out=self.out)
+                np.add(self.out, 1.0, out=self.out)
+                np.sqrt(self.out, out=self.out)
+        else:
+            for _ in range(ops):
+                total = 0.0
+                for x in self.values:
+                    total += (x * 1.0001 + 0.5) ** 0.5
+
+class HashKernel:
+    """sha256 over a 4 KB buffer per op"""
+    name = 'hash'
+
+    def setup(self):
+        self.buffer = os.urandom(4096)
+
+    def run(self, ops):
+        for _ in range(ops):
+            hashlib.sha256(self.buffer).digest()
+
+class CompressKernel:
+    """zlib compression of a 4 KB semi-compressible buffer per op"""
+    name = 'compress'
+
+    def setup(self):
+        # Half random, half repetitive so the compressor does real match work
+        self.buffer = os.urandom(2048) + bytes(range(256)) * 8
+
+    def run(self, ops):
+        for _ in range(ops):
+            zlib.compress(self.buffer, 6)
+
+class MemoryKernel:
+    """
+    Random-access pointer chasing over a large table (memory latency bound)
+
+    The table is a full-period LCG permutation (single cycle visiting every
+    slot), so each step depends on the previous load and defeats prefetching.
+    """
+    name = 'memory'
+
+    def setup(self):
+        size_mb = int(os.getenv('CPU_KERNEL_MEMORY_MB', '64'))
+        # Power-of-two slot count for the LCG (4-byte slots)
+        slots = 1 << max(10, (size_mb * 1024 * 1024 // 4).bit_length() - 1)
+        mask = slots - 1
+        multiplier = 1103515245  # (multiplier - 1) % 4 == 0 and odd increment -> full period
+        increment = 12345
+        if load_numpy() is not None:
+            indexes = np.arange(slots, dtype=np.uint64)
+            self.table = array('I', ((indexes * multiplier + increment) & mask).astype(np.uint32).tobytes())
+        else:
+            self.table = array('I', ((j * multiplier + increment) & mask for j in range(slots)))
+        self.position = 0
+
+    def run(self, ops):
+        table = self.table
+        j = self.position
+        for _ in range(ops):
+            j = table[j]
+        self.position = j
+
+KERNELS = {
+    'integer': IntegerKernel,
+    'float': FloatKernel,
+    'hash': HashKernel,
+    'compress': CompressKernel,
+    'memory': MemoryKernel,
+}
+
+def get_kernel(name):
+    """Create and set up a kernel by name"""
+    if name not in KERNELS:
+        raise ValueError(f"Unknown CPU kernel '{name}'. Must be one of: {', '.join(KERNELS)}")
+    kernel = KERNELS[name]()
+    kernel.setup()
+    return kernel
+
+def calibrate_kernel(kernel, quantum_ns=50_000):
+    """
+    Calibrate how many kernel ops take roughly quantum_ns
+
+    The busy phase runs whole quanta and checks the clock in between, so a
+    small quantum (default 50µs) keeps the busy-time error well under 1ms.
+
+    Returns:
+        (ops_per_quantum, ops_per_ms)
+    """
+    kernel.run(1)  # Warm up caches / lazy allocations
+    ops = 1
+    while True:
+        start = time.perf_counter_ns()
+        kernel.run(ops)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= quantum_ns * 4 or ops >= 10_000_000:
+            break
+        ops *= 2
+    ops_per_ms = ops * 1_000_000 / max(1, elapsed)
+    return max(1, int(ops_per_ms * quantum_ns / 1_000_000)), ops_per_ms
+
+def parse_kernel_mix(mix):
+    """
+    Parse "integer:2,hash:1" into an expanded assignment list
+
+    Example: "integer:2,hash:1" -> ['integer', 'integer', 'hash']
+    """
+    assignment = []
+    for part in mix.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition(':')
+        name = name.strip().lower()
+        if name not in KERNELS:
+            raise ValueError(f"Unknown CPU kernel '{name}' in CPU_KERNEL_MIX. Must be one of: {', '.join(KERNELS)}")
+        assignment.extend([name] * int(weight or 1))
+    if not assignment:
+        raise ValueError("CPU_KERNEL_MIX is empty")
+    return assignment
+
+def kernel_for_worker(worker_index):
+    """Pick the kernel for a worker from CPU_KERNEL_MIX or CPU_KERNEL (default integer)"""
+    mix = os.getenv('CPU_KERNEL_MIX')
+    if mix:
+        assignment = parse_kernel_mix(mix)
+        return assignment[worker_index % len(assignment)]
+
+    name = os.getenv('CPU_KERNEL', 'integer').lower()
+    if name not in KERNELS:
+        raise ValueError(f"Unknown CPU_KERNEL '{name}'. Must be one of: {', '.join(KERNELS)}")
+    return name
@@ -47,7 +47,7 @@ echo "📊 Deploying mem-load-75 (75% Memory target)..."
 gcloud run deploy mem-load-75 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars MEMORY_TARGET=75,STARTUP_DELAY=5 \
+  --set-env-vars MEMORY_TARGET=75 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -65,7 +65,7 @@ echo "📊 Deploying mem-load-85 (85% Memory target)..."
 gcloud run deploy mem-load-85 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars MEMORY_TARGET=85,STARTUP_DELAY=5 \
+  --set-env-vars MEMORY_TARGET=85 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -83,7 +83,7 @@ echo "📊 Deploying mem-load-95 (95% Memory target)..."
 gcloud run deploy mem-load-95 \
   --image $DOCKER_HUB_USER/$IMAGE_NAME:$VERSION \
   --region $REGION \
-  --set-env-vars MEMORY_TARGET=95,STARTUP_DELAY=5 \
+  --set-env-vars MEMORY_TARGET=95 \
   --timeout 300 \
   --max-instances 1 \
   --cpu 1 \
@@ -53,7 +53,7 @@ gcloud run deploy $SERVICE_NAME \
   --source . \
   --region $REGION \
   --project $PROJECT_ID \
-  --set-env-vars MEMORY_TARGET=$MEMORY_TARGET,STARTUP_DELAY=10,MEMORY_LIMIT=512 \
+  --set-env-vars MEMORY_TARGET=$MEMORY_TARGET,MEMORY_LIMIT=512 \
   --timeout 300 \
   --max-instances 1 \
   --min-instances 1 \
@@ -7,22 +7,154 @@ import psutil
 import time
 import os
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
-import socket
+import json
+from urllib.parse import urlparse
 
 # Import the existing memory load logic
 from memory_load import MemoryLoadGenerator
+from working_set import PATTERNS as CHURN_PATTERNS
+from metrics_sampler import create_metrics_sampler
+from memory_pressure import create_pressure_sampler, EVENT_KEYS
+from memory_workers import create_memory_worker_pool
+from memory_profile import load_memory_profile_from_env
+from gce_metadata import prefetch_metadata, get_metadata
+from metrics_exporter import CONTENT_TYPE, MetricsWriter, add_sampler_metrics
+
+# Set once the HTTP socket is bound and listening
+http_ready = threading.Event()
+
+def add_memory_metrics(writer, generator, pressure=None):
+    """Add pressure, allocation, worker, churn, profile and controller metrics (shared with the combined generator)"""
+    sample = pressure.latest() if pressure else None
+    if sample:
+        scope = {'scope': sample['psi_scope']}
+        for kind in ['some', 'full']:
+            psi = sample['psi'].get(kind, {})
+            for window in ['avg10', 'avg60', 'avg300']:
+                writer.add('memory_pressure_percent', 'gauge', 'Memory PSI share of time stalled',
+                           psi.get(window), {**scope, 'kind': kind, 'window': window})
+            total = psi.get('total')
+            writer.add('memory_pressure_stalled_seconds_total', 'counter', 'Memory PSI total stall time',
+                       total / 1000000 if total is not None else None, {**scope, 'kind': kind})
+        for key in ['anon', 'file', 'slab']:
+            writer.add('memory_stat_bytes', 'gauge', 'memory.stat anon/file/slab bytes',
+                       sample['stat'][key], {'type': key})
+        writer.add('memory_major_faults_total', 'counter', 'memory.stat pgmajfault', sample['stat']['pgmajfault'])
+        for key in EVENT_KEYS:
+            writer.add('memory_events_total', 'counter', 'memory.events high/max/oom/oom_kill counters',
+                       sample['events'][key], {'event': key})
+    
+    writer.add('memory_target_percent', 'gauge', 'Target memory usage percentage',
+               generator.target_percentage if generator else int(os.getenv('MEMORY_TARGET', '75')))
+    if generator:
+        labels = {'backend': generator.backend.name}
+        writer.add('memory_allocated_bytes', 'gauge', 'Bytes held in MemoryLoadGenerator.data_blocks',
+                   generator.get_allocated_bytes(), labels)
+        writer.add('memory_allocated_blocks', 'gauge', 'Blocks held in MemoryLoadGenerator.data_blocks',
+                   generator.get_block_count(), labels)
+        if generator.pool:
+            for i, worker in enumerate(generator.pool.get_state()):
+                worker_labels = {'worker': i, 'pid': worker['pid']}
+                writer.add('memory_worker_target_bytes', 'gauge', 'Bytes each memory worker is asked to hold',
+                           worker['target_bytes'], worker_labels)
+                writer.add('memory_worker_allocated_bytes', 'gauge', 'Bytes each memory worker holds',
+                           worker['allocated_bytes'], worker_labels)
+                writer.add('memory_worker_alive', 'gauge', '1 while the memory worker process is alive',
+                           worker['alive'], worker_labels)
+        if generator.churner:
+            stats = generator.churner.get_stats()
+            labels = {'pattern': stats['pattern']}
+            writer.add('memory_churn_pages_total', 'counter', 'Pages touched by the working-set churn engine',
+                       stats['pages_touched'], labels)
+            writer.add('memory_churn_pages_per_second', 'gauge', 'Achieved page touches per second',
+                       stats['pages_per_second'], labels)
+            writer.add('memory_churn_requested_pages_per_second', 'gauge', 'Requested page touches per second',
+                       stats['requested_pages_per_second'], labels)
+            writer.add('memory_churn_bandwidth_bytes_per_second', 'gauge',
+                       'Bytes read and written per second by the churn engine',
+                       stats['bandwidth_bytes_per_second'], labels)
+        if generator.profile_runner:
+            status = generator.profile_runner.get_status()
+            writer.add('memory_profile_target_bytes', 'gauge', 'Bytes the memory growth profile asks to hold',
+                       status['target_mb'] * 1024 * 1024 if status['target_mb'] is not None else None)
+            writer.add('memory_profile_segment', 'gauge', 'Current memory profile segment (1-based)',
+                       status['segment'])
+            writer.add('memory_profile_elapsed_seconds', 'gauge', 'Seconds since the memory profile started',
+                       status['elapsed'])
+            writer.add('memory_profile_finished', 'gauge', '1 once a non-looping memory profile has ended',
+                       status['finished'])
+        if generator.controller:
+            stats = generator.controller.get_stats()
+            writer.add('memory_controller_error_percent', 'gauge',
+                       'Memory controller error (target - actual) in percentage points', stats['error'])
+            writer.add('memory_controller_in_band', 'gauge', '1 when memory usage is within the hysteresis band',
+                       stats['in_band'])
+            writer.add('memory_controller_grown_bytes_total', 'counter', 'Bytes allocated by the memory controller',
+                       stats['grown_bytes'])
+            writer.add('memory_controller_released_bytes_total', 'counter',
+                       'Bytes released to the OS by the memory controller', stats['released_bytes'])
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     """Simple HTTP handler for Cloud Run health checks"""
     
-    # Store generator instance as class variable
+    # Store generator, metrics sampler and pressure sampler instances as class variables
     generator = None
+    sampler = None
+    pressure = None
+    
+    def send_text(self, status, text, content_type='text/plain; charset=utf-8'):
+        """Send a small response body"""
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def render_metrics(self):
+        """Render /metrics from the cached sample and generator counters"""
+        writer = MetricsWriter()
+        sampler = HealthCheckHandler.sampler
+        add_sampler_metrics(writer, sampler.latest() if sampler else None)
+        add_memory_metrics(writer, HealthCheckHandler.generator, HealthCheckHandler.pressure)
+        return writer.render()
     
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/health' or self.path == '/':
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self.send_text(200, self.render_metrics(), CONTENT_TYPE)
+        elif path == '/pressure':
+            sample = HealthCheckHandler.pressure.latest() if HealthCheckHandler.pressure else None
+            if sample is None:
+                self.send_text(503, json.dumps({'error': 'Pressure sampler not started yet'}), 'application/json')
+            else:
+                self.send_text(200, json.dumps(sample), 'application/json')
+        elif path == '/profile':
+            runner = HealthCheckHandler.generator.profile_runner if HealthCheckHandler.generator else None
+            if runner is None:
+                self.send_text(404, json.dumps({'error': 'No memory profile configured'}), 'application/json')
+            else:
+                self.send_text(200, json.dumps(runner.get_status()), 'application/json')
+        elif path == '/livez':
+            # Constant-time liveness: the server thread is answering
+            self.send_text(200, 'ok')
+        elif path == '/readyz':
+            # Ready once the generator has been created and is allocating/holding memory,
+            # and every pool worker is still alive
+            generator = HealthCheckHandler.generator
+            dead = generator.pool.dead_workers() if generator and generator.pool else []
+            if generator is None:
+                payload, status = {'ready': False, 'reason': 'Memory generator not started yet'}, 503
+            elif dead:
+                payload, status = {'ready': False, 'reason': 'Memory worker(s) exited', 'dead_workers': dead}, 503
+            else:
+                payload, status = {'ready': True, 'blocks': generator.get_block_count()}, 200
+            self.send_text(status, json.dumps(payload), 'application/json')
+        elif path in ['/status', '/health', '/']:
+            # Full dashboard (/health and / kept as aliases for existing scripts)
             self.send_response(200)
             self.send_header('Content-type', 'text/html; charset=utf-8')
             self.end_headers()
@@ -42,7 +174,7 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
                 # Get allocated memory from generator
                 allocated_memory = "N/A"
                 try:
-                    allocated_mb = len(HealthCheckHandler.generator.data_blocks) * HealthCheckHandler.generator.block_size if hasattr(HealthCheckHandler.generator, 'data_blocks') else 0
+                    allocated_mb = HealthCheckHandler.generator.get_allocated_bytes()
                     allocated_memory = f"{allocated_mb / (1024**3):.2f} GB"
                 except:
                     pass
@@ -56,12 +188,100 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
                 is_container = False
                 allocated_memory = "N/A"
             
-            # Get CPU info
+            # Get CPU info from the background sampler (never blocks)
             cpu_percent = "N/A"
-            try:
-                cpu_percent = f"{psutil.cpu_percent(interval=1):.1f}%"
-            except:
-                pass
+            python_processes = "N/A"
+            sample = HealthCheckHandler.sampler.latest() if HealthCheckHandler.sampler else None
+            if sample:
+                if sample['cpu_percent'] is not None:
+                    cpu_percent = f"{sample['cpu_percent']:.1f}%"
+                if sample['python_processes'] is not None:
+                    python_processes = sample['python_processes']
+            
+            # Get closed-loop controller status
+            control_mode = os.getenv('MEMORY_CONTROL_MODE', 'open').lower()
+            controller_html = ""
+            controller = HealthCheckHandler.generator.controller if HealthCheckHandler.generator else None
+            if controller:
+                stats = controller.get_stats()
+                error = f"{stats['error']:+.2f} pts" if stats['error'] is not None else "N/A"
+                controller_html = f"""
+    <div class="section">
+        <h2>🎛️ Memory Controller</h2>
+        <p><span class="label">Error:</span> <span class="highlight">{error}</span></p>
+        <p><span class="label">Hysteresis:</span> <span class="value">±{stats['hysteresis']} pts ({"in band" if stats['in_band'] else "correcting"})</span></p>
+        <p><span class="label">Grown / Released:</span> <span class="value">{stats['grown_bytes'] / (1024**3):.2f} GB / {stats['released_bytes'] / (1024**3):.2f} GB</span></p>
+        <p><span class="label">Adjustments:</span> <span class="value">{stats['adjustments']}</span></p>
+    </div>
+    """
+            
+            # Get memory growth profile progress
+            runner = HealthCheckHandler.generator.profile_runner if HealthCheckHandler.generator else None
+            if runner:
+                control_mode = 'profile'
+                status = runner.get_status()
+                target = f"{status['target_mb']:.0f} MB" if status['target_mb'] is not None else "N/A"
+                state = "finished" if status['finished'] else ("looping" if status['loop'] else "running")
+                last_jump = status['last_jump']
+                jump = (f"{last_jump['from_mb']:.0f} → {last_jump['to_mb']:.0f} MB at "
+                        f"{datetime.fromtimestamp(last_jump['time']).strftime('%H:%M:%S')}") if last_jump else "None"
+                controller_html += f"""
+    <div class="section">
+        <h2>📈 Memory Growth Profile</h2>
+        <p><span class="label">Segment:</span> <span class="value">{status['segment'] or '-'} / {status['segments']} ({state})</span></p>
+        <p><span class="label">Elapsed:</span> <span class="value">{status['elapsed']:.0f}s / {status['duration']:.0f}s</span></p>
+        <p><span class="label">Target / Held:</span> <span class="highlight">{target} / {status['held_mb']:.0f} MB</span></p>
+        <p><span class="label">Last Jump:</span> <span class="value">{jump}</span></p>
+    </div>
+    """
+            
+            # Get per-worker holdings in multi-process mode
+            workers_summary = "1 (single process)"
+            pool = HealthCheckHandler.generator.pool if HealthCheckHandler.generator else None
+            if pool:
+                workers_summary = f"{pool.num_workers}: " + ", ".join(
+                    f"W{i+1} {w['allocated_bytes'] / (1024**3):.2f} GB{'' if w['alive'] else ' (dead)'}"
+                    for i, w in enumerate(pool.get_state()))
+            
+            # Get working-set churn status
+            churner = HealthCheckHandler.generator.churner if HealthCheckHandler.generator else None
+            if churner:
+                stats = churner.get_stats()
+                controller_html += f"""
+    <div class="section">
+        <h2>🔥 Working-Set Churn</h2>
+        <p><span class="label">Pattern:</span> <span class="value">{stats['pattern']} ({stats['rate']*100:.0f}% of pages/s)</span></p>
+        <p><span class="label">Pages Touched:</span> <span class="value">{stats['pages_per_second']:.0f} / {stats['requested_pages_per_second']:.0f} pages/s</span></p>
+        <p><span class="label">Bandwidth:</span> <span class="highlight">{stats['bandwidth_bytes_per_second'] / (1024**2):.1f} MB/s</span></p>
+        <p><span class="label">Coverage:</span> <span class="value">{stats['coverage_bytes_per_second'] / (1024**2):.0f} MB/s of pages</span></p>
+    </div>
+    """
+            
+            # Get memory pressure (PSI, memory.stat, memory.events) from the pressure sampler
+            pressure_html = ""
+            pressure = HealthCheckHandler.pressure.latest() if HealthCheckHandler.pressure else None
+            if pressure:
+                def psi_line(kind):
+                    psi = pressure['psi'].get(kind)
+                    if not psi:
+                        return "N/A"
+                    return f"{psi['avg10']:.2f}% / {psi['avg60']:.2f}% / {psi['avg300']:.2f}%"
+                def stat_gb(key):
+                    value = pressure['stat'][key]
+                    return f"{value / (1024**3):.2f} GB" if value is not None else "N/A"
+                faults = pressure['pgmajfault_per_second']
+                events = pressure['events_since_start']
+                pressure_html = f"""
+    <div class="section">
+        <h2>🌡️ Memory Pressure</h2>
+        <p><span class="label">PSI some (avg10/60/300):</span> <span class="highlight">{psi_line('some')}</span></p>
+        <p><span class="label">PSI full (avg10/60/300):</span> <span class="value">{psi_line('full')}</span></p>
+        <p><span class="label">PSI Scope:</span> <span class="value">{pressure['psi_scope'] or 'N/A'}</span></p>
+        <p><span class="label">Anon / File / Slab:</span> <span class="value">{stat_gb('anon')} / {stat_gb('file')} / {stat_gb('slab')}</span></p>
+        <p><span class="label">Major Faults:</span> <span class="value">{f"{faults:.0f}/s" if faults is not None else "N/A"}</span></p>
+        <p><span class="label">Events since start (high/max/oom/oom_kill):</span> <span class="highlight">{' / '.join('N/A' if events[key] is None else str(events[key]) for key in EVENT_KEYS)}</span></p>
+    </div>
+    """
             
             # Get environment variables
             startup_delay = os.getenv('STARTUP_DELAY', 'Not set')
@@ -71,53 +291,11 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
             k_revision = os.getenv('K_REVISION', 'N/A')
             k_configuration = os.getenv('K_CONFIGURATION', 'N/A')
             
-            # Try to get metadata from Cloud Run metadata server
-            project_id = "N/A"
-            region = "N/A"
-            instance_id = "N/A"
-            try:
-                import urllib.request
-                import json
-                
-                # Set metadata server headers
-                headers = {'Metadata-Flavor': 'Google'}
-                
-                # Get project ID
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/project/project-id',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        project_id = response.read().decode()
-                except:
-                    pass
-                
-                # Get instance ID
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/instance/id',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        instance_id = response.read().decode()
-                except:
-                    pass
-                
-                # Get region from zone
-                try:
-                    req = urllib.request.Request(
-                        'http://metadata.google.internal/computeMetadata/v1/instance/region',
-                        headers=headers
-                    )
-                    with urllib.request.urlopen(req, timeout=1) as response:
-                        region_path = response.read().decode()
-                        region = region_path.split('/')[-1] if '/' in region_path else region_path
-                except:
-                    pass
-                
-            except Exception as e:
-                pass
+            # Cloud Run metadata (fetched once at startup, cached)
+            metadata = get_metadata()
+            project_id = metadata['project_id']
+            region = metadata['region']
+            instance_id = metadata['instance_id']
             
             # Build HTML response
             html = f"""<!DOCTYPE html>
@@ -142,8 +320,11 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         <p><span class="label">Memory Target:</span> <span class="highlight">{target_percentage}%</span></p>
         <p><span class="label">Actual Memory Usage:</span> <span class="highlight">{mem_percent}</span></p>
         <p><span class="label">Allocated by Generator:</span> <span class="value">{allocated_memory}</span></p>
+        <p><span class="label">Allocation Backend:</span> <span class="value">{HealthCheckHandler.generator.backend.name if HealthCheckHandler.generator else os.getenv('MEMORY_BACKEND', 'heap')}</span></p>
+        <p><span class="label">Control Mode:</span> <span class="value">{control_mode}</span></p>
+        <p><span class="label">Worker Processes:</span> <span class="value">{workers_summary}</span></p>
     </div>
-    
+    {controller_html}    
     <div class="section">
         <h2>💻 Memory Information</h2>
         <p><span class="label">Total Memory:</span> <span class="value">{mem_total}</span></p>
@@ -153,7 +334,7 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         <p><span class="label">Memory Limit (Config):</span> <span class="value">{memory_limit} MB</span></p>
         <p><span class="label">CPU Usage:</span> <span class="value">{cpu_percent}</span></p>
     </div>
-    
+    {pressure_html}    
     <div class="section">
         <h2>🔧 Runtime Configuration</h2>
         <p><span class="label">Startup Delay:</span> <span class="value">{startup_delay}s</span></p>
@@ -172,7 +353,7 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
     
     <div class="section">
         <h2>📊 Process Information</h2>
-        <p><span class="label">Active Processes:</span> <span class="value">{len([p for p in psutil.process_iter() if 'python' in p.name().lower()])} Python processes</span></p>
+        <p><span class="label">Active Processes:</span> <span class="value">{python_processes} Python processes</span></p>
         <p><span class="label">Main PID:</span> <span class="value">{os.getpid()}</span></p>
     </div>
     
@@ -192,30 +373,23 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
         pass
 
 def start_http_server(port=8080):
-    """Start HTTP server for Cloud Run"""
+    """
+    Bind the HTTP server for Cloud Run and serve it from a daemon thread
+
+    The socket is listening when this returns (http_ready is set), so there
+    is no port polling and the load can start right away
+    """
     try:
-        server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-        print(f"[{datetime.now()}] ✅ HTTP server bound to port {port}")
-        print(f"[{datetime.now()}] ✅ Ready to accept health checks")
-        server.serve_forever()
+        # Threaded so probes never queue behind a dashboard render
+        server = ThreadingHTTPServer(('0.0.0.0', port), HealthCheckHandler)
     except Exception as e:
         print(f"[{datetime.now()}] ❌ Failed to start HTTP server: {e}")
         raise
-
-def wait_for_port(port, timeout=10):
-    """Wait for port to be available"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(1)
-                result = s.connect_ex(('127.0.0.1', port))
-                if result == 0:
-                    return True
-        except:
-            pass
-        time.sleep(0.1)
-    return False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_ready.set()
+    print(f"[{datetime.now()}] ✅ HTTP server bound to port {port}")
+    print(f"[{datetime.now()}] ✅ Ready to accept health checks")
+    return server
 
 def main():
     """Main function"""
@@ -228,32 +402,55 @@ def main():
         print(f"[{datetime.now()}] Current value: {target_percentage}")
         raise ValueError("Invalid MEMORY_TARGET. Must be 75, 85, or 95")
     
+    control_mode = os.getenv('MEMORY_CONTROL_MODE', 'open').lower()
+    if control_mode not in ['open', 'closed']:
+        print(f"[{datetime.now()}] ERROR: MEMORY_CONTROL_MODE must be open or closed")
+        raise ValueError("Invalid MEMORY_CONTROL_MODE. Must be open or closed")
+    
+    churn_pattern = os.getenv('MEMORY_CHURN_PATTERN', 'random').lower()
+    if churn_pattern not in CHURN_PATTERNS:
+        print(f"[{datetime.now()}] ERROR: MEMORY_CHURN_PATTERN must be one of: {', '.join(CHURN_PATTERNS)}")
+        raise ValueError(f"Invalid MEMORY_CHURN_PATTERN. Must be one of: {', '.join(CHURN_PATTERNS)}")
+    
+    try:
+        profile = load_memory_profile_from_env()
+    except (OSError, ValueError) as e:
+        print(f"[{datetime.now()}] ERROR: Invalid MEMORY_PROFILE / MEMORY_PROFILE_FILE: {e}")
+        raise
+    if profile and control_mode == 'closed':
+        print(f"[{datetime.now()}] ERROR: MEMORY_PROFILE cannot be combined with MEMORY_CONTROL_MODE=closed")
+        raise ValueError("MEMORY_PROFILE and MEMORY_CONTROL_MODE=closed are mutually exclusive")
+    
     print(f"[{datetime.now()}] ===== Memory Load Generator Started (Cloud Run Mode) =====")
     print(f"[{datetime.now()}] Target: {target_percentage}% Memory utilization")
+    print(f"[{datetime.now()}] Control mode: {'profile' if profile else control_mode}")
     
     # Get PORT from environment (Cloud Run sets this)
     port = int(os.environ.get('PORT', 8080))
     print(f"[{datetime.now()}] Port: {port}")
     
-    # Start HTTP server in background thread (MUST be ready immediately)
-    http_thread = threading.Thread(target=start_http_server, args=(port,), daemon=True)
-    http_thread.start()
+    # Bind the HTTP server first so the startup probe passes as early as possible
+    start_http_server(port)
+    
+    # Fetch Cloud Run metadata once, concurrently, without delaying the HTTP bind
+    prefetch_metadata()
     
-    print(f"[{datetime.now()}] HTTP server starting on port {port}...")
+    # Start background metrics sampler so HTTP handlers never block on measurements
+    sampler = create_metrics_sampler()
+    sampler.start()
+    HealthCheckHandler.sampler = sampler
     
-    # Wait for HTTP server to actually be listening
-    print(f"[{datetime.now()}] Waiting for HTTP server to bind...")
-    if wait_for_port(port, timeout=10):
-        print(f"[{datetime.now()}] ✅ HTTP server is ready and listening on port {port}")
-    else:
-        print(f"[{datetime.now()}] ❌ HTTP server failed to start in time!")
-        return
+    # Sample PSI / memory.stat / memory.events (shared with the generator's monitor loop)
+    pressure = create_pressure_sampler()
+    pressure.start()
+    HealthCheckHandler.pressure = pressure
     
-    # Additional delay before memory load (configurable)
-    startup_delay = int(os.getenv('STARTUP_DELAY', '10'))
+    # Load is gated on the listening socket (http_ready), not on a fixed sleep;
+    # STARTUP_DELAY (default 0) optionally holds it back further
+    http_ready.wait()
+    startup_delay = float(os.getenv('STARTUP_DELAY', '0'))
     if startup_delay > 0:
-        print(f"[{datetime.now()}] Delaying {startup_delay}s before starting memory allocation...")
-        print(f"[{datetime.now()}] (This ensures Cloud Run health check passes first)")
+        print(f"[{datetime.now()}] Delaying {startup_delay:g}s before starting memory allocation...")
         time.sleep(startup_delay)
     
     # Get memory limit
@@ -269,7 +466,12 @@ def main():
     
     # Create memory load generator
     print(f"[{datetime.now()}] ===== Starting Memory Allocation =====")
-    generator = MemoryLoadGenerator(target_percentage=target_percentage)
+    # MEMORY_WORKERS > 1: spread the blocks over worker processes
+    pool = create_memory_worker_pool()
+    if pool:
+        pool.start()
+    generator = MemoryLoadGenerator(target_percentage=target_percentage, pressure=pressure, pool=pool,
+                                    profile=profile)
     
     # Store generator instance for health check handler
     HealthCheckHandler.generator = generator
@@ -285,6 +487,10 @@ def main():
     except KeyboardInterrupt:
         print(f"\n[{datetime.now()}] Stopping memory load generator...")
         print(f"[{datetime.now()}] Generator stopped")
+    finally:
+        # Graceful shrink: workers release their blocks before exiting
+        if pool:
+            pool.stop()
 
 if __name__ == "__main__":
     main()
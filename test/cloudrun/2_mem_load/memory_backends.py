@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Allocation backends for MemoryLoadGenerator
+Each backend produces a different kind of memory that counts toward the
+cgroup's memory.current, so the generator can reproduce each kind of pressure
+
+Selection (env):
+    MEMORY_BACKEND=heap        bytearray on the malloc heap (default)
+    MEMORY_BACKEND=anonymous   private anonymous mmap
+    MEMORY_BACKEND=hugetlb     anonymous mmap with MAP_HUGETLB (falls back to THP)
+    MEMORY_BACKEND=thp         anonymous mmap advised MADV_HUGEPAGE
+    MEMORY_BACKEND=file        shared file mapping (page cache) in MEMORY_FILE_DIR
+    MEMORY_BACKEND=shm         shared file mapping in /dev/shm (tmpfs/shmem)
+    MEMORY_FILE_DIR=/tmp       directory for the file backend (disk or tmpfs)
+"""
+import ctypes
+import ctypes.util
+import mmap
+import os
+import tempfile
+from datetime import datetime
+
+# Linux values, not exported by every Python version's mmap module
+MAP_HUGETLB = getattr(mmap, 'MAP_HUGETLB', 0x40000)
+MADV_POPULATE_WRITE = getattr(mmap, 'MADV_POPULATE_WRITE', 23)
+HUGE_PAGE_SIZE = 2 * 1024 * 1024
+
+# glibc malloc_trim returns freed heap pages to the OS (missing on musl)
+try:
+    _malloc_trim = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6').malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None
+
+def touch_pages(block):
+    """Write one byte per page in C (strided slice assignment) to commit a block"""
+    page = mmap.PAGESIZE
+    pages = (len(block) + page - 1) // page
+    block[::page] = b'\x01' * pages
+
+class HeapBackend:
+    """bytearray blocks on the malloc heap (anonymous memory via glibc)"""
+    name = 'heap'
+
+    def allocate(self, size):
+        return bytearray(size)
+
+    def touch(self, block):
+        touch_pages(block)
+
+    def release(self, block):
+        # Freed once the caller drops its last reference; see trim()
+        pass
+
+    def trim(self):
+        """Return freed heap memory to the OS (glibc keeps it cached otherwise)"""
+        if _malloc_trim is not None:
+            _malloc_trim(0)
+
+class AnonymousBackend:
+    """Private anonymous mmap blocks, returned to the OS on release"""
+    name = 'anonymous'
+    flags = mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS
+
+    def allocate(self, size):
+        return mmap.mmap(-1, size, flags=self.flags)
+
+    def touch(self, block):
+        # One madvise call prefaults the whole block (Linux 5.14+), else touch pages
+        try:
+            block.madvise(MADV_POPULATE_WRITE)
+        except (OSError, AttributeError):
+            touch_pages(block)
+
+    def release(self, block):
+        block.close()  # munmap: pages go straight back to the OS
+
+    def trim(self):
+        pass
+
+class TransparentHugePageBackend(AnonymousBackend):
+    """Anonymous mmap advised MADV_HUGEPAGE (needs THP enabled=madvise or always)"""
+    name = 'thp'
+
+    def allocate(self, size):
+        # Round up to whole huge pages so khugepaged can back the full range
+        size = (size + HUGE_PAGE_SIZE - 1) // HUGE_PAGE_SIZE * HUGE_PAGE_SIZE
+        block = mmap.mmap(-1, size, flags=self.flags)
+        try:
+            block.madvise(mmap.MADV_HUGEPAGE)
+        except (OSError, AttributeError) as e:
+            print(f"[{datetime.now()}] Warning: MADV_HUGEPAGE failed: {e}")
+        return block
+
+class HugeTlbBackend(TransparentHugePageBackend):
+    """
+    Anonymous mmap with MAP_HUGETLB from the preallocated hugetlbfs pool
+
+    Falls back to THP-advised mappings once the pool (vm.nr_hugepages) is
+    empty or unavailable, which is the common case inside containers.
+    """
+    name = 'hugetlb'
+
+    def __init__(self):
+        self.fallback = False
+
+    def allocate(self, size):
+        if not self.fallback:
+            size_huge = (size + HUGE_PAGE_SIZE - 1) // HUGE_PAGE_SIZE * HUGE_PAGE_SIZE
+            try:
+                return mmap.mmap(-1, size_huge, flags=self.flags | MAP_HUGETLB)
+            except OSError as e:
+                print(f"[{datetime.now()}] Warning: MAP_HUGETLB failed ({e}), falling back to THP")
+                self.fallback = True
+        return super().allocate(size)
+
+class FileBackend:
+    """
+    Shared file mappings (page cache pages charged to the cgroup)
+
+    Each block is a file in `directory`, unlinked right after mapping so it
+    disappears with the process. On disk the dirty pages can be written back
+    and reclaimed; on tmpfs they behave like shmem.
+    """
+    name = 'file'
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv('MEMORY_FILE_DIR', tempfile.gettempdir())
+
+    def allocate(self, size):
+        fd, path = tempfile.mkstemp(prefix='memload-', dir=self.directory)
+        try:
+            os.unlink(path)
+            # Reserve the blocks up front: a sparse file on a full tmpfs/disk raises
+            # SIGBUS at the first touch, fallocate raises OSError(ENOSPC) here instead
+            os.posix_fallocate(fd, 0, size)
+            return mmap.mmap(fd, size, flags=mmap.MAP_SHARED)
+        finally:
+            os.close(fd)
+
+    def touch(self, block):
+        touch_pages(block)
+
+    def release(self, block):
+        block.close()  # Last reference to the unlinked file, its pages are freed
+
+    def trim(self):
+        pass
+
+class ShmBackend(FileBackend):
+    """Shared file mappings in /dev/shm (shmem, not reclaimable without swap)"""
+    name = 'shm'
+
+    def __init__(self):
+        super().__init__('/dev/shm')
+
+BACKENDS = {
+    'heap': HeapBackend,
+    'anonymous': AnonymousBackend,
+    'hugetlb': HugeTlbBackend,
+    'thp': TransparentHugePageBackend,
+    'file': FileBackend,
+    'shm': ShmBackend,
+}
+
+def get_backend(name=None):
+    """Create a backend by name (default: MEMORY_BACKEND env, else heap)"""
+    name = (name or os.getenv('MEMORY_BACKEND', 'heap')).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown MEMORY_BACKEND '{name}'. Must be one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Closed-loop memory controller - holds cgroup memory.current on MEMORY_TARGET
+Compares memory.current against the target every interval and grows or
+releases MemoryLoadGenerator blocks, with a hysteresis band so it does not
+oscillate on every small change in the app's own RSS or page cache
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+class MemoryTargetController:
+    def __init__(self, generator, interval=1.0, hysteresis=2.0, max_step_mb=256, report_interval=10):
+        """
+        Initialize memory target controller
+
+        Args:
+            generator: MemoryLoadGenerator whose blocks are grown/released
+            interval: Seconds between memory.current samples
+            hysteresis: Half-width of the dead band in percentage points; the
+                controller only acts outside target ± hysteresis and then
+                corrects back to the target itself
+            max_step_mb: Largest grow/release per interval (limits overshoot)
+            report_interval: Seconds between progress log lines
+        """
+        self.generator = generator
+        self.interval = interval
+        self.hysteresis = hysteresis
+        self.max_step = int(max_step_mb * 1024 * 1024)
+        self.report_interval = report_interval
+
+        self.actual_percentage = None
+        self.error = None
+        self.grown_bytes = 0
+        self.released_bytes = 0
+        self.adjustments = 0
+        self.last_action = None
+        self.running = False
+
+    def step(self):
+        """
+        One control step
+
+        Returns:
+            Bytes allocated (positive), released (negative), or 0 inside the band
+        """
+        mem_info = self.generator.get_memory_info()
+        total = mem_info['total']
+        target_percentage = self.generator.target_percentage
+        self.actual_percentage = mem_info['percent']
+        self.error = target_percentage - self.actual_percentage
+        if abs(self.error) <= self.hysteresis:
+            return 0
+
+        delta = int(total * target_percentage / 100) - mem_info['used']
+        if delta > 0:
+            # One summary line per step below; per-allocation progress would flood the log
+            grown = self.generator.allocate_memory(min(delta, self.max_step), verbose=False)
+            self.grown_bytes += grown
+            change = grown
+        else:
+            released = self.generator.release_memory(min(-delta, self.max_step))
+            self.released_bytes += released
+            change = -released
+
+        self.adjustments += 1
+        self.last_action = time.time()
+        print(f"[{datetime.now()}] Memory controller | Actual: {self.actual_percentage:.2f}% | "
+              f"Target: {target_percentage}% ±{self.hysteresis}% | "
+              f"{'Grew' if change >= 0 else 'Released'} {self.generator.format_bytes(abs(change))}")
+        return change
+
+    def get_stats(self):
+        """Get controller state for reporting"""
+        return {
+            'target_percentage': self.generator.target_percentage,
+            'actual_percentage': self.actual_percentage,
+            'error': self.error,
+            'hysteresis': self.hysteresis,
+            'in_band': self.error is not None and abs(self.error) <= self.hysteresis,
+            'grown_bytes': self.grown_bytes,
+            'released_bytes': self.released_bytes,
+            'adjustments': self.adjustments,
+            'last_action': self.last_action,
+        }
+
+    def run(self):
+        """Control loop: sample memory.current, grow or release blocks"""
+        self.running = True
+        print(f"[{datetime.now()}] Memory controller started: target {self.generator.target_percentage}% "
+              f"±{self.hysteresis}%, interval={self.interval}s, "
+              f"max step={self.generator.format_bytes(self.max_step)}")
+
+        last_report = time.time()
+        next_step = time.monotonic()
+        while self.running:
+            next_step += self.interval
+            time.sleep(max(0.0, next_step - time.monotonic()))
+            try:
+                self.step()
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: memory controller step failed: {e}")
+
+            now = time.time()
+            if now - last_report >= self.report_interval and self.actual_percentage is not None:
+                last_report = now
+                print(f"[{datetime.now()}] Memory controller | Actual: {self.actual_percentage:.2f}% | "
+                      f"Error: {self.error:+.2f} pts | Held: {self.generator.format_bytes(self.generator.allocated_bytes)} | "
+                      f"Adjustments: {self.adjustments}")
+                if self.generator.pressure:
+                    print(f"[{datetime.now()}] {self.generator.pressure.summary()}")
+
+    def start(self):
+        """Run the control loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop the control loop"""
+        self.running = False
+
+def create_memory_controller(generator):
+    """
+    Create a memory controller for a generator, configured from env
+
+    Env variables: MEMORY_CONTROL_INTERVAL, MEMORY_HYSTERESIS, MEMORY_MAX_STEP_MB
+    """
+    return MemoryTargetController(
+        generator,
+        interval=float(os.getenv('MEMORY_CONTROL_INTERVAL', '1.0')),
+        hysteresis=float(os.getenv('MEMORY_HYSTERESIS', '2.0')),
+        max_step_mb=float(os.getenv('MEMORY_MAX_STEP_MB', '256')),
+    )
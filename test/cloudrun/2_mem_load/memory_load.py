@@ -4,21 +4,57 @@ Memory Load Generator - Configurable memory usage via environment variable
 Supports: 75%, 85%, 99% memory targets
 """
 import psutil
+import mmap
+import threading
 import time
 import os
 from datetime import datetime
 
+from memory_backends import get_backend
+from memory_controller import create_memory_controller
+from working_set import create_working_set_churner
+from memory_pressure import create_pressure_sampler
+from memory_profile import MemoryProfileRunner, load_memory_profile_from_env
+
+BLOCK_SIZE = 10 * 1024 * 1024  # 10 MB per block
+
 class MemoryLoadGenerator:
-    def __init__(self, target_percentage=75):
+    def __init__(self, target_percentage=75, fill_rate=None, backend=None, pressure=None, pool=None, profile=None):
         """
         Initialize Memory Load Generator
         
         Args:
             target_percentage: Target memory usage percentage (default 75%)
+            fill_rate: Allocation rate in MB/s, 0 = as fast as possible
+                (default: MEMORY_FILL_RATE env, else 0)
+            backend: Allocation backend name (see memory_backends.BACKENDS,
+                default: MEMORY_BACKEND env, else heap)
+            pressure: Running MemoryPressureSampler to share (default: one is
+                created and started by run())
+            pool: Started MemoryWorkerPool; allocation and release are then
+                delegated to its worker processes instead of data_blocks
+            profile: MemoryProfile to follow instead of the percentage target
+                (default: MEMORY_PROFILE / MEMORY_PROFILE_FILE env, read by run())
         """
         self.target_percentage = target_percentage
         self.data_blocks = []
-        self.block_size = 10 * 1024 * 1024  # 10 MB per block
+        self.block_size = BLOCK_SIZE
+        self.allocated_bytes = 0  # Sum of data_blocks sizes, kept for cheap reporting
+        if fill_rate is None:
+            fill_rate = float(os.getenv('MEMORY_FILL_RATE', '0'))
+        self.fill_rate = max(0.0, fill_rate)
+        self.backend = get_backend(backend)
+        # open: allocate once then monitor, closed: keep memory.current on target
+        self.control_mode = os.getenv('MEMORY_CONTROL_MODE', 'open').lower()
+        self.controller = None
+        self.churner = None
+        self.pressure = pressure
+        self.pool = pool
+        self.profile = profile
+        self.profile_runner = None
+        # Set once run() has finished its initial allocation (or handed off to
+        # a profile / closed-loop controller); retargeting waits for it
+        self.allocation_done = threading.Event()
         
     def get_container_memory_limit(self):
         """Get container memory limit from cgroup"""
@@ -127,55 +163,117 @@ class MemoryLoadGenerator:
         
         return target_memory
     
-    def allocate_memory(self, target_memory):
+    def allocate_memory(self, target_memory, verbose=True):
         """
         Allocate memory to reach target usage
         
+        Blocks come from the allocation backend and are committed page by
+        page (strided write, or MADV_POPULATE_WRITE for mmap) as fast as the
+        kernel allows, or paced to fill_rate MB/s on absolute deadlines for
+        a controlled ramp.
+        
         Args:
             target_memory: Target memory in bytes to allocate
+            verbose: Log the start/end of the allocation (pool workers
+                allocate in small chunks and pass False)
         """
-        print(f"[{datetime.now()}] Starting memory allocation...")
+        if self.pool:
+            if verbose:
+                print(f"[{datetime.now()}] Growing {self.pool.num_workers} memory workers by {self.format_bytes(target_memory)}...")
+            start = time.monotonic()
+            allocated = self.pool.grow(target_memory)
+            self.allocated_bytes = self.pool.allocated_bytes()
+            elapsed = time.monotonic() - start
+            if verbose:
+                print(f"[{datetime.now()}] Allocation took {elapsed:.2f}s "
+                      f"({allocated / (1024**2) / max(elapsed, 1e-6):.0f} MB/s across {self.pool.num_workers} workers)")
+            return allocated
+        
+        rate = f"{self.fill_rate:.0f} MB/s" if self.fill_rate else "unlimited"
+        if verbose:
+            print(f"[{datetime.now()}] Starting memory allocation (backend: {self.backend.name}, "
+                  f"fill rate: {rate}, page size: {mmap.PAGESIZE} B)...")
         
         allocated = 0
         block_count = 0
+        start = time.monotonic()
+        next_log = start + 1.0
         
         try:
             while allocated < target_memory:
                 # Calculate remaining memory to allocate
                 remaining = target_memory - allocated
+                current_block_size = min(remaining, self.block_size)
                 
-                # Adjust block size if needed
-                if remaining < self.block_size:
-                    current_block_size = remaining
-                else:
-                    current_block_size = self.block_size
-                
-                # Allocate memory block (fill with data to ensure physical allocation)
-                block = bytearray(current_block_size)
-                # Fill with pattern to ensure memory is actually used
-                for i in range(0, len(block), 1024):
-                    block[i] = i % 256
+                # Allocate memory block and touch every page to ensure physical allocation
+                block = self.backend.allocate(current_block_size)
+                self.backend.touch(block)
                 
+                # Huge-page backends round blocks up, so count the real length
                 self.data_blocks.append(block)
-                allocated += current_block_size
+                self.allocated_bytes += len(block)
+                allocated += len(block)
                 block_count += 1
                 
-                # Log progress every 100MB
-                if block_count % 10 == 0:
+                # Log progress at most once per second
+                now = time.monotonic()
+                if now >= next_log:
                     current_mem = self.get_memory_info()
                     print(f"[{datetime.now()}] Allocated: {self.format_bytes(allocated)} "
-                          f"({block_count} blocks) | "
+                          f"({block_count} blocks, {allocated / (1024**2) / (now - start):.0f} MB/s) | "
                           f"Current Memory Usage: {current_mem['percent']:.2f}%")
+                    next_log = now + 1.0
                 
-                # Small delay to prevent overwhelming the system
-                time.sleep(0.01)
+                # Pace to fill_rate: sleep until this many bytes are due
+                if self.fill_rate:
+                    due = start + allocated / (self.fill_rate * 1024 * 1024)
+                    if due > now:
+                        time.sleep(due - now)
                 
-        except MemoryError:
-            print(f"[{datetime.now()}] MemoryError: Cannot allocate more memory")
+        except (MemoryError, OSError) as e:
+            print(f"[{datetime.now()}] {type(e).__name__}: Cannot allocate more memory ({e})")
             print(f"[{datetime.now()}] Successfully allocated: {self.format_bytes(allocated)}")
         
+        elapsed = time.monotonic() - start
+        if verbose:
+            print(f"[{datetime.now()}] Allocation took {elapsed:.2f}s "
+                  f"({allocated / (1024**2) / max(elapsed, 1e-6):.0f} MB/s)")
         return allocated
     
+    def release_memory(self, target_release):
+        """
+        Release blocks (newest first) and return their memory to the OS
+        
+        Args:
+            target_release: Bytes to release (rounded up to whole blocks)
+        
+        Returns:
+            Bytes actually released
+        """
+        if self.pool:
+            released = self.pool.shrink(target_release)
+            self.allocated_bytes = self.pool.allocated_bytes()
+            return released
+        
+        released = 0
+        while released < target_release and self.data_blocks:
+            block = self.data_blocks.pop()
+            size = len(block)
+            self.backend.release(block)
+            del block
+            self.allocated_bytes -= size
+            released += size
+        self.backend.trim()
+        return released
+    
+    def get_allocated_bytes(self):
+        """Bytes held by this generator, or live total across pool workers"""
+        return self.pool.allocated_bytes() if self.pool else self.allocated_bytes
+    
+    def get_block_count(self):
+        """Blocks held by this generator, or live total across pool workers"""
+        return self.pool.blocks() if self.pool else len(self.data_blocks)
+    
     def monitor_memory(self, interval=5):
         """
         Monitor memory usage periodically
@@ -194,6 +292,8 @@ class MemoryLoadGenerator:
                       f"Used: {self.format_bytes(mem_info['used'])} / "
                       f"Total: {self.format_bytes(mem_info['total'])} | "
                       f"Available: {self.format_bytes(mem_info['available'])}")
+                if self.pressure:
+                    print(f"[{datetime.now()}] {self.pressure.summary()}")
                 time.sleep(interval)
                 
         except KeyboardInterrupt:
@@ -205,6 +305,24 @@ class MemoryLoadGenerator:
         print(f"[{datetime.now()}] PID: {os.getpid()}")
         print(f"[{datetime.now()}] Target: {self.target_percentage}% Memory utilization\n")
         
+        # Sample PSI / memory.stat / memory.events in the background
+        if self.pressure is None:
+            self.pressure = create_pressure_sampler()
+            self.pressure.start()
+        
+        # A growth profile drives allocation on its own schedule
+        if self.profile is None:
+            self.profile = load_memory_profile_from_env()
+        if self.profile:
+            self.profile_runner = MemoryProfileRunner(self, self.profile)
+            self.profile_runner.start()
+            self.allocation_done.set()
+            self.churner = None if self.pool else create_working_set_churner(self)
+            if self.churner:
+                self.churner.start()
+            self.monitor_memory(interval=10)
+            return
+        
         # Calculate target memory
         target_memory = self.calculate_target_memory()
         
@@ -229,14 +347,26 @@ class MemoryLoadGenerator:
             final_mem = self.get_memory_info()
             print(f"\n[{datetime.now()}] ===== Allocation Complete =====")
             print(f"[{datetime.now()}] Allocated: {self.format_bytes(allocated)}")
-            print(f"[{datetime.now()}] Number of blocks: {len(self.data_blocks)}")
+            print(f"[{datetime.now()}] Number of blocks: {self.get_block_count()}")
             print(f"[{datetime.now()}] Final Memory Usage: {final_mem['percent']:.2f}%")
             print(f"[{datetime.now()}] Used: {self.format_bytes(final_mem['used'])} / "
                   f"Total: {self.format_bytes(final_mem['total'])}")
             print(f"[{datetime.now()}] =====================================\n")
         
-        # Start monitoring
-        self.monitor_memory(interval=10)
+        # Keep the allocated working set hot (MEMORY_CHURN_RATE > 0); pool
+        # workers run their own churn over the blocks they own
+        self.churner = None if self.pool else create_working_set_churner(self)
+        if self.churner:
+            self.churner.start()
+        
+        # Hold the target in closed-loop mode, otherwise just monitor
+        if self.control_mode == 'closed':
+            self.controller = create_memory_controller(self)
+            self.allocation_done.set()
+            self.controller.run()
+        else:
+            self.allocation_done.set()
+            self.monitor_memory(interval=10)
 
 def main():
     """Main function"""
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Memory-pressure instrumentation - PSI, memory.stat and memory.events
+Samples the cgroup signals that predict an OOM kill (stall time, page
+faults, reclaim/limit events) on a timer so the monitor loop and HTTP
+handlers read precomputed values
+
+cgroup v2 files: memory.pressure, memory.stat, memory.events
+cgroup v1 fallback: /proc/pressure/memory (system-wide PSI), memory/memory.stat,
+memory/memory.failcnt and memory/memory.oom_control
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+CGROUP_V2 = '/sys/fs/cgroup'
+CGROUP_V1 = '/sys/fs/cgroup/memory'
+
+# memory.stat keys reported (v2 name -> v1 hierarchical name)
+STAT_KEYS = {
+    'anon': 'total_rss',
+    'file': 'total_cache',
+    'slab': None,
+    'pgmajfault': 'total_pgmajfault',
+}
+EVENT_KEYS = ['high', 'max', 'oom', 'oom_kill']
+
+def read_flat_keyed(path):
+    """Read a flat-keyed cgroup file ("key value" per line) into a dict of ints"""
+    values = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    values[parts[0]] = int(parts[1])
+    except (OSError, ValueError):
+        pass
+    return values
+
+def read_psi():
+    """
+    Read memory PSI
+
+    Returns:
+        (scope, {'some': {...}, 'full': {...}}) with avg10/avg60/avg300 in %
+        and total in microseconds; scope is 'cgroup', 'system' or None
+    """
+    for scope, path in [('cgroup', f'{CGROUP_V2}/memory.pressure'), ('system', '/proc/pressure/memory')]:
+        try:
+            with open(path, 'r') as f:
+                psi = {}
+                for line in f:
+                    kind, *fields = line.split()
+                    values = dict(field.split('=') for field in fields)
+                    psi[kind] = {key: (int(value) if key == 'total' else float(value))
+                                 for key, value in values.items()}
+                return scope, psi
+        except (OSError, ValueError):
+            continue
+    return None, {}
+
+def read_memory_stat():
+    """Read anon/file/slab/pgmajfault from memory.stat (None when unavailable)"""
+    if os.path.exists(f'{CGROUP_V2}/memory.stat'):
+        stat = read_flat_keyed(f'{CGROUP_V2}/memory.stat')
+        return {key: stat.get(key) for key in STAT_KEYS}
+    stat = read_flat_keyed(f'{CGROUP_V1}/memory.stat')
+    return {key: (stat.get(v1_key) if v1_key else None) for key, v1_key in STAT_KEYS.items()}
+
+def read_memory_events():
+    """Read high/max/oom/oom_kill counters from memory.events (None when unavailable)"""
+    if os.path.exists(f'{CGROUP_V2}/memory.events'):
+        events = read_flat_keyed(f'{CGROUP_V2}/memory.events')
+        return {key: events.get(key) for key in EVENT_KEYS}
+    # v1: failcnt counts hits of the limit, oom_control carries oom_kill
+    events = {key: None for key in EVENT_KEYS}
+    try:
+        with open(f'{CGROUP_V1}/memory.failcnt', 'r') as f:
+            events['max'] = int(f.read().strip())
+    except (OSError, ValueError):
+        pass
+    events['oom_kill'] = read_flat_keyed(f'{CGROUP_V1}/memory.oom_control').get('oom_kill')
+    return events
+
+class MemoryPressureSampler:
+    def __init__(self, interval=2.0):
+        """
+        Initialize memory-pressure sampler
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.baseline = None
+        self.previous = None
+        self.current = None
+        self.running = False
+        self.lock = threading.Lock()
+
+    def take_sample(self):
+        """Collect one sample; fault rate and event deltas are computed here"""
+        now = time.time()
+        scope, psi = read_psi()
+        sample = {
+            'timestamp': now,
+            'psi_scope': scope,
+            'psi': psi,
+            'stat': read_memory_stat(),
+            'events': read_memory_events(),
+            'pgmajfault_per_second': None,
+        }
+        if self.baseline is None:
+            self.baseline = sample
+
+        previous = self.previous
+        if previous:
+            faults, last_faults = sample['stat']['pgmajfault'], previous['stat']['pgmajfault']
+            elapsed = now - previous['timestamp']
+            if faults is not None and last_faults is not None and elapsed > 0:
+                sample['pgmajfault_per_second'] = (faults - last_faults) / elapsed
+
+        # Events since this process started (counters are cgroup-lifetime)
+        sample['events_since_start'] = {
+            key: (value - self.baseline['events'][key]
+                  if value is not None and self.baseline['events'][key] is not None else None)
+            for key, value in sample['events'].items()
+        }
+
+        self.previous = sample
+        with self.lock:
+            self.current = sample
+        return sample
+
+    def latest(self):
+        """Latest sample, or None before the first one"""
+        with self.lock:
+            return self.current
+
+    def summary(self):
+        """One-line summary for the monitor loop"""
+        sample = self.latest()
+        if sample is None:
+            return "Pressure: N/A"
+        some = sample['psi'].get('some', {}).get('avg10')
+        full = sample['psi'].get('full', {}).get('avg10')
+        faults = sample['pgmajfault_per_second']
+        events = sample['events_since_start']
+        psi = f"PSI some/full avg10: {some:.2f}%/{full:.2f}%" if some is not None and full is not None else "PSI: N/A"
+        psi += f" ({sample['psi_scope']})" if sample['psi_scope'] == 'system' else ""
+        return (f"{psi} | Major faults: {f'{faults:.0f}/s' if faults is not None else 'N/A'} | "
+                f"Events (high/max/oom/oom_kill): "
+                f"{'/'.join('-' if events[key] is None else str(events[key]) for key in EVENT_KEYS)}")
+
+    def run(self):
+        self.running = True
+        next_sample = time.monotonic()
+        while self.running:
+            next_sample += self.interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+            try:
+                self.take_sample()
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: memory pressure sample failed: {e}")
+
+    def start(self):
+        """Take a first sample synchronously, then sample in a daemon thread"""
+        self.take_sample()
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+def create_pressure_sampler():
+    """
+    Create a memory-pressure sampler configured from env
+
+    Env variables: MEMORY_PRESSURE_INTERVAL (seconds, default 2.0)
+    """
+    return MemoryPressureSampler(interval=float(os.getenv('MEMORY_PRESSURE_INTERVAL', '2.0')))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Scheduled memory growth profiles - hold, linear leak, sawtooth GC, spike and step
+A MemoryProfileRunner drives how much memory the MemoryLoadGenerator holds
+on a fixed tick, growing or releasing data_blocks to follow the curve, so
+alerting latency can be tested against realistic failure shapes
+
+Targets are MB held by the generator (on top of the app's own usage).
+Profile spec (JSON via MEMORY_PROFILE env, or a file via MEMORY_PROFILE_FILE):
+    {
+        "loop": false,
+        "tick": 1.0,
+        "segments": [
+            {"type": "hold", "mb": 256, "duration": 30},
+            {"type": "leak", "from": 256, "rate_mb_per_min": 50, "duration": 600},
+            {"type": "sawtooth", "low": 200, "high": 600, "period": 30, "duration": 300},
+            {"type": "spike", "base": 200, "peak": 1500, "at": 10, "hold": 5, "duration": 60},
+            {"type": "step", "levels": [256, 512, 1024], "step_duration": 60}
+        ]
+    }
+A bare list of segments is also accepted. The schedule engine (ticking,
+segment lookup, hold/step) is shared with the CPU profiles in schedule.py
+"""
+import json
+import os
+import time
+from datetime import datetime
+from functools import partial
+
+from schedule import HoldSegment, Schedule, ScheduleRunner, StepSegment, require
+
+MB = 1024 * 1024
+
+def megabytes(value):
+    return max(0.0, float(value))
+
+class LeakSegment:
+    """Linear leak: grows by rate_mb_per_min from `from` MB, never freed"""
+    def __init__(self, spec):
+        self.start = megabytes(spec.get('from', 0))
+        self.rate = float(require(spec, 'rate_mb_per_min'))
+        self.duration = float(require(spec, 'duration'))
+
+    def value_at(self, t):
+        return max(0.0, self.start + self.rate * t / 60)
+
+class SawtoothSegment:
+    """GC sawtooth: rises linearly from low to high over each period, then drops back"""
+    def __init__(self, spec):
+        self.low = megabytes(require(spec, 'low'))
+        self.high = megabytes(require(spec, 'high'))
+        self.period = float(require(spec, 'period'))
+        self.duration = float(require(spec, 'duration'))
+        if self.period <= 0:
+            raise ValueError("Memory profile segment 'sawtooth' requires period > 0")
+
+    def value_at(self, t):
+        return self.low + (self.high - self.low) * ((t % self.period) / self.period)
+
+class SpikeSegment:
+    """Sudden spike: base, jump to peak at `at` seconds, released after `hold` seconds"""
+    def __init__(self, spec):
+        self.base = megabytes(require(spec, 'base'))
+        self.peak = megabytes(require(spec, 'peak'))
+        self.at = float(spec.get('at', 0.0))
+        self.hold = float(require(spec, 'hold'))
+        self.duration = float(spec.get('duration', self.at + self.hold))
+
+    def value_at(self, t):
+        return self.peak if self.at <= t < self.at + self.hold else self.base
+
+SEGMENT_TYPES = {
+    'hold': partial(HoldSegment, key='mb', normalize=megabytes),
+    'leak': LeakSegment,
+    'sawtooth': SawtoothSegment,
+    'spike': SpikeSegment,
+    'step': partial(StepSegment, key='levels', normalize=megabytes),
+}
+
+class MemoryProfile(Schedule):
+    def __init__(self, segments, loop=False, tick=1.0):
+        """
+        Initialize memory profile
+
+        Args:
+            segments: List of segment objects (see SEGMENT_TYPES)
+            loop: Restart from the first segment when the schedule ends
+            tick: Seconds between target updates
+        """
+        super().__init__(segments, loop=loop, tick=tick)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Build a profile from a parsed JSON spec (dict with segments, or a list)"""
+        segments, loop, tick = cls.parse_spec(spec, SEGMENT_TYPES, default_tick=1.0)
+        return cls(segments, loop=loop, tick=tick)
+
+    def mb_at(self, elapsed):
+        """(mb, segment_index, finished) at a point in the schedule"""
+        return self.value_at(elapsed)
+
+def load_memory_profile_from_env():
+    """
+    Load a profile from MEMORY_PROFILE (inline JSON) or MEMORY_PROFILE_FILE (path)
+
+    Returns:
+        MemoryProfile, or None when neither variable is set
+    """
+    inline = os.getenv('MEMORY_PROFILE')
+    path = os.getenv('MEMORY_PROFILE_FILE')
+    try:
+        if inline:
+            return MemoryProfile.from_spec(json.loads(inline))
+        if path:
+            with open(path, 'r') as f:
+                return MemoryProfile.from_spec(json.load(f))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid memory profile JSON: {e}")
+    return None
+
+class MemoryProfileRunner(ScheduleRunner):
+    name = 'Memory profile'
+
+    def __init__(self, generator, profile, jump_log_mb=64):
+        """
+        Initialize memory profile runner
+
+        Args:
+            generator: MemoryLoadGenerator whose holdings are driven
+            profile: MemoryProfile to execute
+            jump_log_mb: Target changes of at least this many MB in one tick
+                (spike start/end, sawtooth drop, step) are logged with a
+                timestamp for alert-latency correlation
+        """
+        super().__init__(profile)
+        self.generator = generator
+        self.profile = profile
+        self.jump_log_mb = jump_log_mb
+        self.last_jump = None
+
+    def apply(self, target_mb, segment_changed):
+        """Grow or release blocks towards target_mb (release only in whole blocks)"""
+        if not segment_changed and self.value is not None and abs(target_mb - self.value) >= self.jump_log_mb:
+            self.last_jump = {'time': time.time(), 'from_mb': self.value, 'to_mb': target_mb}
+            print(f"[{datetime.now()}] Memory profile jump: {self.value:.0f} MB -> {target_mb:.0f} MB")
+
+        target = int(target_mb * MB)
+        if self.generator.pool:
+            # Workers follow the absolute target in the background: a tick never
+            # waits for them to settle
+            self.generator.pool.set_total(target)
+            return
+        held = self.generator.get_allocated_bytes()
+        if held < target:
+            self.generator.allocate_memory(target - held, verbose=False)
+        elif held - target >= self.generator.block_size:
+            self.generator.release_memory(held - target)
+
+    def describe(self, target_mb):
+        return f"{target_mb:.0f} MB"
+
+    def get_status(self):
+        status = super().get_status()
+        status.update({
+            'target_mb': self.value,
+            'held_mb': self.generator.get_allocated_bytes() / MB,
+            'last_jump': self.last_jump,
+        })
+        return status
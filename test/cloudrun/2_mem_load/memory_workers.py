@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Multi-process memory load - spreads the allocation across N worker processes
+Each worker owns its share of blocks (its own MemoryLoadGenerator, backend
+and optional working-set churn), so memory fills at multi-core speed and the
+container looks like a multi-worker app (e.g. gunicorn with N workers)
+
+The parent only writes per-worker byte targets into a shared array and reads
+back what each worker holds; lowering a target makes that worker release
+blocks to the OS (graceful shrink)
+"""
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+from memory_load import BLOCK_SIZE, MemoryLoadGenerator
+from working_set import create_working_set_churner
+
+class MemoryControlBlock:
+    """
+    Shared multiprocessing.Array polled by every memory_worker
+
+    Layout (per worker i, stride 3):
+        [3i]   target bytes (-1 = release everything and exit)
+        [3i+1] bytes held, reported by the worker
+        [3i+2] blocks held, reported by the worker
+    """
+    STRIDE = 3
+    TARGET = 0
+    ALLOCATED = 1
+    BLOCKS = 2
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self.array = multiprocessing.Array('d', self.STRIDE * num_workers)
+
+    def set_target(self, worker_index, target_bytes):
+        self.array[self.STRIDE * worker_index + self.TARGET] = target_bytes
+
+    def get_target(self, worker_index):
+        return self.array[self.STRIDE * worker_index + self.TARGET]
+
+    def report(self, worker_index, allocated_bytes, blocks):
+        with self.array.get_lock():
+            self.array[self.STRIDE * worker_index + self.ALLOCATED] = allocated_bytes
+            self.array[self.STRIDE * worker_index + self.BLOCKS] = blocks
+
+    def get_workers(self):
+        """Get a consistent per-worker snapshot"""
+        with self.array.get_lock():
+            values = list(self.array)
+        return [
+            {
+                'target_bytes': int(values[self.STRIDE * i + self.TARGET]),
+                'allocated_bytes': int(values[self.STRIDE * i + self.ALLOCATED]),
+                'blocks': int(values[self.STRIDE * i + self.BLOCKS]),
+            }
+            for i in range(self.num_workers)
+        ]
+
+def memory_worker(control, worker_index, fill_rate=0.0, backend=None, poll_interval=0.05):
+    """
+    Worker process: hold `control` target bytes, grow or release to follow it
+
+    Args:
+        control: Shared MemoryControlBlock
+        worker_index: Slot of this worker in the control block
+        fill_rate: This worker's share of the fill rate in MB/s (0 = unlimited)
+        backend: Allocation backend name (default: MEMORY_BACKEND env)
+        poll_interval: Seconds between target checks once on target
+    """
+    generator = MemoryLoadGenerator(target_percentage=0, fill_rate=fill_rate, backend=backend)
+    churner = create_working_set_churner(generator)
+    if churner:
+        churner.start()
+    print(f"[{datetime.now()}] Memory worker {worker_index + 1} started (PID {os.getpid()}, "
+          f"backend: {generator.backend.name})")
+
+    try:
+        while True:
+            target = control.get_target(worker_index)
+            if target < 0:
+                break
+            held = generator.allocated_bytes
+            if held < target:
+                # One block per pass: progress is reported per block, and a lowered
+                # target takes effect without finishing a large chunk first
+                if generator.allocate_memory(int(min(target - held, generator.block_size)), verbose=False) == 0:
+                    time.sleep(1.0)  # Out of memory: back off instead of spinning
+            elif held - target >= generator.block_size:
+                generator.release_memory(int(held - target))
+            else:
+                time.sleep(poll_interval)
+            control.report(worker_index, generator.allocated_bytes, len(generator.data_blocks))
+    except KeyboardInterrupt:
+        pass
+
+    # Graceful shrink: give everything back before exiting
+    generator.release_memory(generator.allocated_bytes)
+    control.report(worker_index, generator.allocated_bytes, len(generator.data_blocks))
+    print(f"[{datetime.now()}] Memory worker {worker_index + 1} released its blocks and stopped")
+
+class MemoryWorkerPool:
+    def __init__(self, num_workers, fill_rate=0.0, backend=None, settle_timeout=300):
+        """
+        Initialize memory worker pool
+
+        Args:
+            num_workers: Number of worker processes
+            fill_rate: Total fill rate in MB/s, split across workers (0 = unlimited)
+            backend: Allocation backend name for every worker
+            settle_timeout: Max seconds grow/shrink wait for workers to reach their targets
+        """
+        self.num_workers = num_workers
+        self.fill_rate = fill_rate
+        self.backend = backend
+        self.settle_timeout = settle_timeout
+        self.control = MemoryControlBlock(num_workers)
+        self.total_target = 0
+        self.processes = []
+
+    def start(self):
+        """Spawn the worker processes (targets start at 0)"""
+        for i in range(self.num_workers):
+            p = multiprocessing.Process(target=memory_worker,
+                                        args=(self.control, i, self.fill_rate / self.num_workers, self.backend),
+                                        daemon=True)
+            p.start()
+            self.processes.append(p)
+        print(f"[{datetime.now()}] Started {self.num_workers} memory worker process(es)")
+
+    def set_total(self, total_bytes):
+        """Split a total byte target evenly across workers"""
+        self.total_target = max(0, int(total_bytes))
+        share, remainder = divmod(self.total_target, self.num_workers)
+        for i in range(self.num_workers):
+            self.control.set_target(i, share + (1 if i < remainder else 0))
+
+    def stall_timeout(self):
+        """Seconds without progress that count as stalled: 2s, or 3 blocks at the per-worker fill rate"""
+        if not self.fill_rate:
+            return 2.0
+        block_seconds = BLOCK_SIZE / (self.fill_rate / self.num_workers * 1024 * 1024)
+        return max(2.0, 3 * block_seconds)
+
+    def wait(self):
+        """
+        Wait until every live worker is within one block of its target
+
+        Stops early when no worker makes progress for stall_timeout() (e.g. MemoryError)
+        """
+        deadline = time.monotonic() + self.settle_timeout
+        stall_timeout = self.stall_timeout()
+        last_total = None
+        last_progress = time.monotonic()
+        while time.monotonic() < deadline:
+            workers = self.control.get_workers()
+            pending = [w for w, p in zip(workers, self.processes)
+                       if p.is_alive() and abs(w['target_bytes'] - w['allocated_bytes']) >= BLOCK_SIZE]
+            if not pending:
+                return
+            total = self.allocated_bytes()
+            if total != last_total:
+                last_total, last_progress = total, time.monotonic()
+            elif time.monotonic() - last_progress > stall_timeout:
+                print(f"[{datetime.now()}] Warning: {len(pending)} memory worker(s) stalled short of target")
+                return
+            time.sleep(0.05)
+
+    def grow(self, num_bytes):
+        """
+        Hold num_bytes more than now; returns bytes actually added
+
+        The target is absolute (current holdings + num_bytes), so repeated calls
+        while workers are still filling or stalled never stack up past it
+        """
+        before = self.allocated_bytes()
+        self.set_total(before + num_bytes)
+        self.wait()
+        return max(0, self.allocated_bytes() - before)
+
+    def shrink(self, num_bytes):
+        """Hold num_bytes less than now; returns bytes actually released"""
+        before = self.allocated_bytes()
+        self.set_total(before - num_bytes)
+        self.wait()
+        return max(0, before - self.allocated_bytes())
+
+    def allocated_bytes(self):
+        return sum(w['allocated_bytes'] for w in self.control.get_workers())
+
+    def blocks(self):
+        return sum(w['blocks'] for w in self.control.get_workers())
+
+    def get_state(self):
+        """Per-worker targets and holdings for reporting"""
+        workers = self.control.get_workers()
+        for w, p in zip(workers, self.processes):
+            w['pid'] = p.pid
+            w['alive'] = p.is_alive()
+        return workers
+
+    def dead_workers(self):
+        """Indices of worker processes that have exited"""
+        return [i for i, worker in enumerate(self.get_state()) if not worker['alive']]
+
+    def stop(self, timeout=10):
+        """Ask workers to release their blocks and exit, then reap them"""
+        for i in range(self.num_workers):
+            self.control.set_target(i, -1)
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        print(f"[{datetime.now()}] All memory workers stopped")
+
+def create_memory_worker_pool():
+    """
+    Create a worker pool configured from env
+
+    Env variables: MEMORY_WORKERS (default 1), MEMORY_FILL_RATE (total MB/s,
+    split across workers). Workers pick MEMORY_BACKEND and MEMORY_CHURN_* up
+    themselves.
+
+    Returns None when MEMORY_WORKERS is unset or 1 (single-process mode).
+    """
+    num_workers = int(os.getenv('MEMORY_WORKERS', '1'))
+    if num_workers <= 1:
+        return None
+    return MemoryWorkerPool(num_workers, fill_rate=float(os.getenv('MEMORY_FILL_RATE', '0')))
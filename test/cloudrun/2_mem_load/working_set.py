@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Working-set churn engine - keeps MemoryLoadGenerator blocks hot
+Touches a configurable fraction of the allocated pages per second so the
+kernel sees an actively used working set instead of idle, reclaimable
+memory, and reports the achieved access rate and memory bandwidth
+
+Env variables:
+    MEMORY_CHURN_RATE=0.5            fraction of allocated pages touched per second (0 = off)
+    MEMORY_CHURN_PATTERN=random      sequential, random or zipf
+    MEMORY_CHURN_ZIPF_S=1.1          Zipf exponent (higher = smaller hot set)
+    MEMORY_CHURN_ACCESS_BYTES=64     bytes read and written per page access
+"""
+import bisect
+import itertools
+import math
+import mmap
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+PATTERNS = ['sequential', 'random', 'zipf']
+
+class WorkingSetChurner:
+    def __init__(self, generator, rate=0.5, pattern='random', zipf_s=1.1, access_bytes=64,
+                 tick=0.1, report_interval=10):
+        """
+        Initialize working-set churner
+
+        Args:
+            generator: MemoryLoadGenerator whose data_blocks are touched
+            rate: Fraction of allocated pages touched per second
+            pattern: 'sequential', 'random' or 'zipf' page order
+            zipf_s: Zipf exponent for the zipf pattern
+            access_bytes: Bytes read and written back at each touched page
+            tick: Seconds between batches (pages due are spread over ticks)
+            report_interval: Seconds between progress log lines
+        """
+        if pattern not in PATTERNS:
+            raise ValueError(f"Unknown MEMORY_CHURN_PATTERN '{pattern}'. Must be one of: {', '.join(PATTERNS)}")
+        self.generator = generator
+        self.rate = rate
+        self.pattern = pattern
+        self.zipf_s = zipf_s
+        self.access_bytes = max(1, min(access_bytes, mmap.PAGESIZE))
+        self.tick = tick
+        self.report_interval = report_interval
+
+        self.random = random.Random(1)
+        self.cursor = 0
+        self.scatter = 1
+        self.scatter_pages = None
+        self.pages_touched = 0
+        self.pages_per_second = 0.0
+        self.requested_pages_per_second = 0.0
+        self.running = False
+
+    def page_index(self, total_pages):
+        """Next global page index for the configured pattern"""
+        if self.pattern == 'sequential':
+            self.cursor = (self.cursor + 1) % total_pages
+            return self.cursor
+
+        if self.pattern == 'random':
+            return self.random.randrange(total_pages)
+
+        # Zipf rank via the inverse CDF of the continuous approximation, then
+        # scattered over the pages with a multiplicative hash so the hot set
+        # is not one contiguous range
+        u = self.random.random()
+        if abs(self.zipf_s - 1.0) < 1e-9:
+            rank = int(total_pages ** u) - 1
+        else:
+            a = 1.0 - self.zipf_s
+            rank = int(((total_pages ** a - 1.0) * u + 1.0) ** (1.0 / a)) - 1
+        return (min(max(rank, 0), total_pages - 1) * self.scatter) % total_pages
+
+    def set_scatter(self, total_pages):
+        """Pick a multiplier coprime with total_pages (bijective rank -> page map)"""
+        scatter = 2654435761
+        while math.gcd(scatter, total_pages) != 1:
+            scatter += 2
+        self.scatter = scatter
+        self.scatter_pages = total_pages
+
+    def touch(self, pages):
+        """
+        Touch `pages` pages of the current blocks
+
+        Returns:
+            Pages actually touched (blocks released mid-batch are skipped)
+        """
+        blocks = list(self.generator.data_blocks)
+        if not blocks:
+            return 0
+        page = mmap.PAGESIZE
+        # Blocks may differ in size (short tail allocations), so map global page
+        # indexes to blocks through the running page count at the end of each block
+        block_ends = list(itertools.accumulate(max(1, -(-len(block) // page)) for block in blocks))
+        total_pages = block_ends[-1]
+        if self.pattern == 'zipf' and self.scatter_pages != total_pages:
+            self.set_scatter(total_pages)
+
+        n = self.access_bytes
+        touched = 0
+        for _ in range(pages):
+            global_page = self.page_index(total_pages)
+            block_index = bisect.bisect_right(block_ends, global_page)
+            block = blocks[block_index]
+            offset = (global_page - (block_ends[block_index - 1] if block_index else 0)) * page
+            try:
+                # Read-modify-write so the page is both referenced and dirtied
+                block[offset:offset + n] = block[offset:offset + n]
+            except ValueError:
+                continue  # Block released by the controller (mmap closed)
+            touched += 1
+        return touched
+
+    def get_stats(self):
+        """Get churn state for reporting"""
+        return {
+            'pattern': self.pattern,
+            'rate': self.rate,
+            'pages_touched': self.pages_touched,
+            'requested_pages_per_second': self.requested_pages_per_second,
+            'pages_per_second': self.pages_per_second,
+            # Read + write of access_bytes per touched page
+            'bandwidth_bytes_per_second': self.pages_per_second * self.access_bytes * 2,
+            'coverage_bytes_per_second': self.pages_per_second * mmap.PAGESIZE,
+        }
+
+    def run(self):
+        """Churn loop: touch the pages due each tick, measure achieved rate"""
+        self.running = True
+        print(f"[{datetime.now()}] Working-set churn started: {self.rate*100:.0f}% of pages/s, "
+              f"pattern={self.pattern}{f' (s={self.zipf_s})' if self.pattern == 'zipf' else ''}, "
+              f"{self.access_bytes} B per access")
+
+        window_start = time.monotonic()
+        window_pages = 0
+        last_report = window_start
+        next_tick = window_start
+        carry = 0.0
+        while self.running:
+            next_tick += self.tick
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+            total_pages = self.generator.allocated_bytes // mmap.PAGESIZE
+            self.requested_pages_per_second = total_pages * self.rate
+            carry += self.requested_pages_per_second * self.tick
+            due = int(carry)
+            carry -= due
+            try:
+                touched = self.touch(due)
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: working-set churn failed: {e}")
+                touched = 0
+            self.pages_touched += touched
+            window_pages += touched
+
+            now = time.monotonic()
+            if now - next_tick > self.tick:
+                next_tick = now  # Cannot keep up: report the shortfall, do not burst
+            if now - window_start >= 1.0:
+                self.pages_per_second = window_pages / (now - window_start)
+                window_start, window_pages = now, 0
+
+            if now - last_report >= self.report_interval:
+                last_report = now
+                stats = self.get_stats()
+                print(f"[{datetime.now()}] Churn | {stats['pages_per_second']:.0f} / "
+                      f"{stats['requested_pages_per_second']:.0f} pages/s | "
+                      f"Bandwidth: {stats['bandwidth_bytes_per_second'] / (1024**2):.1f} MB/s | "
+                      f"Coverage: {stats['coverage_bytes_per_second'] / (1024**2):.0f} MB/s")
+
+    def start(self):
+        """Run the churn loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop the churn loop"""
+        self.running = False
+
+def create_working_set_churner(generator):
+    """
+    Create a churner for a generator, configured from env
+
+    Returns None when MEMORY_CHURN_RATE is unset or 0 (churn disabled).
+    """
+    rate = float(os.getenv('MEMORY_CHURN_RATE', '0'))
+    if rate <= 0:
+        return None
+    return WorkingSetChurner(
+        generator,
+        rate=rate,
+        pattern=os.getenv('MEMORY_CHURN_PATTERN', 'random').lower(),
+        zipf_s=float(os.getenv('MEMORY_CHURN_ZIPF_S', '1.1')),
+        access_bytes=int(os.getenv('MEMORY_CHURN_ACCESS_BYTES', '64')),
+    )
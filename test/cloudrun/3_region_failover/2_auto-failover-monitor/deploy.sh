@@ -20,6 +20,7 @@ if [ ! -f env.yaml ]; then
   exit 1
 fi
 
+# Always-on CPU and a single instance: the background monitor loop runs outside requests
 echo "Deploying to Cloud Run with minimum instances (no cold start)..."
 gcloud run deploy ${SERVICE_NAME} \
   --image=${IMAGE_NAME} \
@@ -30,7 +31,8 @@ gcloud run deploy ${SERVICE_NAME} \
   --memory=768Mi \
   --cpu=1 \
   --min-instances=1 \
-  --max-instances=2 \
+  --max-instances=1 \
+  --no-cpu-throttling \
   --env-vars-file=env.yaml
 
 # Grant Load Balancer Admin role to default compute service account
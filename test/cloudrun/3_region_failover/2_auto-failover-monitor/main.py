@@ -1,17 +1,25 @@
 """
 Auto-Failover Monitor - Cloud Run Service
-Monitors primary/secondary Cloud Run health and automatically updates multiple backend services
+Monitors Cloud Run health (control-plane readiness plus optional active HTTP probes) across an
+ordered list of regions and rebalances multiple backend services to every healthy region with
+weighted capacity_scaler
 Fully configurable via environment variables for reusability across different systems
 """
 
 import os
 import requests
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from flask import Flask, jsonify
-from google.cloud import compute_v1
-from google.cloud import run_v2
 import json
 
+# google.cloud.compute_v1 / run_v2 are imported inside the functions that use
+# them: their protobuf/gRPC stacks are slow to import, and doing it at module
+# load delays gunicorn binding the port on every cold start
+
 # ==================== CONFIGURATION FROM ENV VARS ====================
 # Core Settings
 PROJECT_ID = os.environ.get('PROJECT_ID', 'my-project-1101-476915')
@@ -21,10 +29,40 @@ SECONDARY_REGION = os.environ.get('SECONDARY_REGION', 'asia-northeast2')
 CLOUD_RUN_URL_WITH_KNOWN_HASH = os.environ.get('CLOUD_RUN_URL_WITH_KNOWN_HASH', 'zocpikyq2a')
 
 # Backend Services Configuration (JSON format)
-# Format: {"backend-service-name": {"primary_neg": "neg-name", "secondary_neg": "neg-name"}}
+# Format: {"backend-service-name": {"regions": [{"region": "...", "neg": "neg-name", "weight": 1}, ...]}}
+# Legacy: {"backend-service-name": {"primary_neg": "neg-name", "secondary_neg": "neg-name"}}
 # Example: {"global-backend-service": {"primary_neg": "tokyo-serverless-neg", "secondary_neg": "osaka-serverless-neg"}}
 BACKEND_CONFIG_JSON = os.environ.get('BACKEND_CONFIG_JSON', '')
 
+# Concurrency: every health check and backend read of a tick runs in parallel;
+# reads not finished within TICK_DEADLINE seconds are reported as timed out
+MONITOR_WORKERS = int(os.environ.get('MONITOR_WORKERS', '32'))
+# Backend updates can block for minutes on their operation, so they get their own
+# UPDATE_WORKERS threads and never hold up health checks, reads or probes
+UPDATE_WORKERS = int(os.environ.get('UPDATE_WORKERS', '4'))
+TICK_DEADLINE = float(os.environ.get('TICK_DEADLINE', '4'))
+
+# Background monitoring: evaluate every MONITOR_INTERVAL seconds (0 = only on GET /monitor).
+# A region flips state after FAILURE_THRESHOLD consecutive failed (RECOVERY_THRESHOLD
+# successful) checks, and a backend service is updated at most once per SWITCH_COOLDOWN
+MONITOR_INTERVAL = float(os.environ.get('MONITOR_INTERVAL', '5'))
+FAILURE_THRESHOLD = int(os.environ.get('FAILURE_THRESHOLD', '3'))
+RECOVERY_THRESHOLD = int(os.environ.get('RECOVERY_THRESHOLD', '3'))
+SWITCH_COOLDOWN = float(os.environ.get('SWITCH_COOLDOWN', '60'))
+
+# Data-plane probing: GET each region's serving URL + PROBE_PATH every PROBE_INTERVAL
+# seconds (0 = disabled). Error rate and p95 latency over PROBE_WINDOW seconds give a
+# health score (0-1); a Ready region scoring below HEALTH_SCORE_THRESHOLD counts as failed
+PROBE_INTERVAL = float(os.environ.get('PROBE_INTERVAL', '0'))
+PROBE_PATH = os.environ.get('PROBE_PATH', '/')
+PROBE_TIMEOUT = float(os.environ.get('PROBE_TIMEOUT', '2'))
+PROBE_WINDOW = float(os.environ.get('PROBE_WINDOW', '60'))
+PROBE_MIN_SAMPLES = int(os.environ.get('PROBE_MIN_SAMPLES', '5'))
+PROBE_MAX_ERROR_RATE = float(os.environ.get('PROBE_MAX_ERROR_RATE', '0.5'))
+PROBE_LATENCY_TARGET_MS = float(os.environ.get('PROBE_LATENCY_TARGET_MS', '500'))
+PROBE_LATENCY_MAX_MS = float(os.environ.get('PROBE_LATENCY_MAX_MS', '2000'))
+HEALTH_SCORE_THRESHOLD = float(os.environ.get('HEALTH_SCORE_THRESHOLD', '0.5'))
+
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,180 +88,952 @@ def parse_backend_config():
         logger.error(f"Failed to parse BACKEND_CONFIG_JSON: {e}")
         raise ValueError(f"Invalid BACKEND_CONFIG_JSON format: {e}")
 
-# Build full NEG URLs and Cloud Run service URLs from configuration
+def neg_url(region, neg_name):
+    """Full NEG URL from a short NEG name"""
+    return f'https://www.googleapis.com/compute/v1/projects/{PROJECT_ID}/regions/{region}/networkEndpointGroups/{neg_name}'
+
+def service_name_from_neg(neg_name):
+    """Convert NEG name to Cloud Run service name (pattern: alb1-main-tokyo-neg -> app1-main-tokyo)"""
+    return neg_name.replace("-neg", "").replace("alb", "app")
+
+def parse_regions(backend_name, negs):
+    """
+    Ordered region list for one backend service (first = most preferred)
+
+    Accepts {"regions": [{"region", "neg", "service"?, "weight"?, "name"?, "url"?}, ...]}
+    or the legacy {"primary_neg", "secondary_neg"} pair, which maps to
+    PRIMARY_REGION (weight 1) and SECONDARY_REGION (weight 0, standby)
+    """
+    if 'regions' in negs:
+        specs = negs['regions']
+    else:
+        specs = [
+            {'name': 'primary', 'region': PRIMARY_REGION, 'neg': negs['primary_neg'],
+             'weight': negs.get('primary_weight', 1.0), 'url': os.environ.get('PRIMARY_URL')},
+            {'name': 'secondary', 'region': SECONDARY_REGION, 'neg': negs['secondary_neg'],
+             'weight': negs.get('secondary_weight', 0.0), 'url': os.environ.get('SECONDARY_URL')},
+        ]
+
+    regions = []
+    for spec in specs:
+        for key in ['region', 'neg']:
+            if key not in spec:
+                raise ValueError(f"Backend '{backend_name}': region entry requires '{key}'")
+        weight = float(spec.get('weight', 1.0))
+        if weight < 0:
+            raise ValueError(f"Backend '{backend_name}': weight must be >= 0")
+        regions.append({
+            'name': spec.get('name', spec['region']),
+            'region': spec['region'],
+            'neg': neg_url(spec['region'], spec['neg']),
+            'service': spec.get('service') or service_name_from_neg(spec['neg']),
+            'weight': weight,
+            # Serving URL for data-plane probes (default: the Cloud Run service URI)
+            'url': spec.get('url'),
+        })
+
+    if not regions:
+        raise ValueError(f"Backend '{backend_name}': at least one region is required")
+    names = [r['name'] for r in regions]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Backend '{backend_name}': duplicate region names {names}")
+    return regions
+
+# Build full NEG URLs and Cloud Run service names from configuration
 RAW_BACKEND_CONFIGS = parse_backend_config()
 BACKEND_CONFIGS = {}
 BACKEND_SERVICES = []
 
 for backend_name, negs in RAW_BACKEND_CONFIGS.items():
-    # Extract Cloud Run service name from NEG name (e.g., "alb1-main-tokyo-neg" -> "app1-main-tokyo")
-    primary_neg_name = negs["primary_neg"]
-    secondary_neg_name = negs["secondary_neg"]
-    
-    # Convert NEG name to Cloud Run service name
-    # Pattern: alb1-main-tokyo-neg -> app1-main-tokyo
-    primary_service_name = primary_neg_name.replace("-neg", "").replace("alb", "app")
-    secondary_service_name = secondary_neg_name.replace("-neg", "").replace("alb", "app")
-    
-    BACKEND_CONFIGS[backend_name] = {
-        'primary_neg': f'https://www.googleapis.com/compute/v1/projects/{PROJECT_ID}/regions/{PRIMARY_REGION}/networkEndpointGroups/{negs["primary_neg"]}',
-        'secondary_neg': f'https://www.googleapis.com/compute/v1/projects/{PROJECT_ID}/regions/{SECONDARY_REGION}/networkEndpointGroups/{negs["secondary_neg"]}',
-        'primary_service': primary_service_name,
-        'secondary_service': secondary_service_name
-    }
+    BACKEND_CONFIGS[backend_name] = {'regions': parse_regions(backend_name, negs)}
     BACKEND_SERVICES.append(backend_name)
 
+# Every configured region, in first-seen preference order
+REGIONS = []
+for config in BACKEND_CONFIGS.values():
+    for r in config['regions']:
+        if r['region'] not in REGIONS:
+            REGIONS.append(r['region'])
+
+# Cloud Load Balancing accepts a capacity_scaler of 0 or 0.1-1.0
+MIN_CAPACITY_SCALER = 0.1
+
 logger.info(f"Configured backend services: {', '.join(BACKEND_SERVICES)}")
-logger.info(f"Primary region: {PRIMARY_REGION}, Secondary region: {SECONDARY_REGION}")
+logger.info(f"Regions (preference order): {', '.join(REGIONS)}")
+
+# ==================== API CLIENTS ====================
+class ClientRegistry:
+    """
+    Process-wide API clients, created once on first use and shared by all threads
+
+    gRPC channels do not survive fork(), so the registry is emptied in the child
+    after a fork (gunicorn --preload, multiprocessing; see reset_after_fork) and
+    clients are rebuilt there
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.created = 0
+        self.pid = os.getpid()
+
+    def get(self, name, factory):
+        if self.pid != os.getpid():
+            self.reset()
+        client = self.clients.get(name)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(name)
+                if client is None:
+                    client = call_api(f'{name}.client_init', factory)
+                    self.clients[name] = client
+                    self.created += 1
+                    logger.info(f"Created {name} API client (pid {os.getpid()})")
+        return client
 
-def check_service_health(service_name, region):
-    """Check if a specific Cloud Run service exists and is ready using Cloud Run API"""
+    def reset(self):
+        self.lock = threading.Lock()
+        self.clients = {}
+        self.pid = os.getpid()
+
+class ApiStats:
+    """Call count, errors and latency percentiles per API method over a sliding window"""
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.calls = {}
+        self.errors = {}
+
+    def record(self, name, seconds, error=False):
+        with self.lock:
+            if name not in self.latencies:
+                self.latencies[name] = deque(maxlen=self.window)
+                self.calls[name] = 0
+                self.errors[name] = 0
+            self.latencies[name].append(seconds)
+            self.calls[name] += 1
+            if error:
+                self.errors[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            stats = {}
+            for name, window in self.latencies.items():
+                values = sorted(window)
+                stats[name] = {
+                    'calls': self.calls[name],
+                    'errors': self.errors[name],
+                    'avg_ms': round(sum(values) / len(values) * 1000, 1),
+                    'p50_ms': round(values[len(values) // 2] * 1000, 1),
+                    'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+                    'max_ms': round(values[-1] * 1000, 1),
+                }
+            return stats
+
+clients = ClientRegistry()
+api_stats = ApiStats()
+
+def call_api(method, fn, /, *args, **kwargs):
+    """Call an API method, recording its latency (and failure) under method"""
+    started = time.monotonic()
+    error = True
+    try:
+        result = fn(*args, **kwargs)
+        error = False
+        return result
+    finally:
+        api_stats.record(method, time.monotonic() - started, error)
+
+def new_run_client():
+    from google.cloud import run_v2
+    return run_v2.ServicesClient()
+
+def new_compute_client():
+    from google.cloud import compute_v1
+    client = compute_v1.BackendServicesClient()
+    # REST transport: size the keep-alive pool for MONITOR_WORKERS concurrent calls
+    # (requests defaults to 10, extra connections would be closed and re-handshaked)
+    session = getattr(getattr(client, '_transport', None), '_session', None)
+    if session is not None:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MONITOR_WORKERS)
+        session.mount('https://', adapter)
+    return client
+
+def new_http_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=MONITOR_WORKERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def run_client():
+    """Shared Cloud Run Admin API client (one gRPC channel, multiplexed across threads)"""
+    return clients.get('run', new_run_client)
+
+def compute_client():
+    """Shared Compute API client for backend services"""
+    return clients.get('compute', new_compute_client)
+
+def http_session():
+    """Shared keep-alive session for data-plane probes"""
+    return clients.get('http', new_http_session)
+
+def list_region_services(region):
+    """
+    Read every Cloud Run service of one region with a single (paged) list_services call
+
+    Returns:
+        {service_name: Service}, or None if the region could not be listed
+    """
     try:
         # Use Cloud Run API to check service status
         # This works even when services are restricted to ALB-only access
-        client = run_v2.ServicesClient()
-        
-        # Construct service path: projects/{project}/locations/{location}/services/{service}
-        service_path = f"projects/{PROJECT_ID}/locations/{region}/services/{service_name}"
-        
-        logger.info(f"Checking service status via API: {service_path}")
-        
-        try:
-            service = client.get_service(name=service_path)
-            
-            # Check if service exists
-            if not service:
-                logger.warning(f"Service {service_name} not found in {region}")
-                return False
-            
-            # Primary method: check terminal_condition (Cloud Run v2 API standard)
-            if hasattr(service, 'terminal_condition') and service.terminal_condition:
-                condition = service.terminal_condition
-                logger.info(f"Terminal condition - type: {condition.type_}, state: {condition.state}, message: {condition.message if hasattr(condition, 'message') else ''}")
-                
-                # Check if Ready and state is CONDITION_SUCCEEDED
-                if condition.type_ == 'Ready' and condition.state == run_v2.Condition.State.CONDITION_SUCCEEDED:
-                    logger.info(f"Service {service_name} in {region} is READY (terminal_condition)")
+        client = run_client()
+        parent = f"projects/{PROJECT_ID}/locations/{region}"
+        logger.info(f"Listing services via API: {parent}")
+        services = call_api('run.list_services', lambda: list(client.list_services(parent=parent)))
+        return {service.name.split('/')[-1]: service for service in services}
+    except Exception as e:
+        logger.error(f"Failed to list services in {region}: {e}")
+        return None
+
+def check_service_health(service_name, region, services):
+    """Check if a specific Cloud Run service exists and is ready, from its region's service list"""
+    from google.cloud import run_v2
+
+    if services is None:
+        # Region could not be listed (API error)
+        logger.error(f"Service {service_name} in {region}: region listing failed")
+        return False
+
+    service = services.get(service_name)
+
+    # Check if service exists
+    if not service:
+        logger.warning(f"Service {service_name} not found in {region}")
+        return False
+
+    # Primary method: check terminal_condition (Cloud Run v2 API standard)
+    if hasattr(service, 'terminal_condition') and service.terminal_condition:
+        condition = service.terminal_condition
+        logger.info(f"Terminal condition - type: {condition.type_}, state: {condition.state}, message: {condition.message if hasattr(condition, 'message') else ''}")
+
+        # Check if Ready and state is CONDITION_SUCCEEDED
+        if condition.type_ == 'Ready' and condition.state == run_v2.Condition.State.CONDITION_SUCCEEDED:
+            logger.info(f"Service {service_name} in {region} is READY (terminal_condition)")
+            return True
+        else:
+            logger.warning(f"Service {service_name} in {region} terminal_condition NOT READY - state: {condition.state}")
+            return False
+
+    # Fallback: check conditions list for Ready condition
+    if hasattr(service, 'conditions') and service.conditions:
+        for condition in service.conditions:
+            if condition.type_ == 'Ready':
+                logger.info(f"Conditions - type: {condition.type_}, state: {condition.state}")
+                if condition.state == run_v2.Condition.State.CONDITION_SUCCEEDED:
+                    logger.info(f"Service {service_name} in {region} is READY (conditions)")
                     return True
                 else:
-                    logger.warning(f"Service {service_name} in {region} terminal_condition NOT READY - state: {condition.state}")
+                    logger.warning(f"Service {service_name} in {region} NOT READY via conditions - state: {condition.state}")
                     return False
-            
-            # Fallback: check conditions list for Ready condition
-            if hasattr(service, 'conditions') and service.conditions:
-                for condition in service.conditions:
-                    if condition.type_ == 'Ready':
-                        logger.info(f"Conditions - type: {condition.type_}, state: {condition.state}")
-                        if condition.state == run_v2.Condition.State.CONDITION_SUCCEEDED:
-                            logger.info(f"Service {service_name} in {region} is READY (conditions)")
-                            return True
-                        else:
-                            logger.warning(f"Service {service_name} in {region} NOT READY via conditions - state: {condition.state}")
-                            return False
-            
-            # Last resort: check if service URI exists
-            if hasattr(service, 'uri') and service.uri:
-                logger.info(f"Service {service_name} in {region} has URI (assuming healthy): {service.uri}")
-                return True
-            
-            logger.warning(f"Service {service_name} in {region} exists but status unclear")
-            return False
-            
-        except Exception as api_error:
-            # Service not found or API error
-            logger.error(f"Service {service_name} not found or error in {region}: {api_error}")
-            return False
-        
-    except Exception as e:
-        logger.error(f"Failed to check service {service_name} in {region}: {e}")
-        return False
 
-def get_current_backends(backend_service_name):
-    """Get current backend configuration for a specific backend service"""
+    # Last resort: check if service URI exists
+    if hasattr(service, 'uri') and service.uri:
+        logger.info(f"Service {service_name} in {region} has URI (assuming healthy): {service.uri}")
+        return True
+
+    logger.warning(f"Service {service_name} in {region} exists but status unclear")
+    return False
+
+def same_group(group, neg):
+    """Compare NEG references regardless of the compute API URL prefix"""
+    return group.split('/projects/')[-1] == neg.split('/projects/')[-1]
+
+def get_backend_service(backend_service_name):
+    """Read a backend service resource; None if it could not be read"""
     try:
-        client = compute_v1.BackendServicesClient()
-        backend_service = client.get(
+        client = compute_client()
+        return call_api(
+            'compute.get',
+            client.get,
             project=PROJECT_ID,
             backend_service=backend_service_name
         )
-        
-        if not backend_service.backends:
-            logger.warning(f"[{backend_service_name}] No backends found!")
-            return 'unknown'
-        
-        # Check which backend exists (assumes only 1 backend per service after failover)
-        for backend in backend_service.backends:
-            if PRIMARY_REGION in backend.group:
-                logger.info(f"[{backend_service_name}] Primary region ({PRIMARY_REGION}) backend active (capacityScaler: {backend.capacity_scaler})")
-                return 'primary'
-            elif SECONDARY_REGION in backend.group:
-                logger.info(f"[{backend_service_name}] Secondary region ({SECONDARY_REGION}) backend active (capacityScaler: {backend.capacity_scaler})")
-                return 'secondary'
-        
-        return 'unknown'
-            
     except Exception as e:
         logger.error(f"[{backend_service_name}] Failed to get backends: {e}")
-        return 'unknown'
+        return None
+
+def get_current_backends(backend_service_name, backend_service):
+    """
+    Get current backend configuration for a specific backend service
+
+    Returns:
+        {region_name: capacity_scaler} for every configured region carrying
+        traffic, or None if the backend service could not be read
+    """
+    if backend_service is None:
+        return None
+
+    if not backend_service.backends:
+        logger.warning(f"[{backend_service_name}] No backends found!")
+        return {}
+
+    regions = BACKEND_CONFIGS[backend_service_name]['regions']
+    current = {}
+    for backend in backend_service.backends:
+        region = next((r for r in regions if same_group(backend.group, r['neg'])), None)
+        if region is None:
+            logger.warning(f"[{backend_service_name}] Backend {backend.group} is not in the configuration")
+        elif backend.capacity_scaler > 0:
+            current[region['name']] = round(backend.capacity_scaler, 2)
+    logger.info(f"[{backend_service_name}] Active backends: {format_scalers(current)}")
+    return current
+
+def plan_backends(regions, health):
+    """
+    Weighted capacity_scaler for every healthy region
+
+    Healthy regions with weight > 0 share traffic in proportion to their
+    weight (the heaviest gets 1.0). Weight 0 marks a standby region: the
+    first healthy one takes full traffic only when no weighted region is
+    healthy. Returns {} when every region is unhealthy.
+    """
+    healthy = [r for r in regions if health.get(r['name'])]
+    active = [r for r in healthy if r['weight'] > 0]
+    if not active:
+        return {healthy[0]['name']: 1.0} if healthy else {}
+    top = max(r['weight'] for r in active)
+    return {r['name']: round(max(MIN_CAPACITY_SCALER, r['weight'] / top), 2) for r in active}
 
-def switch_to_region(backend_service_name, region):
-    """Switch backend to specified region by REMOVING the unhealthy backend"""
+def format_scalers(scalers):
+    return ', '.join(f"{name}={scaler:.2f}" for name, scaler in scalers.items()) or 'none'
+
+def update_backends(backend_service_name, scalers, backend_service=None):
+    """
+    Set the backend list to exactly the regions in scalers, with their capacity_scaler
+
+    backend_service is the resource already read this tick (re-read if None).
+    Its fingerprint makes the update fail instead of overwriting a change made
+    since that read.
+    """
     try:
-        # Get NEG URLs for this backend service
         if backend_service_name not in BACKEND_CONFIGS:
             logger.error(f"[{backend_service_name}] Backend config not found")
             return False
-        
-        config = BACKEND_CONFIGS[backend_service_name]
-        
-        client = compute_v1.BackendServicesClient()
-        
+
+        regions = BACKEND_CONFIGS[backend_service_name]['regions']
+
+        from google.cloud import compute_v1
+        client = compute_client()
+
         # Get current backend service
-        backend_service = client.get(
-            project=PROJECT_ID,
-            backend_service=backend_service_name
-        )
-        
-        # Create backend for the healthy region only
-        if region == 'primary':
-            logger.info(f"[{backend_service_name}] Keeping ONLY primary region ({PRIMARY_REGION}), removing secondary")
-            backend = compute_v1.Backend(
-                group=config['primary_neg'],
-                balancing_mode='UTILIZATION',
-                capacity_scaler=1.0
-            )
-        elif region == 'secondary':
-            logger.info(f"[{backend_service_name}] Keeping ONLY secondary region ({SECONDARY_REGION}), removing primary")
-            backend = compute_v1.Backend(
-                group=config['secondary_neg'],
-                balancing_mode='UTILIZATION',
-                capacity_scaler=1.0
+        if backend_service is None:
+            backend_service = call_api(
+                'compute.get',
+                client.get,
+                project=PROJECT_ID,
+                backend_service=backend_service_name
             )
-        else:
-            logger.error(f"[{backend_service_name}] Invalid region: {region}")
-            return False
-        
-        # Update backends with only the healthy region
-        backend_service.backends = [backend]
-        
+
+        # Keep existing backend entries (and their other settings) where possible
+        backends = []
+        for region in regions:
+            if region['name'] not in scalers:
+                continue
+            backend = next((b for b in backend_service.backends if same_group(b.group, region['neg'])), None)
+            if backend is None:
+                backend = compute_v1.Backend(group=region['neg'], balancing_mode='UTILIZATION')
+            backend.capacity_scaler = scalers[region['name']]
+            backends.append(backend)
+
+        logger.info(f"[{backend_service_name}] Updating backends: {format_scalers(scalers)}")
+        backend_service.backends = backends
+
         # Update backend service
-        operation = client.update(
+        operation = call_api(
+            'compute.update',
+            client.update,
             project=PROJECT_ID,
             backend_service=backend_service_name,
             backend_service_resource=backend_service
         )
-        
+
         # Wait for operation to complete
         logger.info(f"[{backend_service_name}] Waiting for backend update operation to complete...")
-        operation.result(timeout=300)
-        
-        logger.info(f"[{backend_service_name}] Successfully switched to {region} region (removed other backend)")
+        call_api('compute.operation_wait', operation.result, timeout=300)
+
+        logger.info(f"[{backend_service_name}] Successfully updated backends")
         return True
-        
+
     except Exception as e:
-        logger.error(f"[{backend_service_name}] Failed to switch to {region}: {e}")
+        logger.error(f"[{backend_service_name}] Failed to update backends: {e}")
         return False
 
+# Separate pools: tick reads, data-plane probes and backend updates cannot starve each other
+executor = ThreadPoolExecutor(max_workers=MONITOR_WORKERS, thread_name_prefix='monitor')
+probe_executor = ThreadPoolExecutor(max_workers=MONITOR_WORKERS, thread_name_prefix='probe')
+update_executor = ThreadPoolExecutor(max_workers=UPDATE_WORKERS, thread_name_prefix='update')
+
+# Backend updates in flight, so overlapping ticks never update the same backend twice
+pending_updates = {}
+pending_updates_lock = threading.Lock()
+
+def reset_after_fork():
+    """Worker threads, locks and gRPC channels are not inherited by a forked child"""
+    global executor, probe_executor, update_executor, pending_updates, pending_updates_lock, tick_lock
+    executor = ThreadPoolExecutor(max_workers=MONITOR_WORKERS, thread_name_prefix='monitor')
+    probe_executor = ThreadPoolExecutor(max_workers=MONITOR_WORKERS, thread_name_prefix='probe')
+    update_executor = ThreadPoolExecutor(max_workers=UPDATE_WORKERS, thread_name_prefix='update')
+    pending_updates = {}
+    pending_updates_lock = threading.Lock()
+    tick_lock = threading.Lock()
+    clients.reset()
+    if monitor_loop is not None:
+        start_monitor_loop()
+    if prober is not None:
+        start_data_plane_prober()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+class DataPlaneProber:
+    def __init__(self, interval, timeout, window):
+        """
+        Initialize data-plane prober
+
+        Probes run concurrently on their own executor, independent of monitor
+        ticks; ticks read the latest window statistics.
+
+        Args:
+            interval: Seconds between probe rounds
+            timeout: Per-request timeout (a timeout counts as an error)
+            window: Seconds of samples kept per URL
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.lock = threading.Lock()
+        self.targets = set()
+        self.samples = {}
+        self.last_status = {}
+        self.running = False
+        self.rounds = 0
+
+    def add_target(self, url):
+        with self.lock:
+            self.targets.add(url)
+
+    def probe(self, url):
+        """One GET; 5xx responses, timeouts and connection errors count as errors"""
+        started = time.monotonic()
+        try:
+            response = http_session().get(url, timeout=self.timeout, allow_redirects=False)
+            ok = response.status_code < 500
+            status = response.status_code
+        except requests.RequestException as e:
+            ok = False
+            status = type(e).__name__
+        self.record(url, time.monotonic() - started, ok, status)
+
+    def record(self, url, seconds, ok, status):
+        now = time.monotonic()
+        with self.lock:
+            samples = self.samples.setdefault(url, deque())
+            samples.append((now, seconds, ok))
+            while samples and samples[0][0] < now - self.window:
+                samples.popleft()
+            self.last_status[url] = status
+
+    def get_stats(self, url):
+        """Latency percentiles and error rate over the window; None before the first sample"""
+        with self.lock:
+            samples = list(self.samples.get(url, ()))
+            last_status = self.last_status.get(url)
+        if not samples:
+            return None
+        latencies = sorted(s[1] for s in samples)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            'url': url,
+            'samples': len(samples),
+            'error_rate': round(sum(1 for s in samples if not s[2]) / len(samples), 3),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'last_status': last_status,
+        }
+
+    def run(self):
+        """Probe round loop on absolute deadlines"""
+        self.running = True
+        next_round = time.monotonic()
+        logger.info(f"Data-plane prober started: every {self.interval:.1f}s, timeout {self.timeout:.1f}s, "
+                    f"window {self.window:.0f}s")
+
+        while self.running:
+            with self.lock:
+                targets = list(self.targets)
+            futures = [probe_executor.submit(self.probe, url) for url in targets]
+            wait(futures, timeout=self.timeout + 1)
+            self.rounds += 1
+
+            next_round += self.interval
+            delay = next_round - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_round = time.monotonic()
+
+    def get_status(self):
+        with self.lock:
+            targets = sorted(self.targets)
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'rounds': self.rounds,
+            'targets': {url: self.get_stats(url) for url in targets},
+        }
+
+    def start(self):
+        """Run the prober in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True, name='data-plane-prober')
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+prober = None
+
+def start_data_plane_prober():
+    """Start data-plane probing in this process (PROBE_INTERVAL > 0)"""
+    global prober
+    if PROBE_INTERVAL > 0:
+        prober = DataPlaneProber(PROBE_INTERVAL, PROBE_TIMEOUT, PROBE_WINDOW)
+        prober.start()
+    return prober
+
+def probe_url(region, services):
+    """Serving URL + PROBE_PATH: configured url, else the Cloud Run service URI"""
+    base = region['url']
+    if not base and services and region['service'] in services:
+        base = services[region['service']].uri
+    return base.rstrip('/') + PROBE_PATH if base else None
+
+def health_score(ready, data_plane):
+    """
+    Combined health in [0, 1]
+
+    0 when the control plane is not Ready; otherwise the weaker of the
+    error-rate score (1 at no errors, 0 at PROBE_MAX_ERROR_RATE) and the p95
+    latency score (1 up to PROBE_LATENCY_TARGET_MS, 0 at PROBE_LATENCY_MAX_MS).
+    1 while there are fewer than PROBE_MIN_SAMPLES probe samples.
+    """
+    if not ready:
+        return 0.0
+    if data_plane is None or data_plane['samples'] < PROBE_MIN_SAMPLES:
+        return 1.0
+    error_score = 1 - data_plane['error_rate'] / max(PROBE_MAX_ERROR_RATE, 0.001)
+    latency_score = ((PROBE_LATENCY_MAX_MS - data_plane['p95_ms'])
+                     / max(PROBE_LATENCY_MAX_MS - PROBE_LATENCY_TARGET_MS, 1.0))
+    return round(min(1.0, max(0.0, min(error_score, latency_score))), 2)
+
+class TickSnapshot:
+    """
+    Memoized reads of one tick: each distinct resource (a region's service
+    list, a backend service) is fetched exactly once however many backend
+    services refer to it, and all fetches run concurrently on the executor
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures = {}
+
+    def fetch(self, key, fn, *args):
+        with self.lock:
+            if key not in self.futures:
+                self.futures[key] = executor.submit(fn, *args)
+            return self.futures[key]
+
+    def wait(self, deadline):
+        """Wait for all fetches until the deadline; returns how many did not finish"""
+        done, not_done = wait(self.futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+        for future in not_done:
+            future.cancel()
+        return len(not_done)
+
+    def ready(self, key):
+        future = self.futures.get(key)
+        return future is not None and future.done() and not future.cancelled()
+
+    def value(self, key):
+        return self.futures[key].result()
+
+def collect(backend_services, deadline):
+    """
+    Read every region service list and backend service once, concurrently
+
+    Returns:
+        (health, current, resources, details): health[backend][region_name] -> bool,
+        current[backend] -> get_current_backends() result,
+        resources[backend] -> backend service resource (reused for updates) and
+        details[backend][region_name] -> health score and data-plane stats;
+        reads that did not finish before the deadline are missing
+    """
+    snapshot = TickSnapshot()
+    for backend_service in backend_services:
+        for region in BACKEND_CONFIGS[backend_service]['regions']:
+            snapshot.fetch(('services', region['region']), list_region_services, region['region'])
+        snapshot.fetch(('backend', backend_service), get_backend_service, backend_service)
+
+    timed_out = snapshot.wait(deadline)
+    if timed_out:
+        logger.warning(f"{timed_out}/{len(snapshot.futures)} read(s) did not finish within {TICK_DEADLINE:.0f}s")
+
+    health = {}
+    current = {}
+    resources = {}
+    details = {}
+    for backend_service in backend_services:
+        health[backend_service] = {}
+        details[backend_service] = {}
+        for region in BACKEND_CONFIGS[backend_service]['regions']:
+            key = ('services', region['region'])
+            if not snapshot.ready(key):
+                continue
+            services = snapshot.value(key)
+            ready = check_service_health(region['service'], region['region'], services)
+            if prober is None:
+                health[backend_service][region['name']] = ready
+                continue
+
+            url = probe_url(region, services)
+            data_plane = None
+            if url:
+                prober.add_target(url)
+                data_plane = prober.get_stats(url)
+            score = health_score(ready, data_plane)
+            if ready and score < HEALTH_SCORE_THRESHOLD:
+                logger.warning(f"[{backend_service}] {region['name']} is Ready but data plane is degraded "
+                               f"(score {score:.2f}: error rate {data_plane['error_rate']:.0%}, "
+                               f"p95 {data_plane['p95_ms']:.0f}ms)")
+            health[backend_service][region['name']] = score >= HEALTH_SCORE_THRESHOLD
+            details[backend_service][region['name']] = {'ready': ready, 'score': score, 'data_plane': data_plane}
+        key = ('backend', backend_service)
+        if snapshot.ready(key):
+            resources[backend_service] = snapshot.value(key)
+            current[backend_service] = get_current_backends(backend_service, resources[backend_service])
+    return health, current, resources, details
+
+class RegionState:
+    """Debounced health of one region of one backend service"""
+    def __init__(self):
+        self.healthy = None
+        self.observed = None
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.last_change = None
+
+    def observe(self, healthy):
+        """Count one check result; returns True if the debounced state flipped"""
+        self.observed = healthy
+        if healthy:
+            self.consecutive_successes += 1
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.consecutive_successes = 0
+
+        if self.healthy and self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.healthy = False
+        elif self.healthy is False and self.consecutive_successes >= RECOVERY_THRESHOLD:
+            self.healthy = True
+        else:
+            return False
+        self.last_change = time.time()
+        return True
+
+    def get_status(self):
+        return {
+            'healthy': self.healthy,
+            'observed': self.observed,
+            'consecutive_failures': self.consecutive_failures,
+            'consecutive_successes': self.consecutive_successes,
+            'last_change': self.last_change,
+        }
+
+class BackendState:
+    """Per-backend-service state kept across ticks: region hysteresis and switch cooldown"""
+    def __init__(self, backend_service):
+        self.backend_service = backend_service
+        self.regions = {r['name']: RegionState() for r in BACKEND_CONFIGS[backend_service]['regions']}
+        self.last_switch = None
+        self.switches = 0
+
+    def observe(self, health, current):
+        """
+        Feed one tick of raw health checks
+
+        A region starts in the state implied by the live backends (carrying
+        traffic = healthy), so a restart never changes anything until checks
+        disagree for FAILURE_THRESHOLD / RECOVERY_THRESHOLD ticks in a row.
+        Regions with no result this tick keep their state.
+
+        Returns:
+            {region_name: debounced healthy} for regions with a known state
+        """
+        for name, state in self.regions.items():
+            if state.healthy is None and name in health:
+                state.healthy = (name in current) if current is not None else health[name]
+            if name in health and state.observe(health[name]):
+                logger.warning(f"[{self.backend_service}] {name} is now {'HEALTHY' if state.healthy else 'UNHEALTHY'} "
+                               f"after {max(state.consecutive_failures, state.consecutive_successes)} consecutive check(s)")
+        return {name: state.healthy for name, state in self.regions.items() if state.healthy is not None}
+
+    def cooldown_remaining(self):
+        if self.last_switch is None:
+            return 0.0
+        return max(0.0, SWITCH_COOLDOWN - (time.monotonic() - self.last_switch))
+
+    def record_switch(self):
+        self.last_switch = time.monotonic()
+        self.switches += 1
+
+    def get_status(self):
+        return {
+            'regions': {name: state.get_status() for name, state in self.regions.items()},
+            'switches': self.switches,
+            'cooldown_remaining': round(self.cooldown_remaining(), 1),
+        }
+
+backend_states = {}
+# Decisions are serialized: the background loop and GET /monitor share backend_states
+tick_lock = threading.Lock()
+
+def evaluate_backend(backend_service, health, current, apply_changes, details=None):
+    """
+    Build the report for one backend service from the collected reads
+
+    Returns:
+        (result, desired): desired is the {region_name: capacity_scaler} to
+        apply, or None when no update is needed (or allowed)
+    """
+    regions = BACKEND_CONFIGS[backend_service]['regions']
+    for region in regions:
+        if region['name'] in health:
+            logger.info(f"[{backend_service}] {region['name']} ({region['service']} in {region['region']}): "
+                        f"{'HEALTHY' if health[region['name']] else 'UNHEALTHY'}")
+    desired = plan_backends(regions, health)
+
+    result = {
+        # Most preferred region carrying traffic (primary/secondary with the legacy config)
+        'current_active': next((r['name'] for r in regions if current and r['name'] in current), 'unknown'),
+        'active_backends': current,
+        'desired_backends': desired,
+        'regions': [{
+            'name': r['name'],
+            'region': r['region'],
+            'service': r['service'],
+            'weight': r['weight'],
+            'healthy': health.get(r['name']),
+            **(details or {}).get(r['name'], {}),
+        } for r in regions],
+    }
+    for r in regions:
+        result[f"{r['name']}_service"] = r['service']
+        result[f"{r['name']}_healthy"] = health.get(r['name'])
+
+    if not apply_changes:
+        return result, None
+
+    missing = [r['name'] for r in regions if r['name'] not in health]
+    if missing:
+        # A slow API is not evidence of an outage: decide on the next tick
+        logger.warning(f"[{backend_service}] Health of {', '.join(missing)} unknown (deadline) - no change")
+        result['action'] = f"SKIPPED: health check timed out ({', '.join(missing)})"
+        return result, None
+    if not desired:
+        logger.critical(f"[{backend_service}] All regions unhealthy - no change")
+        result['action'] = "CRITICAL: All regions unhealthy"
+        return result, None
+    if current == desired:
+        logger.info(f"[{backend_service}] No change - {format_scalers(current)}")
+        result['action'] = f"No change - {format_scalers(current)}"
+        return result, None
+
+    lost = [name for name in (current or {}) if not health.get(name)]
+    label = f"FAILOVER ({', '.join(lost)} unhealthy)" if lost else "Rebalanced"
+    logger.warning(f"[{backend_service}] {label}: {format_scalers(current or {})} -> {format_scalers(desired)}")
+    result['action'] = label
+    return result, desired
+
+def apply_updates(results, updates, resources, wait_updates=True):
+    """
+    Issue every backend update in parallel
+
+    Returns:
+        backend services whose update was issued (and, with wait_updates, succeeded)
+    """
+    submitted = {}
+    with pending_updates_lock:
+        for backend_service, desired in updates.items():
+            pending = pending_updates.get(backend_service)
+            if pending and not pending.done():
+                results[backend_service]['action'] = "SKIPPED: previous update still in progress"
+                continue
+            submitted[backend_service] = update_executor.submit(update_backends, backend_service, desired,
+                                                                resources.get(backend_service))
+            pending_updates[backend_service] = submitted[backend_service]
+
+    if not wait_updates:
+        # Background ticks keep running while operations complete; a backend with an
+        # update in flight is skipped until it finishes
+        for backend_service in submitted:
+            result = results[backend_service]
+            result['action'] = f"{result['action']}: {format_scalers(updates[backend_service])} (update in progress)"
+        return list(submitted)
+
+    # Each update is bounded by its own operation timeout
+    wait(submitted.values())
+    succeeded = []
+    for backend_service, future in submitted.items():
+        result = results[backend_service]
+        desired = updates[backend_service]
+        if future.result():
+            result['action'] = f"{result['action']}: {format_scalers(desired)}"
+            regions = BACKEND_CONFIGS[backend_service]['regions']
+            result['current_active'] = next(r['name'] for r in regions if r['name'] in desired)
+            result['active_backends'] = desired
+            succeeded.append(backend_service)
+        else:
+            result['action'] = f"Failed to update backends to {format_scalers(desired)}"
+    return succeeded
+
+def run_tick(apply_changes, wait_updates=True):
+    """
+    Evaluate every backend service once; returns {backend_service: result}
+
+    With apply_changes, raw health checks go through each backend's
+    BackendState (hysteresis) and updates respect SWITCH_COOLDOWN.
+    Without it, the raw checks are reported and nothing is changed.
+    """
+    if not apply_changes:
+        health, current, resources, details = collect(BACKEND_SERVICES, time.monotonic() + TICK_DEADLINE)
+        return {backend_service: evaluate_backend(backend_service, health[backend_service],
+                                                  current.get(backend_service), False,
+                                                  details[backend_service])[0]
+                for backend_service in BACKEND_SERVICES}
+
+    with tick_lock:
+        started = time.monotonic()
+        health, current, resources, details = collect(BACKEND_SERVICES, started + TICK_DEADLINE)
+
+        results = {}
+        updates = {}
+        for backend_service in BACKEND_SERVICES:
+            state = backend_states.setdefault(backend_service, BackendState(backend_service))
+            active = current.get(backend_service)
+            decided = state.observe(health[backend_service], active)
+            result, desired = evaluate_backend(backend_service, decided, active, True, details[backend_service])
+
+            if desired and state.cooldown_remaining() > 0:
+                # Cooldown never blocks moving traffic off regions that are all down
+                if any(decided.get(name) for name in (active or {})):
+                    logger.info(f"[{backend_service}] Cooldown ({state.cooldown_remaining():.0f}s left) - "
+                                f"holding {format_scalers(active)}")
+                    result['action'] = f"COOLDOWN: {result['action']} held for {state.cooldown_remaining():.0f}s"
+                    desired = None
+            if desired:
+                updates[backend_service] = desired
+            result['state'] = state.get_status()
+            results[backend_service] = result
+
+        if updates:
+            for backend_service in apply_updates(results, updates, resources, wait_updates):
+                backend_states[backend_service].record_switch()
+                results[backend_service]['state'] = backend_states[backend_service].get_status()
+        logger.info(f"Tick finished in {time.monotonic() - started:.2f}s "
+                    f"({len(BACKEND_SERVICES)} backend service(s), {len(updates)} update(s))")
+        return results
+
+class MonitorLoop:
+    def __init__(self, interval):
+        """
+        Initialize background monitor loop
+
+        Args:
+            interval: Seconds between ticks
+        """
+        self.interval = interval
+        self.running = False
+        self.ticks = 0
+        self.errors = 0
+        self.max_lag = 0.0
+        self.last_tick = None
+        self.last_duration = None
+        self.last_results = None
+
+    def run(self):
+        """Tick loop on absolute deadlines so the interval does not drift"""
+        self.running = True
+        next_tick = time.monotonic()
+        logger.info(f"Background monitor started: every {self.interval:.1f}s, "
+                    f"failure threshold {FAILURE_THRESHOLD}, recovery threshold {RECOVERY_THRESHOLD}, "
+                    f"cooldown {SWITCH_COOLDOWN:.0f}s")
+
+        while self.running:
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - next_tick)
+            try:
+                self.last_results = run_tick(apply_changes=True, wait_updates=False)
+                self.last_tick = time.time()
+                self.ticks += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Background monitor tick failed: {e}")
+            self.last_duration = time.monotonic() - now
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Tick took longer than the interval: skip missed ticks rather than bursting
+                next_tick = time.monotonic()
+
+    def get_status(self):
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'ticks': self.ticks,
+            'errors': self.errors,
+            'last_tick': self.last_tick,
+            'last_duration': self.last_duration,
+            'max_tick_lag': self.max_lag,
+        }
+
+    def start(self):
+        """Run the loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True, name='monitor-loop')
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
+
+monitor_loop = None
+
+def start_monitor_loop():
+    """Start the background loop in this process (MONITOR_INTERVAL > 0)"""
+    global monitor_loop
+    if MONITOR_INTERVAL > 0:
+        monitor_loop = MonitorLoop(MONITOR_INTERVAL)
+        monitor_loop.start()
+    return monitor_loop
+
 @app.route('/')
 def home():
     """Health endpoint"""
@@ -232,143 +1042,52 @@ def home():
         'service': 'auto-failover-monitor'
     })
 
+@app.route('/api-stats')
+def api_stats_endpoint():
+    """Latency of the Cloud Run / Compute API calls made by this process"""
+    return jsonify({
+        'pid': os.getpid(),
+        'clients': sorted(clients.clients),
+        'clients_created': clients.created,
+        'calls': api_stats.snapshot()
+    })
+
 @app.route('/monitor')
 def monitor():
     """Main monitoring endpoint - manages ALL backend services independently"""
     logger.info("=" * 60)
     logger.info(f"Starting independent health check for {len(BACKEND_SERVICES)} backend service(s)...")
     logger.info(f"Backend services: {', '.join(BACKEND_SERVICES)}")
-    
-    # Process each backend service INDEPENDENTLY
-    results = {}
-    
-    for backend_service in BACKEND_SERVICES:
-        backend_service = backend_service.strip()  # Remove whitespace
-        logger.info(f"\n--- Processing: {backend_service} ---")
-        
-        # Get backend configuration
-        if backend_service not in BACKEND_CONFIGS:
-            logger.error(f"[{backend_service}] Configuration not found in BACKEND_CONFIGS")
-            results[backend_service] = {
-                'current_active': 'unknown',
-                'action': 'ERROR: Configuration not found',
-                'primary_healthy': None,
-                'secondary_healthy': None
-            }
-            continue
-        
-        config = BACKEND_CONFIGS[backend_service]
-        primary_service = config['primary_service']
-        secondary_service = config['secondary_service']
-        
-        # Check health for THIS backend's services
-        logger.info(f"[{backend_service}] Checking primary service: {primary_service}")
-        logger.info(f"[{backend_service}] Checking secondary service: {secondary_service}")
-        
-        primary_healthy = check_service_health(primary_service, PRIMARY_REGION)
-        secondary_healthy = check_service_health(secondary_service, SECONDARY_REGION)
-        
-        logger.info(f"[{backend_service}] Primary ({primary_service}): {'HEALTHY' if primary_healthy else 'UNHEALTHY'}")
-        logger.info(f"[{backend_service}] Secondary ({secondary_service}): {'HEALTHY' if secondary_healthy else 'UNHEALTHY'}")
-        
-        # Get current active region
-        current_active = get_current_backends(backend_service)
-        logger.info(f"[{backend_service}] Current active: {current_active}")
-        
-        action_taken = None
-        
-        # Decision logic - ONLY applies to THIS backend service
-        if primary_healthy and secondary_healthy:
-            # Both healthy - prefer primary
-            if current_active != 'primary':
-                logger.info(f"[{backend_service}] Both healthy - switching to primary region ({PRIMARY_REGION})")
-                if switch_to_region(backend_service, 'primary'):
-                    action_taken = f"Switched to primary ({PRIMARY_REGION})"
-                else:
-                    action_taken = "Failed to switch to primary"
-            else:
-                logger.info(f"[{backend_service}] Both healthy - keeping primary active")
-                action_taken = "No change - primary active"
-                
-        elif not primary_healthy and secondary_healthy:
-            # Primary failed - failover to secondary
-            if current_active != 'secondary':
-                logger.warning(f"[{backend_service}] Primary failed - FAILOVER TO SECONDARY ({SECONDARY_REGION})")
-                if switch_to_region(backend_service, 'secondary'):
-                    action_taken = f"FAILOVER TO SECONDARY ({SECONDARY_REGION})"
-                else:
-                    action_taken = "Failed to failover to secondary"
-            else:
-                logger.info(f"[{backend_service}] Primary still down - keeping secondary active")
-                action_taken = "No change - secondary active"
-                
-        elif primary_healthy and not secondary_healthy:
-            # Secondary failed - keep primary
-            if current_active != 'primary':
-                logger.warning(f"[{backend_service}] Secondary failed - switching to primary ({PRIMARY_REGION})")
-                if switch_to_region(backend_service, 'primary'):
-                    action_taken = f"Switched to primary ({PRIMARY_REGION})"
-                else:
-                    action_taken = "Failed to switch to primary"
-            else:
-                logger.info(f"[{backend_service}] Secondary down - keeping primary active")
-                action_taken = "No change - primary active"
-        else:
-            # Both failed - no change
-            logger.critical(f"[{backend_service}] Both regions unhealthy - no change")
-            action_taken = "CRITICAL: Both regions unhealthy"
-        
-        results[backend_service] = {
-            'current_active': current_active,
-            'action': action_taken,
-            'primary_service': primary_service,
-            'primary_healthy': primary_healthy,
-            'secondary_service': secondary_service,
-            'secondary_healthy': secondary_healthy
-        }
-    
+
+    # Each backend service is decided INDEPENDENTLY from one concurrent read pass,
+    # through the same hysteresis state as the background loop
+    results = run_tick(apply_changes=True)
+
     return jsonify({
         'timestamp': os.popen('date').read().strip(),
-        'primary_region': PRIMARY_REGION,
-        'secondary_region': SECONDARY_REGION,
+        'regions': REGIONS,
         'backend_services': results
     })
 
 @app.route('/status')
 def status():
     """Get current status for ALL backend services without making changes"""
-    # Get status for all backend services with their individual health checks
-    backend_status = {}
-    for backend_service in BACKEND_SERVICES:
-        backend_service = backend_service.strip()
-        
-        current_active = get_current_backends(backend_service)
-        
-        # Get per-backend health if config exists
-        health_info = {'current_active': current_active}
-        if backend_service in BACKEND_CONFIGS:
-            config = BACKEND_CONFIGS[backend_service]
-            primary_service = config['primary_service']
-            secondary_service = config['secondary_service']
-            
-            primary_healthy = check_service_health(primary_service, PRIMARY_REGION)
-            secondary_healthy = check_service_health(secondary_service, SECONDARY_REGION)
-            
-            health_info.update({
-                'primary_service': primary_service,
-                'primary_healthy': primary_healthy,
-                'secondary_service': secondary_service,
-                'secondary_healthy': secondary_healthy
-            })
-        
-        backend_status[backend_service] = health_info
-    
+    if monitor_loop and monitor_loop.last_results is not None:
+        # Latest background tick (at most MONITOR_INTERVAL old), including hysteresis state
+        backend_status = monitor_loop.last_results
+    else:
+        backend_status = run_tick(apply_changes=False)
+
     return jsonify({
-        'primary_region': PRIMARY_REGION,
-        'secondary_region': SECONDARY_REGION,
-        'backend_services': backend_status
+        'regions': REGIONS,
+        'backend_services': backend_status,
+        'monitor_loop': monitor_loop.get_status() if monitor_loop else None,
+        'data_plane': prober.get_status() if prober else None
     })
 
+start_data_plane_prober()
+start_monitor_loop()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Combined CPU + Memory Load Generator with HTTP server for Cloud Run compatibility
+One supervisor, one HTTP control plane: independent CPU_TARGET and
+MEMORY_TARGET, retunable at runtime via POST /target, one /metrics surface
+"""
+import os
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from load_supervisor import LoadSupervisor, detect_cpu_count
+from load_profile import load_profile_from_env
+from memory_profile import load_memory_profile_from_env
+from memory_pressure import create_pressure_sampler
+from working_set import PATTERNS as CHURN_PATTERNS
+from work_kernels import kernel_for_worker
+from cpu_load_with_http import add_cpu_metrics
+from mem_load_with_http import add_memory_metrics
+from metrics_sampler import create_metrics_sampler
+from gce_metadata import prefetch_metadata, get_metadata
+from metrics_exporter import CONTENT_TYPE, MetricsWriter, add_sampler_metrics
+
+class HealthCheckHandler(BaseHTTPRequestHandler):
+    """HTTP handler for Cloud Run health checks and the combined control plane"""
+
+    # Store supervisor and samplers as class variables
+    supervisor = None
+    sampler = None
+    pressure = None
+
+    def send_text(self, status, text, content_type='text/plain; charset=utf-8'):
+        """Send a small response body"""
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        """Send a JSON response"""
+        self.send_text(status, json.dumps(payload), 'application/json')
+
+    def do_POST(self):
+        """Handle POST requests"""
+        if urlparse(self.path).path == '/target':
+            self.handle_set_target()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def handle_set_target(self):
+        """
+        Retune CPU and/or memory targets independently
+
+        Accepts JSON body {"cpu": 85, "memory": 75} or query string ?cpu=85&memory=75
+        (either key may be omitted)
+        """
+        supervisor = HealthCheckHandler.supervisor
+        if supervisor is None or not supervisor.ready.is_set():
+            self.send_json(503, {'error': 'Load not started yet'})
+            return
+
+        try:
+            query = parse_qs(urlparse(self.path).query)
+            targets = {key: query[key][0] for key in ['cpu', 'memory'] if key in query}
+            if not targets:
+                length = int(self.headers.get('Content-Length', 0))
+                if length > 0:
+                    body = json.loads(self.rfile.read(length))
+                    targets = {key: body[key] for key in ['cpu', 'memory'] if key in body}
+            targets = {key: float(value) for key, value in targets.items()}
+        except (TypeError, ValueError, AttributeError):
+            targets = {}
+        if not targets:
+            self.send_json(400, {'error': 'Expected {"cpu": <percent>, "memory": <percent>} or ?cpu=&memory='})
+            return
+        if any(not 0 <= value <= 100 for value in targets.values()):
+            self.send_json(400, {'error': 'targets must be between 0 and 100'})
+            return
+
+        previous = {}
+        try:
+            if 'cpu' in targets:
+                previous['cpu'] = supervisor.set_cpu_target(targets['cpu'])
+            if 'memory' in targets:
+                previous['memory'] = supervisor.set_memory_target(targets['memory'])
+        except ValueError as e:
+            self.send_json(409, {'error': str(e)})
+            return
+
+        state = supervisor.get_state()
+        state['previous_targets'] = previous
+        self.send_json(200, state)
+
+    def handle_readyz(self):
+        """Ready once both loads are started and every CPU and memory worker is alive"""
+        supervisor = HealthCheckHandler.supervisor
+        if supervisor is None or not supervisor.ready.is_set():
+            self.send_json(503, {'ready': False, 'reason': 'Load not started yet'})
+            return
+        dead = [p.pid for p in supervisor.processes if not p.is_alive()]
+        if dead:
+            self.send_json(503, {'ready': False, 'reason': 'CPU worker(s) exited', 'dead_pids': dead})
+            return
+        dead_memory = supervisor.pool.dead_workers() if supervisor.pool else []
+        if dead_memory:
+            self.send_json(503, {'ready': False, 'reason': 'Memory worker(s) exited', 'dead_workers': dead_memory})
+            return
+        self.send_json(200, {'ready': True, 'cpu_workers': len(supervisor.processes),
+                             'memory_blocks': supervisor.generator.get_block_count()})
+
+    def render_metrics(self):
+        """Render /metrics: container sample, CPU workers and memory generator in one exposition"""
+        writer = MetricsWriter()
+        sampler = HealthCheckHandler.sampler
+        add_sampler_metrics(writer, sampler.latest() if sampler else None)
+
+        supervisor = HealthCheckHandler.supervisor
+        if supervisor:
+            add_cpu_metrics(writer, supervisor.control, supervisor.cpu_controller,
+                            supervisor.placement, supervisor.processes)
+            writer.add('cpu_worker_restarts_total', 'counter', 'CPU workers restarted by the supervisor',
+                       supervisor.worker_restarts)
+        add_memory_metrics(writer, supervisor.generator if supervisor else None, HealthCheckHandler.pressure)
+        return writer.render()
+
+    def do_GET(self):
+        """Handle GET requests"""
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self.send_text(200, self.render_metrics(), CONTENT_TYPE)
+        elif path == '/livez':
+            # Constant-time liveness: the server thread is answering
+            self.send_text(200, 'ok')
+        elif path == '/readyz':
+            self.handle_readyz()
+        elif path in ['/target', '/state']:
+            supervisor = HealthCheckHandler.supervisor
+            if supervisor is None or not supervisor.ready.is_set():
+                self.send_json(503, {'error': 'Load not started yet'})
+            else:
+                self.send_json(200, supervisor.get_state())
+        elif path in ['/status', '/health', '/']:
+            self.send_text(200, self.render_dashboard(), 'text/html; charset=utf-8')
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def render_dashboard(self):
+        """Consolidated status dashboard"""
+        cpu_usage = "N/A"
+        mem_usage = "N/A"
+        mem_limit = "N/A"
+        throttled = "N/A"
+        sample = HealthCheckHandler.sampler.latest() if HealthCheckHandler.sampler else None
+        if sample:
+            if sample['cpu_percent'] is not None:
+                cpu_usage = f"{sample['cpu_percent']:.1f}%"
+            mem_usage = f"{sample['memory_percent']:.1f}%"
+            mem_limit = f"{sample['memory_limit'] / (1024**3):.2f} GB"
+            if sample['throttled_percent'] is not None:
+                throttled = f"{sample['throttled_percent']:.1f}% of periods"
+        pressure = HealthCheckHandler.pressure.summary() if HealthCheckHandler.pressure else "N/A"
+
+        cpu_target = os.getenv('CPU_TARGET', '0')
+        memory_target = os.getenv('MEMORY_TARGET', '0')
+        cpu_workers = memory_held = "Not started yet"
+        cpu_mode = os.getenv('CPU_CONTROL_MODE', 'open').lower()
+        memory_mode = os.getenv('MEMORY_CONTROL_MODE', 'open').lower()
+        supervisor = HealthCheckHandler.supervisor
+        if supervisor and supervisor.ready.is_set():
+            state = supervisor.get_state()
+            cpu, memory = state['cpu'], state['memory']
+            cpu_target = f"{cpu['target_percentage']:.0f}"
+            memory_target = f"{memory['target_percentage']:.0f}"
+            cpu_mode = cpu['control_mode'] + (" + profile" if cpu['profile'] else "")
+            memory_mode = memory['control_mode']
+            cpu_workers = (f"{cpu['workers_alive']}/{cpu['workers']} alive on {cpu['cpu_count']:.2f} cores "
+                           f"(restarts: {cpu['worker_restarts']}) | duty "
+                           + ", ".join(f"{d*100:.0f}%" for d in cpu['achieved_duty_cycles']))
+            memory_held = (f"{memory['allocated_bytes'] / (1024**3):.2f} GB in {memory['blocks']} blocks "
+                           f"({memory['backend']}, {memory['workers']} process(es))")
+
+        metadata = get_metadata()
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>CPU + Memory Load Generator</title>
+    <meta http-equiv="refresh" content="10">
+    <style>
+        body {{ font-family: monospace; background: #1e1e1e; color: #00ff00; padding: 20px; }}
+        h1 {{ color: #00ff00; border-bottom: 2px solid #00ff00; }}
+        .section {{ margin: 20px 0; padding: 15px; border: 1px solid #00ff00; background: #2d2d2d; }}
+        .label {{ color: #ffff00; font-weight: bold; }}
+        .value {{ color: #00ffff; }}
+        .highlight {{ color: #ff00ff; font-size: 1.2em; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <h1>⚡💾 CPU + Memory Load Generator - Status Dashboard</h1>
+
+    <div class="section">
+        <h2>⚡ CPU</h2>
+        <p><span class="label">CPU Target:</span> <span class="highlight">{cpu_target}%</span></p>
+        <p><span class="label">Actual CPU Usage:</span> <span class="highlight">{cpu_usage}</span></p>
+        <p><span class="label">CPU Throttled:</span> <span class="value">{throttled}</span></p>
+        <p><span class="label">Control Mode:</span> <span class="value">{cpu_mode}</span></p>
+        <p><span class="label">Workers:</span> <span class="value">{cpu_workers}</span></p>
+    </div>
+
+    <div class="section">
+        <h2>💾 Memory</h2>
+        <p><span class="label">Memory Target:</span> <span class="highlight">{memory_target}%</span></p>
+        <p><span class="label">Actual Memory Usage:</span> <span class="highlight">{mem_usage} of {mem_limit}</span></p>
+        <p><span class="label">Control Mode:</span> <span class="value">{memory_mode}</span></p>
+        <p><span class="label">Held by Generator:</span> <span class="value">{memory_held}</span></p>
+        <p><span class="label">Pressure:</span> <span class="value">{pressure}</span></p>
+    </div>
+
+    <div class="section">
+        <h2>☁️ Cloud Run Metadata</h2>
+        <p><span class="label">Service Name:</span> <span class="value">{os.getenv('K_SERVICE', 'Not in Cloud Run')}</span></p>
+        <p><span class="label">Revision:</span> <span class="value">{os.getenv('K_REVISION', 'N/A')}</span></p>
+        <p><span class="label">Project ID:</span> <span class="value">{metadata['project_id']}</span></p>
+        <p><span class="label">Region:</span> <span class="value">{metadata['region']}</span></p>
+        <p><span class="label">Instance ID:</span> <span class="value">{metadata['instance_id']}</span></p>
+        <p><span class="label">Main PID:</span> <span class="value">{os.getpid()}</span></p>
+    </div>
+
+    <p style="color: #666; margin-top: 30px; text-align: center;">
+        Auto-refresh every 10 seconds | Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    </p>
+</body>
+</html>"""
+
+    def log_message(self, format, *args):
+        """Suppress default logging"""
+        pass
+
+def start_http_server(port=8080):
+    """Bind the HTTP server and serve it from a daemon thread (listening on return)"""
+    try:
+        # Threaded so probes never queue behind a dashboard render
+        server = ThreadingHTTPServer(('0.0.0.0', port), HealthCheckHandler)
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ Failed to start HTTP server: {e}")
+        raise
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[{datetime.now()}] ✅ HTTP server bound to port {port}")
+    return server
+
+def parse_target(name):
+    """Read a 0-100 target from env (0 = that resource is not loaded)"""
+    try:
+        value = int(os.getenv(name, '0'))
+    except ValueError:
+        value = -1
+    if not 0 <= value <= 100:
+        print(f"[{datetime.now()}] ERROR: {name} must be between 0 and 100")
+        raise ValueError(f"Invalid {name}. Must be between 0 and 100")
+    return value
+
+def main():
+    """Main function"""
+    cpu_profile = load_profile_from_env()
+    memory_profile = load_memory_profile_from_env()
+    cpu_target = round(cpu_profile.target_at(0)[0]) if cpu_profile else parse_target('CPU_TARGET')
+    memory_target = parse_target('MEMORY_TARGET')
+    if not (cpu_target or memory_target or cpu_profile or memory_profile):
+        print(f"[{datetime.now()}] ERROR: set CPU_TARGET and/or MEMORY_TARGET (or a CPU/memory profile)")
+        raise ValueError("Nothing to load: CPU_TARGET and MEMORY_TARGET are both 0")
+
+    cpu_control_mode = os.getenv('CPU_CONTROL_MODE', 'open').lower()
+    if cpu_control_mode not in ['open', 'pid']:
+        print(f"[{datetime.now()}] ERROR: CPU_CONTROL_MODE must be open or pid")
+        raise ValueError("Invalid CPU_CONTROL_MODE. Must be open or pid")
+    memory_control_mode = os.getenv('MEMORY_CONTROL_MODE', 'open').lower()
+    if memory_control_mode not in ['open', 'closed']:
+        print(f"[{datetime.now()}] ERROR: MEMORY_CONTROL_MODE must be open or closed")
+        raise ValueError("Invalid MEMORY_CONTROL_MODE. Must be open or closed")
+    if memory_profile and memory_control_mode == 'closed':
+        print(f"[{datetime.now()}] ERROR: MEMORY_PROFILE cannot be combined with MEMORY_CONTROL_MODE=closed")
+        raise ValueError("MEMORY_PROFILE and MEMORY_CONTROL_MODE=closed are mutually exclusive")
+    if os.getenv('MEMORY_CHURN_PATTERN', 'random').lower() not in CHURN_PATTERNS:
+        raise ValueError(f"Invalid MEMORY_CHURN_PATTERN. Must be one of: {', '.join(CHURN_PATTERNS)}")
+    # Validate kernel selection up front (raises ValueError on unknown kernels)
+    kernel_for_worker(0)
+
+    print(f"[{datetime.now()}] ===== CPU + Memory Load Generator Started (Cloud Run Mode) =====")
+    print(f"[{datetime.now()}] CPU target: {cpu_target}% ({cpu_control_mode}{', profile' if cpu_profile else ''})")
+    print(f"[{datetime.now()}] Memory target: {memory_target}% ({'profile' if memory_profile else memory_control_mode})")
+
+    # Get PORT from environment (Cloud Run sets this)
+    port = int(os.environ.get('PORT', 8080))
+    print(f"[{datetime.now()}] Port: {port}")
+
+    # Bind the HTTP server first so the startup probe passes as early as possible
+    start_http_server(port)
+
+    # Fetch Cloud Run metadata once, concurrently, without delaying the HTTP bind
+    prefetch_metadata()
+
+    # Background samplers so HTTP handlers never block on measurements
+    sampler = create_metrics_sampler(cpu_count=detect_cpu_count())
+    sampler.start()
+    HealthCheckHandler.sampler = sampler
+    pressure = create_pressure_sampler()
+    pressure.start()
+    HealthCheckHandler.pressure = pressure
+
+    # Load starts as soon as the socket is bound; STARTUP_DELAY (default 0) holds it back further
+    startup_delay = float(os.getenv('STARTUP_DELAY', '0'))
+    if startup_delay > 0:
+        print(f"[{datetime.now()}] Delaying {startup_delay:g}s before starting load...")
+        time.sleep(startup_delay)
+
+    supervisor = LoadSupervisor(cpu_target, memory_target, cpu_control_mode=cpu_control_mode,
+                                cpu_profile=cpu_profile, memory_profile=memory_profile, pressure=pressure)
+    HealthCheckHandler.supervisor = supervisor
+
+    try:
+        supervisor.start()
+        print(f"[{datetime.now()}] HTTP server listening on port {port}")
+        print(f"[{datetime.now()}] Press Ctrl+C to stop")
+        supervisor.run()
+    except KeyboardInterrupt:
+        print(f"\n[{datetime.now()}] Stopping CPU + memory load generator...")
+    finally:
+        supervisor.stop()
+
+if __name__ == "__main__":
+    main()
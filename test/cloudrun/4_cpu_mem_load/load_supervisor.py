@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Combined CPU + memory load supervisor
+Owns the cpu_load_worker processes (shared ControlBlock, optional PID
+controller and CPU profile) and the MemoryLoadGenerator (optional worker
+pool, closed-loop controller and growth profile) of one container, restarts
+CPU workers that die, and retunes either target independently at runtime
+"""
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import threading
+import time
+from datetime import datetime
+
+from cpu_load import get_container_cpu_quota, cpu_load_worker
+from cpu_controller import create_pid_controller
+from control_block import ControlBlock
+from load_profile import ProfileRunner
+from placement import create_placement_plan, pin_current_process
+from memory_load import MemoryLoadGenerator
+from memory_controller import MemoryTargetController
+from memory_workers import create_memory_worker_pool
+
+def detect_cpu_count():
+    """CPU cores available: CPU_LIMIT env, then the cgroup quota, then the host count"""
+    cpu_limit_env = os.getenv('CPU_LIMIT')
+    if cpu_limit_env:
+        return float(cpu_limit_env)
+    return get_container_cpu_quota() or multiprocessing.cpu_count()
+
+class LoadSupervisor:
+    def __init__(self, cpu_target, memory_target, cpu_control_mode='open', cpu_profile=None,
+                 memory_profile=None, pressure=None, check_interval=2.0):
+        """
+        Initialize load supervisor
+
+        Args:
+            cpu_target: Initial CPU target percentage (0 = no CPU load)
+            memory_target: Initial memory target percentage (0 = no memory load)
+            cpu_control_mode: 'open' (fixed duty cycle) or 'pid'
+            cpu_profile: Optional LoadProfile driving the CPU target
+            memory_profile: Optional MemoryProfile driving memory holdings
+            pressure: Running MemoryPressureSampler shared with the generator
+            check_interval: Seconds between worker health checks
+        """
+        self.cpu_target = cpu_target
+        self.memory_target = memory_target
+        self.cpu_control_mode = cpu_control_mode
+        self.cpu_profile = cpu_profile
+        self.memory_profile = memory_profile
+        self.pressure = pressure
+        self.check_interval = check_interval
+
+        self.cpu_count = None
+        self.placement = None
+        self.control = None
+        self.cpu_controller = None
+        self.cpu_profile_runner = None
+        self.processes = []
+        self.worker_restarts = 0
+        # CPU workers come from a fork server started before any memory is held, so
+        # a restarted worker never inherits the memory blocks (copy-on-write pages
+        # that stay charged after the parent frees them) or locks held by the
+        # memory threads at fork time
+        self.mp = multiprocessing.get_context('forkserver')
+        self.mp.set_forkserver_preload(['cpu_load'])
+
+        self.pool = None
+        self.generator = None
+        self.memory_thread = None
+        # Open-mode retargets run one at a time on one thread with one controller
+        self.memory_retarget = threading.Event()
+        self.memory_retarget_controller = None
+        self.running = False
+        self.ready = threading.Event()
+
+    def start_cpu(self):
+        """Spawn one pinned cpu_load_worker per worker slot (idle slots when target is 0)"""
+        self.cpu_count = detect_cpu_count()
+        self.placement = create_placement_plan(self.cpu_count)
+        self.placement.print_plan()
+        multiprocessing.forkserver.ensure_running()
+        self.control = ControlBlock(self.placement.num_workers, self.cpu_count, self.cpu_target,
+                                    max_duty=self.placement.max_duty, ctx=self.mp)
+        if self.cpu_control_mode == 'pid':
+            self.cpu_controller = create_pid_controller(self.control)
+
+        for i in range(self.placement.num_workers):
+            self.processes.append(self.spawn_cpu_worker(i))
+        print(f"[{datetime.now()}] CPU: {self.cpu_count:.2f} cores, target {self.cpu_target}%, "
+              f"{len(self.processes)} worker slot(s), control mode {self.cpu_control_mode}")
+
+        if self.cpu_controller:
+            self.cpu_controller.start()
+        if self.cpu_profile:
+            self.cpu_profile_runner = ProfileRunner(self.control, self.cpu_profile)
+            self.cpu_profile_runner.start()
+
+    def spawn_cpu_worker(self, worker_index):
+        """Start (or restart) the worker for one slot; duty is read from the control block"""
+        p = self.mp.Process(target=cpu_load_worker,
+                            args=(self.control.get_duty(worker_index), None, self.control, worker_index,
+                                  None, self.placement.worker_cpu(worker_index)))
+        p.start()
+        return p
+
+    def start_memory(self):
+        """Run the MemoryLoadGenerator (allocation, then hold/monitor) in a daemon thread"""
+        self.pool = create_memory_worker_pool()
+        if self.pool:
+            self.pool.start()
+        self.generator = MemoryLoadGenerator(target_percentage=self.memory_target, pressure=self.pressure,
+                                             pool=self.pool, profile=self.memory_profile)
+        self.memory_thread = threading.Thread(target=self.generator.run, daemon=True)
+        self.memory_thread.start()
+        self.memory_retarget_controller = MemoryTargetController(self.generator, hysteresis=0.0,
+                                                                 max_step_mb=1024 ** 2)
+        threading.Thread(target=self.retarget_memory_loop, daemon=True).start()
+
+    def start(self):
+        """Start CPU workers, then memory allocation; pin the control plane after forking"""
+        self.running = True
+        # The fork server is started here, before start_memory allocates anything
+        self.start_cpu()
+        # Memory worker processes are forked before the control plane is pinned too
+        self.start_memory()
+        if self.placement.pin:
+            pin_current_process(self.placement.control_cpu)
+        self.ready.set()
+        print(f"[{datetime.now()}] ===== CPU + memory load started =====")
+
+    def set_cpu_target(self, target):
+        """Retune CPU workers; a manual target overrides a running CPU profile"""
+        if self.cpu_profile_runner and self.cpu_profile_runner.running:
+            self.cpu_profile_runner.stop()
+            print(f"[{datetime.now()}] CPU load profile stopped (manual target override)")
+        previous = self.control.get_target()
+        self.control.set_target(target)
+        print(f"[{datetime.now()}] 🎯 CPU target changed: {previous:.0f}% -> {target:.0f}%")
+        return previous
+
+    def set_memory_target(self, target):
+        """
+        Move the memory target
+
+        Closed-loop mode picks the new target up on its next step; open mode
+        grows or releases once, on the retarget thread, to reach it
+        """
+        if self.generator.profile_runner:
+            raise ValueError("Memory target is driven by MEMORY_PROFILE")
+        previous = self.generator.target_percentage
+        self.generator.target_percentage = target
+        print(f"[{datetime.now()}] 🎯 Memory target changed: {previous:.0f}% -> {target:.0f}%")
+        self.memory_retarget.set()
+        return previous
+
+    def retarget_memory_loop(self):
+        """
+        Apply open-mode target changes serially
+
+        Waits for the generator's initial allocation so the two never touch
+        data_blocks at once; POSTs arriving meanwhile coalesce into one step
+        towards the latest target
+        """
+        while True:
+            self.memory_retarget.wait()
+            self.generator.allocation_done.wait()
+            self.memory_retarget.clear()
+            if self.generator.controller is not None or self.generator.profile_runner is not None:
+                continue  # Closed loop follows target_percentage itself
+            try:
+                self.memory_retarget_controller.step()
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: memory retarget failed: {e}")
+
+    def check_workers(self):
+        """Restart CPU workers that exited; report a stopped memory generator thread"""
+        for i, p in enumerate(self.processes):
+            if not p.is_alive():
+                print(f"[{datetime.now()}] ⚠️ CPU worker {i+1} (PID {p.pid}) exited with code {p.exitcode}, restarting")
+                self.processes[i] = self.spawn_cpu_worker(i)
+                self.worker_restarts += 1
+        if self.memory_thread and not self.memory_thread.is_alive():
+            print(f"[{datetime.now()}] ⚠️ Memory generator thread stopped")
+            self.memory_thread = None
+
+    def get_state(self):
+        """Consolidated snapshot of both resources for /state and the dashboard"""
+        cpu_state = self.control.get_state() if self.control else None
+        return {
+            'cpu': {
+                'target_percentage': cpu_state['target_percentage'] if cpu_state else self.cpu_target,
+                'cpu_count': self.cpu_count,
+                'control_mode': self.cpu_control_mode,
+                'workers': len(self.processes),
+                'workers_alive': sum(1 for p in self.processes if p.is_alive()),
+                'worker_restarts': self.worker_restarts,
+                'duty_cycles': cpu_state['duty_cycles'] if cpu_state else [],
+                'achieved_duty_cycles': cpu_state['achieved_duty_cycles'] if cpu_state else [],
+                'profile': self.cpu_profile_runner.get_status() if self.cpu_profile_runner else None,
+            },
+            'memory': {
+                'target_percentage': self.generator.target_percentage if self.generator else self.memory_target,
+                'control_mode': 'profile' if self.memory_profile else os.getenv('MEMORY_CONTROL_MODE', 'open').lower(),
+                'backend': self.generator.backend.name if self.generator else None,
+                'allocated_bytes': self.generator.get_allocated_bytes() if self.generator else 0,
+                'blocks': self.generator.get_block_count() if self.generator else 0,
+                'workers': self.pool.num_workers if self.pool else 1,
+                'running': self.memory_thread is not None,
+                'profile': (self.generator.profile_runner.get_status()
+                            if self.generator and self.generator.profile_runner else None),
+            },
+        }
+
+    def run(self):
+        """Supervision loop (blocks until stop or Ctrl+C)"""
+        while self.running:
+            time.sleep(self.check_interval)
+            if self.running:
+                self.check_workers()
+
+    def stop(self):
+        """Stop controllers and profiles, terminate CPU workers, let memory workers release"""
+        self.running = False
+        for component in [self.cpu_controller, self.cpu_profile_runner]:
+            if component:
+                component.stop()
+        if self.generator and self.generator.profile_runner:
+            self.generator.profile_runner.stop()
+        for p in self.processes:
+            p.terminate()
+            p.join()
+        if self.pool:
+            self.pool.stop()
+        print(f"[{datetime.now()}] All CPU and memory load stopped")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Segment schedule engine shared by the CPU and memory load profiles
+A Schedule is a list of segments (each with a duration and value_at(t) for
+t seconds into the segment) walked by a ScheduleRunner on a fixed tick;
+load_profile.py and memory_profile.py only add their own segment shapes
+and what a tick does with the value
+
+Shared module: edit test/cloudrun/common/schedule.py and run common/sync.sh,
+which copies it into the 1_cpu_load and 2_mem_load build contexts
+"""
+import abc
+import threading
+import time
+from datetime import datetime
+
+def require(spec, key):
+    """Get a required segment field, raising ValueError with context if missing"""
+    if key not in spec:
+        raise ValueError(f"Profile segment '{spec.get('type')}' requires '{key}'")
+    return spec[key]
+
+def segment_name(segment):
+    return type(segment).__name__.replace('Segment', '').lower()
+
+class HoldSegment:
+    """Constant value for a duration"""
+    def __init__(self, spec, key='value', normalize=float):
+        self.value = normalize(require(spec, key))
+        self.duration = float(require(spec, 'duration'))
+
+    def value_at(self, t):
+        return self.value
+
+class StepSegment:
+    """Sequence of constant values, each held for step_duration"""
+    def __init__(self, spec, key='values', normalize=float):
+        self.values = [normalize(v) for v in require(spec, key)]
+        if not self.values:
+            raise ValueError(f"Profile segment 'step' requires at least one value in '{key}'")
+        self.step_duration = float(require(spec, 'step_duration'))
+        self.duration = self.step_duration * len(self.values)
+
+    def value_at(self, t):
+        index = min(len(self.values) - 1, int(t // self.step_duration)) if self.step_duration > 0 else -1
+        return self.values[index]
+
+class Schedule:
+    def __init__(self, segments, loop=False, tick=1.0, normalize=float):
+        """
+        Initialize schedule
+
+        Args:
+            segments: List of segment objects
+            loop: Restart from the first segment when the schedule ends
+            tick: Seconds between value updates
+            normalize: Applied to every value (e.g. clamp to 0-100%)
+        """
+        if not segments:
+            raise ValueError("Profile requires at least one segment")
+        self.segments = segments
+        self.loop = loop
+        self.tick = tick
+        self.normalize = normalize
+        self.duration = sum(segment.duration for segment in segments)
+
+    @staticmethod
+    def parse_spec(spec, segment_types, default_tick):
+        """
+        Parse a JSON spec (dict with segments, or a bare list of segments)
+
+        Args:
+            segment_types: Map of segment type name -> factory taking the segment spec
+
+        Returns:
+            (segments, loop, tick)
+        """
+        if isinstance(spec, list):
+            spec = {'segments': spec}
+
+        segments = []
+        for segment_spec in spec.get('segments', []):
+            segment_type = str(segment_spec.get('type', '')).lower()
+            if segment_type not in segment_types:
+                raise ValueError(f"Unknown profile segment type '{segment_type}'. "
+                                 f"Must be one of: {', '.join(segment_types)}")
+            segments.append(segment_types[segment_type](segment_spec))
+
+        tick = float(spec.get('tick', default_tick))
+        if tick <= 0:
+            raise ValueError("Profile tick must be > 0")
+        return segments, bool(spec.get('loop', False)), tick
+
+    def value_at(self, elapsed):
+        """
+        Get the value at a point in the schedule
+
+        Returns:
+            (value, segment_index, finished)
+        """
+        if self.loop and self.duration > 0:
+            elapsed = elapsed % self.duration
+        elif elapsed >= self.duration:
+            last = len(self.segments) - 1
+            segment = self.segments[last]
+            return self.normalize(segment.value_at(segment.duration)), last, True
+
+        offset = 0.0
+        for index, segment in enumerate(self.segments):
+            if elapsed < offset + segment.duration or index == len(self.segments) - 1:
+                return self.normalize(segment.value_at(elapsed - offset)), index, False
+            offset += segment.duration
+
+class ScheduleRunner(abc.ABC):
+    """
+    Walks a Schedule on absolute tick deadlines and hands each value to apply()
+
+    Subclasses set `name` (log prefix) and implement apply() and describe()
+    """
+    name = 'Profile'
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.running = False
+        self.finished = False
+        self.elapsed = 0.0
+        self.segment_index = None
+        self.value = None
+        self.max_lag = 0.0
+
+    @abc.abstractmethod
+    def apply(self, value, segment_changed):
+        """Act on the value of this tick"""
+
+    def describe(self, value):
+        """Format a value for logs"""
+        return f"{value:.1f}"
+
+    def run(self):
+        """Tick loop on absolute deadlines so the schedule does not drift"""
+        self.running = True
+        start = time.monotonic()
+        next_tick = start
+        segments = self.schedule.segments
+        print(f"[{datetime.now()}] {self.name} started: {len(segments)} segment(s), "
+              f"{self.schedule.duration:.0f}s{' (looping)' if self.schedule.loop else ''}, "
+              f"tick {self.schedule.tick:.2f}s")
+
+        while self.running:
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - next_tick)
+            self.elapsed = now - start
+            value, index, finished = self.schedule.value_at(self.elapsed)
+
+            segment_changed = index != self.segment_index
+            if segment_changed:
+                self.segment_index = index
+                segment = segments[index]
+                print(f"[{datetime.now()}] {self.name} segment {index + 1}/{len(segments)}: "
+                      f"{segment_name(segment)} ({segment.duration:.0f}s, target now {self.describe(value)})")
+            try:
+                self.apply(value, segment_changed)
+            except Exception as e:
+                print(f"[{datetime.now()}] Warning: {self.name.lower()} tick failed: {e}")
+            self.value = value
+
+            if finished:
+                self.finished = True
+                self.running = False
+                print(f"[{datetime.now()}] {self.name} finished, holding {self.describe(value)}")
+                break
+
+            next_tick += self.schedule.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (host stall, slow tick): skip missed ticks rather than bursting
+                next_tick = time.monotonic()
+
+    def get_status(self):
+        return {
+            'running': self.running,
+            'finished': self.finished,
+            'elapsed': self.elapsed,
+            'duration': self.schedule.duration,
+            'loop': self.schedule.loop,
+            'segment': self.segment_index + 1 if self.segment_index is not None else None,
+            'segments': len(self.schedule.segments),
+            'tick': self.schedule.tick,
+            'max_tick_lag': self.max_lag,
+        }
+
+    def start(self):
+        """Run the schedule in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,29 @@
+#!/bin/bash
+# Copy the shared modules in this directory into the build contexts that use them.
+# 1_cpu_load and 2_mem_load build from their own directory (docker compose `build: .`,
+# `gcloud run deploy --source .`), so each carries a copy: edit the files here, never
+# the copies, then run this script. 4_cpu_mem_load builds from test/cloudrun and
+# copies straight from common/.
+#
+#   ./sync.sh          # copy common/*.py into 1_cpu_load and 2_mem_load
+#   ./sync.sh --check  # exit 1 if any copy differs from common/
+
+set -e
+cd "$(dirname "$0")"
+
+TARGETS="../1_cpu_load ../2_mem_load"
+status=0
+for module in *.py; do
+  for target in $TARGETS; do
+    if [ "$1" = "--check" ]; then
+      if ! cmp -s "$module" "$target/$module"; then
+        echo "❌ $target/$module differs from common/$module (run common/sync.sh)"
+        status=1
+      fi
+    else
+      cp "$module" "$target/$module"
+      echo "✅ common/$module -> $target/$module"
+    fi
+  done
+done
+exit $status
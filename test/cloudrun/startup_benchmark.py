@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Cloud Run load images
+Starts an image (as a local process or a docker container) and measures, from
+the moment it is launched:
+    time-to-first-listen  first successful TCP connect on the port
+    time-to-ready         first 200 from /readyz
+    time-to-target-load   first /metrics sample where the container reaches
+                          the configured CPU and/or memory target
+
+Usage:
+    python3 startup_benchmark.py cpu mem combined --runs 5
+    python3 startup_benchmark.py cpu --mode docker --image cpu-load-generator:latest
+    python3 startup_benchmark.py mem --json --max-listen 1.0   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Per-image entry point, default env and the targets checked against /metrics
+IMAGES = {
+    'cpu': {
+        'dir': '1_cpu_load',
+        'script': 'cpu_load_with_http.py',
+        'docker_image': 'cpu-load-generator:latest',
+        'env': {'CPU_TARGET': '75'},
+        'targets': {'cpu': 'CPU_TARGET'},
+    },
+    'mem': {
+        'dir': '2_mem_load',
+        'script': 'mem_load_with_http.py',
+        'docker_image': 'memory-load-generator:latest',
+        'env': {'MEMORY_TARGET': '75'},
+        'targets': {'memory': 'MEMORY_TARGET'},
+    },
+    'combined': {
+        'dir': '4_cpu_mem_load',
+        'script': 'combined_load_with_http.py',
+        'docker_image': 'cpu-mem-load-generator:latest',
+        'env': {'CPU_TARGET': '75', 'MEMORY_TARGET': '75'},
+        'targets': {'cpu': 'CPU_TARGET', 'memory': 'MEMORY_TARGET'},
+        'pythonpath': ['1_cpu_load', '2_mem_load'],
+    },
+    'spanner': {
+        'dir': '../spanner/1_cpu_load',
+        'script': 'cpu_load_with_http.py',
+        'docker_image': 'spanner-load-generator:latest',
+        'env': {},
+        # Spanner load lands on the Spanner instance, not the container
+        'targets': {},
+    },
+}
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def is_listening(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(0.2)
+        return s.connect_ex(('127.0.0.1', port)) == 0
+
+def http_get(port, path):
+    """GET a path; returns (status, body) or (None, None) when the request fails"""
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=2) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except OSError:
+        return None, None
+
+def parse_metrics(text):
+    """Prometheus text format -> {name: value} (first series of each name)"""
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        name, _, value = line.rpartition(' ')
+        name = name.split('{', 1)[0]
+        if name not in values:
+            try:
+                values[name] = float(value)
+            except ValueError:
+                pass
+    return values
+
+def target_reached(metrics, targets, env, tolerance):
+    """True when every configured resource is within `tolerance` points of its target"""
+    for resource, variable in targets.items():
+        target = float(env[variable])
+        if resource == 'cpu':
+            actual = metrics.get('loadgen_container_cpu_usage_percent')
+        else:
+            used = metrics.get('loadgen_container_memory_usage_bytes')
+            limit = metrics.get('loadgen_container_memory_limit_bytes')
+            actual = used / limit * 100 if used is not None and limit else None
+        if actual is None or actual < target - tolerance:
+            return False
+    return True
+
+def launch(name, image, mode, port, env, docker_image=None):
+    """Start one instance of the image; returns the Popen handle"""
+    if mode == 'docker':
+        command = ['docker', 'run', '--rm', '-p', f'{port}:8080', '-e', 'PORT=8080']
+        for key, value in env.items():
+            command += ['-e', f'{key}={value}']
+        command.append(docker_image or image['docker_image'])
+        return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                start_new_session=True)
+
+    directory = os.path.normpath(os.path.join(BASE_DIR, image['dir']))
+    process_env = {**os.environ, **env, 'PORT': str(port)}
+    if image.get('pythonpath'):
+        process_env['PYTHONPATH'] = os.pathsep.join(os.path.join(BASE_DIR, d) for d in image['pythonpath'])
+    # Own session so stop() reaches the worker processes too
+    return subprocess.Popen([sys.executable, image['script']], cwd=directory, env=process_env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+def stop(process, timeout=15):
+    """Ctrl+C the whole process group (graceful shutdown paths), then kill what is left"""
+    try:
+        os.killpg(process.pid, signal.SIGINT)
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        pass
+    except ProcessLookupError:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+def run_once(name, mode, env_overrides, timeout, tolerance, docker_image=None):
+    """
+    Launch the image once and time its startup milestones
+
+    Returns:
+        dict with first_listen, ready and target_load in seconds (None if not reached)
+    """
+    image = IMAGES[name]
+    env = {'METADATA_STUB': '1', 'PYTHONUNBUFFERED': '1', **image['env'], **env_overrides}
+    port = free_port()
+    result = {'first_listen': None, 'ready': None, 'target_load': None}
+
+    start = time.monotonic()
+    process = launch(name, image, mode, port, env, docker_image)
+    try:
+        deadline = start + timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            now = time.monotonic() - start
+            if result['first_listen'] is None:
+                if is_listening(port):
+                    result['first_listen'] = now
+                else:
+                    time.sleep(0.005)
+                    continue
+            if result['ready'] is None:
+                status, _ = http_get(port, '/readyz')
+                if status == 200:
+                    result['ready'] = time.monotonic() - start
+            if result['ready'] is not None and result['target_load'] is None:
+                if not image['targets']:
+                    result['target_load'] = result['ready']
+                else:
+                    status, body = http_get(port, '/metrics')
+                    if status == 200 and target_reached(parse_metrics(body), image['targets'], env, tolerance):
+                        result['target_load'] = time.monotonic() - start
+            if result['target_load'] is not None:
+                break
+            time.sleep(0.05)
+    finally:
+        stop(process)
+    return result
+
+def summarize(runs):
+    """min / median / max per milestone over all runs that reached it"""
+    summary = {}
+    for key in ['first_listen', 'ready', 'target_load']:
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = {
+            'min': min(values) if values else None,
+            'median': statistics.median(values) if values else None,
+            'max': max(values) if values else None,
+            'reached': len(values),
+        }
+    return summary
+
+def format_seconds(value):
+    return f"{value:7.3f}s" if value is not None else "    N/A "
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start latency of the Cloud Run load images')
+    parser.add_argument('images', nargs='+', choices=sorted(IMAGES), help='Images to benchmark')
+    parser.add_argument('--mode', choices=['local', 'docker'], default='local',
+                        help='Run the entry script directly (default) or a built docker image')
+    parser.add_argument('--image', help='Docker image tag (docker mode, default: the tag used by docker-compose)')
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts per image')
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for the target load per run')
+    parser.add_argument('--tolerance', type=float, default=10, help='Percentage points below target counted as reached')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help='Extra env for the image')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--max-listen', type=float, help='Fail if median time-to-first-listen exceeds this (s)')
+    parser.add_argument('--max-target', type=float, help='Fail if median time-to-target-load exceeds this (s)')
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split('=', 1) for item in args.env)
+    results = {}
+    for name in args.images:
+        runs = [run_once(name, args.mode, env_overrides, args.timeout, args.tolerance, args.image)
+                for _ in range(args.runs)]
+        results[name] = {'runs': runs, 'summary': summarize(runs)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'image':<10} {'milestone':<14} {'min':>8} {'median':>8} {'max':>8}  reached")
+        for name, result in results.items():
+            for key, label in [('first_listen', 'first listen'), ('ready', 'ready'), ('target_load', 'target load')]:
+                stats = result['summary'][key]
+                print(f"{name:<10} {label:<14} {format_seconds(stats['min'])} {format_seconds(stats['median'])} "
+                      f"{format_seconds(stats['max'])}  {stats['reached']}/{args.runs}")
+
+    # Regression gate
+    failed = False
+    for name, result in results.items():
+        for key, limit in [('first_listen', args.max_listen), ('target_load', args.max_target)]:
+            median = result['summary'][key]['median']
+            if limit is not None and (median is None or median > limit):
+                print(f"FAIL: {name} median {key} {format_seconds(median).strip()} exceeds {limit}s", file=sys.stderr)
+                failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,50 @@
 Spanner Load Generator with HTTP server for Cloud Run deployment
 Monitors and reports Spanner CPU/Memory usage
 """
-from cpu_load import SpannerLoadGenerator
-from google.cloud import monitoring_v3
 import os
 import time
 import threading
+import json
+from urllib.parse import urlparse
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import socket
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# The google.cloud clients (spanner, monitoring) are imported lazily, after the
+# HTTP server is listening, so they do not delay the Cloud Run startup probe
 
 # Global generator instance
 generator = None
 load_thread = None
+# Set once the HTTP socket is bound and listening
+http_ready = threading.Event()
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     """HTTP handler for health checks and status"""
     
+    def send_text(self, status, text, content_type='text/plain; charset=utf-8'):
+        """Send a small response body"""
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/health' or self.path == '/':
+        path = urlparse(self.path).path
+        if path == '/livez':
+            # Constant-time liveness: the server thread is answering
+            self.send_text(200, 'ok')
+        elif path == '/readyz':
+            # Ready once the generator has finished setup and is issuing operations
+            if generator and generator.running:
+                payload, status = {'ready': True}, 200
+            else:
+                payload, status = {'ready': False, 'reason': 'Spanner load generator not running'}, 503
+            self.send_text(status, json.dumps(payload), 'application/json')
+        elif path in ['/status', '/health', '/']:
+            # Full dashboard incl. Cloud Monitoring query (/health and / kept as aliases)
             self.send_response(200)
             self.send_header('Content-type', 'text/html; charset=utf-8')
             self.end_headers()
@@ -97,6 +122,8 @@ class HealthCheckHandler(BaseHTTPRequestHandler):
 def get_spanner_cpu_utilization(project_id, instance_id):
     """Get current Spanner CPU utilization from Cloud Monitoring"""
     try:
+        from google.cloud import monitoring_v3
+        
         client = monitoring_v3.MetricServiceClient()
         project_name = f"projects/{project_id}"
         
@@ -128,19 +155,25 @@ def get_spanner_cpu_utilization(project_id, instance_id):
         return "N/A"
 
 def start_http_server(port=8080):
-    """Start HTTP server"""
+    """Bind the HTTP server and serve it from a daemon thread (listening on return)"""
     try:
-        server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-        print(f"[{datetime.now()}] ✅ HTTP server listening on port {port}")
-        server.serve_forever()
+        # Threaded so probes never queue behind the Cloud Monitoring query in /status
+        server = ThreadingHTTPServer(('0.0.0.0', port), HealthCheckHandler)
     except Exception as e:
         print(f"[{datetime.now()}] ❌ Failed to start HTTP server: {e}")
+        raise
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_ready.set()
+    print(f"[{datetime.now()}] ✅ HTTP server listening on port {port}")
+    return server
 
 def run_load_generator():
     """Run load generator in background"""
     global generator
     
     try:
+        from cpu_load import SpannerLoadGenerator
+        
         project_id = os.getenv('GCP_PROJECT_ID')
         instance_id = os.getenv('SPANNER_INSTANCE_ID')
         database_id = os.getenv('SPANNER_DATABASE_ID', 'loadtest')
@@ -179,13 +212,9 @@ def main():
     
     print(f"[{datetime.now()}] Starting HTTP server on port {port}...")
     
-    # Start HTTP server FIRST (daemon=True so it doesn't block)
-    http_thread = threading.Thread(target=start_http_server, args=(port,), daemon=True)
-    http_thread.start()
-    
-    # Give HTTP server time to bind
-    time.sleep(2)
-    print(f"[{datetime.now()}] ✅ HTTP server started")
+    # Start HTTP server FIRST: the socket is bound when this returns, so no
+    # fixed sleep is needed before starting the load
+    start_http_server(port)
     
     # Validate environment (after HTTP is up)
     project_id = os.getenv('GCP_PROJECT_ID')
@@ -199,7 +228,8 @@ def main():
         print(f"[{datetime.now()}] WARNING: CPU_TARGET must be 75, 85, or 95 (got {target_cpu})")
         print(f"[{datetime.now()}] HTTP server running but load generator disabled")
     else:
-        # Start load generator in background (after HTTP is confirmed up)
+        # Start load generator in background once HTTP is listening
+        http_ready.wait()
         print(f"[{datetime.now()}] Starting load generator in background...")
         load_thread = threading.Thread(target=run_load_generator, daemon=True)
         load_thread.start()